@@ -0,0 +1,60 @@
+"""
+Parse throughput of the precedence climbing ``Parser`` against the per-level ``RecursiveDescentParser``.
+
+    python -m benchmarks.parse_throughput [--declarations N] [--repeat R]
+"""
+
+import argparse
+import random
+import time
+
+from plox.parser import Parser, RecursiveDescentParser
+from plox.scanner import FastScanner
+from plox.token import Token
+
+OPERATORS = ("+", "-", "*", "/", "<", "<=", ">", ">=", "==", "!=", "and", "or")
+
+
+def expression(rng: random.Random, depth: int) -> str:
+    if depth == 0 or rng.random() < 0.2:
+        return rng.choice(("x", "y", "count", "1", "2.5", '"s"', "true", "nil", "obj.field", "f(x, 2)"))
+    if rng.random() < 0.1:
+        return f"-{expression(rng, depth - 1)}"
+    if rng.random() < 0.15:
+        return f"({expression(rng, depth - 1)})"
+    return f"{expression(rng, depth - 1)} {rng.choice(OPERATORS)} {expression(rng, depth - 1)}"
+
+
+def program(declarations: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    return "\n".join(f"var v{i} = {expression(rng, 5)};" for i in range(declarations))
+
+
+def measure(parser: type[Parser], tokens: list[Token], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parser(tokens).parse()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    arguments = argparse.ArgumentParser()
+    arguments.add_argument("--declarations", type=int, default=5000)
+    arguments.add_argument("--repeat", type=int, default=5)
+    options = arguments.parse_args()
+
+    tokens = FastScanner(program(options.declarations)).scan_tokens()
+    if Parser(tokens).parse() != RecursiveDescentParser(tokens).parse():
+        raise SystemExit("parsers disagree")
+
+    baseline = measure(RecursiveDescentParser, tokens, options.repeat)
+    pratt = measure(Parser, tokens, options.repeat)
+    for name, seconds in (("recursive descent", baseline), ("precedence climbing", pratt)):
+        print(f"{name:>20}: {seconds * 1000:8.1f} ms  {len(tokens) / seconds / 1e6:6.2f} Mtokens/s")
+    print(f"{'speedup':>20}: {baseline / pratt:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
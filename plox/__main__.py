@@ -2,7 +2,11 @@ import argparse
 import sys
 import logging
 
+from plox.engines import DEFAULT_ENGINE, ENGINES, interpreter_for
+from plox.optimizer import Optimizer
 from plox.plox import Plox
+from plox.quickening import QuickeningInterpreter
+from plox.scanner import DEFAULT_SCANNER, SCANNERS
 
 
 logger = logging.getLogger(__name__)
@@ -10,13 +14,44 @@ logger = logging.getLogger(__name__)
 
 def main():
     parser = argparse.ArgumentParser()
-    _, args = parser.parse_known_args()
+    parser.add_argument("--scanner", choices=sorted(SCANNERS), default=DEFAULT_SCANNER)
+    parser.add_argument("--stream", action="store_true", help="execute each top-level declaration once it is parsed")
+    parser.add_argument("--no-cache", action="store_true", help="don't read or write __ploxcache__")
+    parser.add_argument("--jobs", type=int, help="worker processes used to compile imported modules")
+    parser.add_argument("--lazy", action="store_true", help="parse and resolve function bodies on their first call")
+    parser.add_argument("--engine", choices=sorted(ENGINES), default=DEFAULT_ENGINE, help="how the program is run")
+    parser.add_argument(
+        "--type-feedback", action="store_true", help="with --engine quick, print the types each site saw to stderr"
+    )
+    parser.add_argument(
+        "--memo-stats", action="store_true", help="print the cache statistics of memoized functions to stderr"
+    )
+    parser.add_argument("-O", dest="optimize", action="store_true", help="optimize the program before running it")
+    options, args = parser.parse_known_args()
+    Plox.scanner = options.scanner
+    Plox.stream = options.stream
+    Plox.use_cache = not options.no_cache
+    Plox.jobs = options.jobs
+    Plox.lazy = options.lazy
+    Plox.interpreter = interpreter_for(options.engine)
+    if options.type_feedback and not isinstance(Plox.interpreter, QuickeningInterpreter):
+        parser.error("--type-feedback needs --engine quick")
+    if options.optimize:
+        Plox.interpreter.optimizer = Optimizer()
     if len(args) > 1:
         print("Usage: plox [script]")
         sys.exit(64)
     elif len(args) == 1:
         print(args[0])
-        Plox.runFile(args[0])
+        try:
+            Plox.runFile(args[0])
+        finally:
+            if options.type_feedback:
+                for feedback in sorted(Plox.interpreter.feedback, key=lambda feedback: feedback.line):
+                    print(feedback, file=sys.stderr)
+            if options.memo_stats:
+                for memoized in Plox.interpreter.memoized:
+                    print(memoized.statistics(), file=sys.stderr)
     else:
         Plox.runPrompt()
 
@@ -0,0 +1,244 @@
+from array import array
+import pickle
+from collections.abc import Iterator
+from typing import IO, Any, Final, Union
+
+from plox.expr import (
+    Assign,
+    Binary,
+    Call,
+    Expr,
+    Get,
+    Grouping,
+    Index,
+    Literal,
+    Logical,
+    Set,
+    SetIndex,
+    Super,
+    This,
+    Unary,
+    Variable,
+)
+from plox.stmt import Block, Class, Expression, Function, If, Import, Print, Return, Stmt, Var, While
+from plox.token import Token
+
+Node = Union[Expr, Stmt]
+
+# How each field of a node class is stored in the arena:
+#   node      id of a child node, or NONE
+#   nodes     offset into ``AstArena.lists`` of a list of child node ids
+#   token     index into ``AstArena.tokens``, or NONE
+#   tokens    offset into ``AstArena.lists`` of a list of token indices
+#   constant  index into ``AstArena.constants``
+LAYOUTS: Final[dict[type, tuple[str, ...]]] = {
+    Binary: ("node", "token", "node"),
+    Grouping: ("node",),
+    Literal: ("constant",),
+    Unary: ("token", "node"),
+    Variable: ("token",),
+    Assign: ("token", "node"),
+    Logical: ("node", "token", "node"),
+    Call: ("node", "token", "nodes"),
+    Get: ("token", "node"),
+    Set: ("token", "node", "node"),
+    Index: ("node", "node"),
+    SetIndex: ("node", "node", "node"),
+    This: ("token",),
+    Super: ("token", "token"),
+    Expression: ("node",),
+    Print: ("node",),
+    Return: ("token", "node"),
+    Var: ("token", "node"),
+    While: ("node", "node"),
+    Block: ("nodes",),
+    Function: ("token", "tokens", "nodes", "constant"),
+    If: ("node", "node", "node"),
+    Class: ("token", "node", "nodes"),
+    Import: ("token", "token"),
+}
+NODE_TYPES: Final[tuple[type, ...]] = tuple(LAYOUTS)
+KINDS: Final[dict[type, int]] = {type: kind for kind, type in enumerate(NODE_TYPES)}
+NONE: Final[int] = -1
+
+
+class AstArena:
+    """
+    Flat representation of a program: node ``i`` is ``NODE_TYPES[kinds[i]]`` and its fields are
+    ``fields[4 * i : 4 * i + 4]``, interpreted according to ``LAYOUTS``. Lists of children live in one shared
+    ``lists`` array as a length followed by the items, so a list field is a single offset.
+
+    What ``Resolver`` records on a node is kept alongside, at index ``i`` of ``depths``, ``slots`` and ``sizes``,
+    with ``NONE`` for ``None``, and of ``flags``, which holds ``tail`` and ``pure`` as bits, so a resolved program
+    comes back resolved.
+
+    Nodes reference each other by integer id only, so the arena is a handful of arrays plus the token and constant
+    tables, which keeps it small and cheap to pickle, write to disk or send to another process.
+    """
+
+    ARITY: Final[int] = 4
+    TAIL: Final[int] = 1
+    PURE: Final[int] = 2
+
+    def __init__(self) -> None:
+        self.kinds: Final[array[int]] = array("B")
+        self.fields: Final[array[int]] = array("l")
+        self.lists: Final[array[int]] = array("l")
+        self.depths: Final[array[int]] = array("l")
+        self.slots: Final[array[int]] = array("l")
+        self.sizes: Final[array[int]] = array("l")
+        self.flags: Final[array[int]] = array("B")
+        self.tokens: Final[list[Token]] = []
+        self.constants: Final[list[Any]] = []
+        self.token_ids: Final[dict[int, int]] = {}
+        self.program: int = NONE
+
+    @classmethod
+    def from_program(cls, statements: list[Stmt]) -> "AstArena":
+        arena = cls()
+        arena.program = arena.add_list([arena.add(statement) for statement in statements])
+        arena.token_ids.clear()
+        return arena
+
+    def to_program(self) -> list[Stmt]:
+        return [self.node(statement) for statement in self.items(self.program)]
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def add(self, node: Node | None) -> int:
+        if node is None:
+            return NONE
+        layout = LAYOUTS[type(node)]
+        values = [
+            self.encode(kind, getattr(node, name)) for kind, name in zip(layout, node.__match_args__, strict=True)
+        ]
+        values += [NONE] * (self.ARITY - len(values))
+
+        self.kinds.append(KINDS[type(node)])
+        self.fields.extend(values)
+        self.depths.append(optional(getattr(node, "depth", None)))
+        self.slots.append(optional(node.slot))
+        self.sizes.append(optional(getattr(node, "size", None)))
+        tail, pure = getattr(node, "tail", False), getattr(node, "pure", False)
+        self.flags.append((self.TAIL if tail else 0) | (self.PURE if pure else 0))
+        return len(self.kinds) - 1
+
+    def encode(self, kind: str, value: Any) -> int:
+        match kind:
+            case "node":
+                return self.add(value)
+            case "nodes":
+                return self.add_list([self.add(node) for node in value])
+            case "token":
+                return self.add_token(value)
+            case "tokens":
+                return self.add_list([self.add_token(token) for token in value])
+            case _:
+                self.constants.append(value)
+                return len(self.constants) - 1
+
+    def add_token(self, token: Token | None) -> int:
+        if token is None:
+            return NONE
+        index = self.token_ids.get(id(token))
+        if index is None:
+            index = self.token_ids[id(token)] = len(self.tokens)
+            self.tokens.append(token)
+        return index
+
+    def add_list(self, items: list[int]) -> int:
+        offset = len(self.lists)
+        self.lists.append(len(items))
+        self.lists.extend(items)
+        return offset
+
+    def kind(self, node: int) -> type:
+        return NODE_TYPES[self.kinds[node]]
+
+    def field(self, node: int, index: int) -> int:
+        return self.fields[self.ARITY * node + index]
+
+    def items(self, offset: int) -> array[int]:
+        return self.lists[offset + 1 : offset + 1 + self.lists[offset]]
+
+    def children(self, node: int) -> Iterator[int]:
+        """Ids of the direct child nodes of ``node``, in field order."""
+        for index, kind in enumerate(LAYOUTS[self.kind(node)]):
+            value = self.field(node, index)
+            if kind == "node" and value != NONE:
+                yield value
+            elif kind == "nodes":
+                yield from self.items(value)
+
+    def walk(self, node: int) -> Iterator[int]:
+        """Ids of ``node`` and all of its descendants, in pre-order."""
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            yield current
+            stack.extend(reversed(list(self.children(current))))
+
+    def node(self, node: int) -> Any:
+        """Rebuild the ``plox.expr``/``plox.stmt`` object for ``node`` and its subtree."""
+        if node == NONE:
+            return None
+        type = self.kind(node)
+        values = [self.decode(kind, self.field(node, index)) for index, kind in enumerate(LAYOUTS[type])]
+        result = type(*values)
+        # Only what the resolver set, leaving the class defaults in place of the rest.
+        if isinstance(result, Expr):
+            if self.depths[node] != NONE:
+                result.depth, result.slot = self.depths[node], self.slots[node]
+            return result
+        if self.slots[node] != NONE:
+            result.slot = self.slots[node]
+        if self.sizes[node] != NONE:
+            result.size = self.sizes[node]
+        if self.flags[node] & self.TAIL:
+            result.tail = True
+        if self.flags[node] & self.PURE:
+            result.pure = True
+        return result
+
+    def decode(self, kind: str, value: int) -> Any:
+        match kind:
+            case "node":
+                return self.node(value)
+            case "nodes":
+                return [self.node(item) for item in self.items(value)]
+            case "token":
+                return None if value == NONE else self.tokens[value]
+            case "tokens":
+                return [self.tokens[item] for item in self.items(value)]
+            case _:
+                return self.constants[value]
+
+    def dump(self, file: IO[bytes]) -> None:
+        pickle.dump(self, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def load(file: IO[bytes]) -> "AstArena":
+        return pickle.load(file)
+
+
+def optional(value: int | None) -> int:
+    return NONE if value is None else value
+
+
+class ArenaVisitor:
+    """
+    Walks an ``AstArena`` by node id. ``visit`` dispatches to ``visit_<NodeClass>(node)`` when the subclass defines
+    it and to ``generic_visit``, which visits every child, otherwise.
+    """
+
+    def __init__(self, arena: AstArena) -> None:
+        self.arena = arena
+
+    def visit(self, node: int) -> Any:
+        method = getattr(self, f"visit_{self.arena.kind(node).__name__}", self.generic_visit)
+        return method(node)
+
+    def generic_visit(self, node: int) -> None:
+        for child in self.arena.children(node):
+            self.visit(child)
@@ -0,0 +1,158 @@
+import operator
+from collections.abc import Callable
+from typing import TYPE_CHECKING, Any, override
+
+from plox.natives import ListInstance, NativeInstance, whole_number
+
+try:
+    import numpy
+except ImportError:  # NumPy is optional: without it ``Array`` is there but can't make arrays.
+    numpy = None
+
+if TYPE_CHECKING:
+    from plox.interpreter import Interpreter
+
+
+def numbers(value: Any) -> Any:
+    """The NumPy operand for ``value``, one side of an arithmetic operator with an array on the other."""
+    if isinstance(value, ArrayInstance):
+        return value.values
+    if type(value) is float:
+        return value
+    raise RuntimeError("Operands must be numbers or arrays.")
+
+
+def arithmetic(function: Callable[[Any, Any], Any], reflected: bool = False) -> Callable[..., "ArrayInstance"]:
+    """An operator method of ``ArrayInstance``, applying ``function`` to every item."""
+
+    def method(self: "ArrayInstance", other: Any) -> "ArrayInstance":
+        if isinstance(other, ArrayInstance) and len(other.values) != len(self.values):
+            raise RuntimeError("Arrays must have the same length.")
+        left, right = (numbers(other), self.values) if reflected else (self.values, numbers(other))
+        if function is operator.truediv and numpy.any(right == 0):
+            raise ValueError("Division by zero")
+        with numpy.errstate(over="ignore", invalid="ignore"):
+            return ArrayInstance(function(left, right))
+
+    return method
+
+
+class ArrayInstance(NativeInstance):
+    """
+    A Lox ``Array``: numbers in a one-dimensional NumPy array of floats. The arithmetic operators work on every
+    item at once, in NumPy's loops, when either operand is an array; the other one is an array of the same length
+    or a number. ``slice`` returns a view sharing the items, not a copy.
+    """
+
+    __slots__ = ("values",)
+
+    exposed = ("length", "sum", "min", "max", "dot", "slice", "copy", "toList")
+
+    def __init__(self, values: Any) -> None:
+        self.values = values
+
+    __add__ = arithmetic(operator.add)
+    __radd__ = arithmetic(operator.add, reflected=True)
+    __sub__ = arithmetic(operator.sub)
+    __rsub__ = arithmetic(operator.sub, reflected=True)
+    __mul__ = arithmetic(operator.mul)
+    __rmul__ = arithmetic(operator.mul, reflected=True)
+    __truediv__ = arithmetic(operator.truediv)
+    __rtruediv__ = arithmetic(operator.truediv, reflected=True)
+
+    def __neg__(self) -> "ArrayInstance":
+        return ArrayInstance(-self.values)
+
+    def position(self, key: Any) -> int:
+        position = whole_number(key, "Array index")
+        if not 0 <= position < len(self.values):
+            raise RuntimeError("Array index out of range.")
+        return position
+
+    @override
+    def index(self, key: Any) -> Any:
+        return float(self.values[self.position(key)])
+
+    @override
+    def set_index(self, key: Any, value: Any) -> None:
+        if type(value) is not float:
+            raise RuntimeError("Array items must be numbers.")
+        self.values[self.position(key)] = value
+
+    @override
+    def format(self, stringify: Callable[[Any], str]) -> str:
+        return "[" + ", ".join(str(value) for value in self.values.tolist()) + "]"
+
+    def length(self, interpreter: "Interpreter") -> float:
+        return float(len(self.values))
+
+    def sum(self, interpreter: "Interpreter") -> float:
+        return float(self.values.sum())
+
+    def min(self, interpreter: "Interpreter") -> float:
+        if not len(self.values):
+            raise RuntimeError("Can't take the minimum of an empty array.")
+        return float(self.values.min())
+
+    def max(self, interpreter: "Interpreter") -> float:
+        if not len(self.values):
+            raise RuntimeError("Can't take the maximum of an empty array.")
+        return float(self.values.max())
+
+    def dot(self, interpreter: "Interpreter", other: Any) -> float:
+        if not isinstance(other, ArrayInstance):
+            raise RuntimeError("Can only take the dot product of two arrays.")
+        if len(other.values) != len(self.values):
+            raise RuntimeError("Arrays must have the same length.")
+        return float(numpy.dot(self.values, other.values))
+
+    def slice(self, interpreter: "Interpreter", start: Any, end: Any) -> "ArrayInstance":
+        """The items from ``start`` up to ``end``, like ``List.slice``, as a view: writing to it writes here."""
+        first = None if start is None else whole_number(start, "Slice start")
+        last = None if end is None else whole_number(end, "Slice end")
+        return ArrayInstance(self.values[first:last])
+
+    def copy(self, interpreter: "Interpreter") -> "ArrayInstance":
+        return ArrayInstance(self.values.copy())
+
+    def toList(self, interpreter: "Interpreter") -> ListInstance:
+        return ListInstance(self.values.tolist())
+
+
+class ArrayModule(NativeInstance):
+    """The global ``Array``, whose methods make arrays. Each raises an error when NumPy isn't installed."""
+
+    __slots__ = ()
+
+    exposed = ("zeros", "range", "fromList")
+
+    @staticmethod
+    def require() -> None:
+        if numpy is None:
+            raise RuntimeError("Array needs NumPy, which isn't installed.")
+
+    def zeros(self, interpreter: "Interpreter", length: Any) -> ArrayInstance:
+        self.require()
+        count = whole_number(length, "Array length")
+        if count < 0:
+            raise RuntimeError("Array length can't be negative.")
+        return ArrayInstance(numpy.zeros(count))
+
+    def range(self, interpreter: "Interpreter", start: Any, end: Any) -> ArrayInstance:
+        """The numbers from ``start`` up to, but not including, ``end``, one apart."""
+        self.require()
+        if type(start) is not float or type(end) is not float:
+            raise RuntimeError("Range bounds must be numbers.")
+        return ArrayInstance(numpy.arange(start, end, dtype=float))
+
+    def fromList(self, interpreter: "Interpreter", items: Any) -> ArrayInstance:
+        self.require()
+        if not isinstance(items, ListInstance):
+            raise RuntimeError("Can only make an array from a list.")
+        if any(type(item) is not float for item in items.items):
+            raise RuntimeError("Array items must be numbers.")
+        return ArrayInstance(numpy.array(items.items, dtype=float))
+
+    @override
+    def format(self, stringify: Callable[[Any], str]) -> str:
+        return "Array"
@@ -0,0 +1,525 @@
+from array import array
+from collections.abc import Iterator
+from typing import TYPE_CHECKING, Any, Final
+
+from plox.expr import (
+    Assign,
+    Binary,
+    Call,
+    Expr,
+    Get,
+    Grouping,
+    Index,
+    Literal,
+    Logical,
+    Set,
+    SetIndex,
+    Super,
+    This,
+    Unary,
+    Variable,
+)
+from plox.stmt import Block, Class, Expression, Function, If, Import, Print, Return, Stmt, Var, While
+from plox.token import Token
+from plox.token_type import TokenType
+
+if TYPE_CHECKING:
+    from plox.interpreter import Interpreter
+
+# Every instruction is two ints in ``FunctionProto.code``: the opcode and one operand, which is 0 when unused. Jump
+# operands are absolute offsets into ``code``.
+CONSTANT: Final[int] = 0  # push constants[arg]
+POP: Final[int] = 1
+GET_LOCAL: Final[int] = 2  # push locals[arg]
+SET_LOCAL: Final[int] = 3  # locals[arg] = top, which stays on the stack
+DEFINE_LOCAL: Final[int] = 4  # pop into locals[arg]
+STORE_LOCAL: Final[int] = 5  # pop into locals[arg]: an assignment statement, or after DECLARE_LOCAL
+DECLARE_LOCAL: Final[int] = 6  # does nothing unless made a MAKE_CELL
+GET_CELL: Final[int] = 7  # the *_CELL instructions replace *_LOCAL ones for locals captured by closures
+SET_CELL: Final[int] = 8
+DEFINE_CELL: Final[int] = 9  # pop into a new cell at locals[arg]
+STORE_CELL: Final[int] = 10  # pop into the cell made by MAKE_CELL
+MAKE_CELL: Final[int] = 11  # an empty cell, so a function or class can capture its own name
+GET_UPVALUE: Final[int] = 12
+SET_UPVALUE: Final[int] = 13
+GET_GLOBAL: Final[int] = 14  # constants[arg] is the name token
+SET_GLOBAL: Final[int] = 15
+DEFINE_GLOBAL: Final[int] = 16
+GET_PROPERTY: Final[int] = 17
+SET_PROPERTY: Final[int] = 18  # [instance, value] -> [value]
+INSTANCE: Final[int] = 19  # check that top is an instance before the value of a SET_PROPERTY is evaluated
+GET_SUPER: Final[int] = 20  # [this, superclass] -> [bound method]
+ADD: Final[int] = 21
+SUBTRACT: Final[int] = 22
+MULTIPLY: Final[int] = 23
+DIVIDE: Final[int] = 24
+LESS: Final[int] = 25
+LESS_EQUAL: Final[int] = 26
+GREATER: Final[int] = 27
+GREATER_EQUAL: Final[int] = 28
+EQUAL: Final[int] = 29
+NOT_EQUAL: Final[int] = 30
+NEGATE: Final[int] = 31
+NOT: Final[int] = 32
+JUMP: Final[int] = 33
+JUMP_IF_FALSE: Final[int] = 34  # pops the condition
+AND: Final[int] = 35  # jump keeping a falsey top, else pop it
+OR: Final[int] = 36  # jump keeping a truthy top, else pop it
+PRINT: Final[int] = 37
+CALLABLE: Final[int] = 38  # check that top can be called before the arguments are evaluated
+CALL: Final[int] = 39  # [callee, *arguments] -> [result]; arg is the argument count
+INVOKE: Final[int] = 40  # [instance, *arguments] -> [result]; arg is name constant << 8 | argument count
+CLOSURE: Final[int] = 41  # constants[arg] is a FunctionProto
+RETURN: Final[int] = 42
+CLASS: Final[int] = 43  # [superclass or nil] -> [class]
+INHERIT: Final[int] = 44  # check that top is a class; constants[arg] is the superclass name token
+METHOD: Final[int] = 45  # [class, method] -> [class]
+IMPORT: Final[int] = 46  # constants[arg] is the module path
+# An assignment whose value is discarded, instead of a SET_* and a POP.
+STORE_UPVALUE: Final[int] = 47
+STORE_GLOBAL: Final[int] = 48
+# A binary operator with a literal right operand, constants[arg], the way counting loops and recursion use them.
+ADD_CONSTANT: Final[int] = 49
+SUBTRACT_CONSTANT: Final[int] = 50
+LESS_CONSTANT: Final[int] = 51
+INDEX: Final[int] = 52  # [list or map, key] -> [value]
+SET_INDEX: Final[int] = 53  # [list or map, key, value] -> [value]
+
+OPCODES: Final[dict[int, str]] = {
+    value: name for name, value in globals().items() if name.isupper() and type(value) is int
+}
+# Opcodes whose operand is an index into ``FunctionProto.constants``.
+CONSTANT_OPERANDS: Final[frozenset[int]] = frozenset(
+    (CONSTANT, CLOSURE, GET_GLOBAL, SET_GLOBAL, DEFINE_GLOBAL, GET_PROPERTY, SET_PROPERTY, INSTANCE, GET_SUPER)
+    + (CLASS, INHERIT, METHOD, IMPORT, STORE_GLOBAL, ADD_CONSTANT, SUBTRACT_CONSTANT, LESS_CONSTANT)
+)
+
+BINARY: Final[dict[TokenType, int]] = {
+    TokenType.PLUS: ADD,
+    TokenType.MINUS: SUBTRACT,
+    TokenType.STAR: MULTIPLY,
+    TokenType.SLASH: DIVIDE,
+    TokenType.LESS: LESS,
+    TokenType.LESS_EQUAL: LESS_EQUAL,
+    TokenType.GREATER: GREATER,
+    TokenType.GREATER_EQUAL: GREATER_EQUAL,
+    TokenType.EQUAL_EQUAL: EQUAL,
+    TokenType.BANG_EQUAL: NOT_EQUAL,
+}
+BINARY_CONSTANT: Final[dict[TokenType, int]] = {
+    TokenType.PLUS: ADD_CONSTANT,
+    TokenType.MINUS: SUBTRACT_CONSTANT,
+    TokenType.LESS: LESS_CONSTANT,
+}
+
+# How the instructions on a local change once a closure captures it.
+CAPTURED: Final[dict[int, int]] = {
+    GET_LOCAL: GET_CELL,
+    SET_LOCAL: SET_CELL,
+    DEFINE_LOCAL: DEFINE_CELL,
+    STORE_LOCAL: STORE_CELL,
+    DECLARE_LOCAL: MAKE_CELL,
+}
+
+
+class FunctionProto:
+    """
+    A compiled function: its instructions in an ``array`` and the constants they refer to. ``size`` is the number
+    of locals, starting with ``this`` for methods and then the parameters; ``cells`` are the parameters captured by
+    closures and ``upvalues`` says, for each variable the function captures, whether it is a local of the enclosing
+    function or one of its upvalues, and its index there.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        arity: int,
+        code: array,
+        constants: list[Any],
+        size: int,
+        cells: tuple[int, ...],
+        upvalues: tuple[tuple[bool, int], ...],
+        is_method: bool = False,
+    ) -> None:
+        self.name = name
+        self.arity = arity
+        self.code = code
+        self.constants = constants
+        self.size = size
+        self.cells = cells
+        self.upvalues = upvalues
+        self.is_method = is_method
+        self.padding: list[Any] = [None] * (size - arity - is_method)
+        # Whether the declaration compiled is pure, as ``Resolver`` found, so that ``memoize`` accepts it.
+        self.pure = False
+
+    def __str__(self) -> str:
+        return f"<fn {self.name} >"
+
+
+class Unit:
+    """The function being compiled, and what is known so far about its locals and upvalues."""
+
+    def __init__(self, name: str, enclosing: "Unit | None", arity: int = 0, is_method: bool = False) -> None:
+        self.name = name
+        self.enclosing = enclosing
+        self.arity = arity
+        self.is_method = is_method
+        # An initializer always returns ``this``, its local 0.
+        self.is_initializer = is_method and name == "init"
+        self.code: array[int] = array("l")
+        self.constants: list[Any] = []
+        self.literals: dict[tuple[type, str], int] = {}
+        self.count = 0
+        self.size = 0
+        self.locals: list[int] = []
+        self.captured: set[int] = set()
+        self.upvalues: list[tuple[bool, int]] = []
+
+    def finish(self) -> FunctionProto:
+        # Locals captured by a closure live in cells: rewrite every instruction on them.
+        code = self.code
+        for position in self.locals:
+            if code[position + 1] in self.captured:
+                code[position] = CAPTURED[code[position]]
+        parameters = self.arity + self.is_method
+        cells = tuple(sorted(index for index in self.captured if index < parameters))
+        return FunctionProto(
+            self.name, self.arity, code, self.constants, self.size, cells, tuple(self.upvalues), self.is_method
+        )
+
+
+def is_simple(expr: Expr) -> bool:
+    """Whether evaluating ``expr`` can neither fail nor have an effect, so it can be moved past a check that raises."""
+    match expr:
+        case Literal():
+            return True
+        case Grouping(expression):
+            return is_simple(expression)
+        case Variable() | This():
+            return expr.depth is not None
+    return False
+
+
+class Compiler:
+    """
+    Compiles resolved statements to ``FunctionProto``s for ``plox.vm.VM``.
+
+    The ``Frame``s the resolver assigned depths and slots against are flattened: each function gets one array of
+    locals, in which every frame that belongs to it, its parameters, its non-flat blocks and the hidden ``this`` and
+    ``super`` scopes, starts at its own ``base``. A local at ``(depth, slot)`` is at ``base + slot`` of the
+    ``depth``-th frame out, and when that frame belongs to an enclosing function it becomes an upvalue, whose
+    local is then kept in a cell shared with every closure that captures it. The code of a function is generated
+    before all of its captured locals are known, so ``Unit.finish`` rewrites the instructions on them at the end.
+    """
+
+    def __init__(self, interpreter: "Interpreter | None" = None) -> None:
+        self.interpreter = interpreter
+        self.unit = Unit("script", None)
+        self.frames: list[tuple[Unit, int]] = []
+
+    def script(self, statements: list[Stmt]) -> FunctionProto:
+        for statement in statements:
+            self.statement(statement)
+        self.emit(CONSTANT, self.constant(None))
+        self.emit(RETURN)
+        return self.unit.finish()
+
+    def emit(self, op: int, arg: int = 0) -> int:
+        code = self.unit.code
+        code.append(op)
+        code.append(arg)
+        return len(code) - 2
+
+    def local(self, op: int, index: int) -> None:
+        self.unit.locals.append(self.emit(op, index))
+
+    def jump(self, op: int) -> int:
+        return self.emit(op, -1)
+
+    def patch(self, jump: int) -> None:
+        self.unit.code[jump + 1] = len(self.unit.code)
+
+    def constant(self, value: Any) -> int:
+        unit = self.unit
+        if value is None or isinstance(value, bool | float | str):
+            # repr keeps 0 and -0, and 1 and true, apart.
+            key = (type(value), repr(value))
+            index = unit.literals.get(key)
+            if index is None:
+                index = unit.literals[key] = len(unit.constants)
+                unit.constants.append(value)
+            return index
+        unit.constants.append(value)
+        return len(unit.constants) - 1
+
+    def begin_frame(self, size: int, unit: Unit | None = None) -> int:
+        unit = unit or self.unit
+        base = unit.count
+        unit.count += size
+        unit.size = max(unit.size, unit.count)
+        self.frames.append((unit, base))
+        return base
+
+    def end_frame(self) -> None:
+        unit, base = self.frames.pop()
+        unit.count = base
+
+    def resolve(self, depth: int, slot: int) -> tuple[bool, int]:
+        """Whether the local at ``(depth, slot)`` belongs to the current function, and its local or upvalue index."""
+        unit, base = self.frames[-1 - depth]
+        if unit is self.unit:
+            return True, base + slot
+        return False, self.upvalue(self.unit, unit, base + slot)
+
+    def upvalue(self, unit: Unit, owner: Unit, index: int) -> int:
+        enclosing = unit.enclosing
+        assert enclosing is not None
+        if enclosing is owner:
+            owner.captured.add(index)
+            upvalue = (True, index)
+        else:
+            upvalue = (False, self.upvalue(enclosing, owner, index))
+        if upvalue not in unit.upvalues:
+            unit.upvalues.append(upvalue)
+        return unit.upvalues.index(upvalue)
+
+    def load(self, expr: Expr, name: Token) -> None:
+        if expr.depth is None:
+            self.emit(GET_GLOBAL, self.constant(name))
+            return
+        is_local, index = self.resolve(expr.depth, expr.slot)
+        if is_local:
+            self.local(GET_LOCAL, index)
+        else:
+            self.emit(GET_UPVALUE, index)
+
+    def store(self, expr: Expr, name: Token, keep: bool = True) -> None:
+        """Assign the value on top of the stack, leaving it there when ``keep`` is set."""
+        if expr.depth is None:
+            self.emit(SET_GLOBAL if keep else STORE_GLOBAL, self.constant(name))
+            return
+        is_local, index = self.resolve(expr.depth, expr.slot)
+        if is_local:
+            self.local(SET_LOCAL if keep else STORE_LOCAL, index)
+        else:
+            self.emit(SET_UPVALUE if keep else STORE_UPVALUE, index)
+
+    def declaration(self, declaration: Stmt) -> int | None:
+        """The local index ``declaration`` stores to, or ``None`` for a global."""
+        if declaration.slot is None:
+            return None
+        _, base = self.frames[-1]
+        return base + declaration.slot
+
+    def define(self, index: int | None, name: Token, op: int = DEFINE_LOCAL) -> None:
+        if index is None:
+            self.emit(DEFINE_GLOBAL, self.constant(name))
+        else:
+            self.local(op, index)
+
+    def statement(self, stmt: Stmt) -> None:
+        match stmt:
+            case Expression(Assign(name, value) as assign):
+                self.expression(value)
+                self.store(assign, name, keep=False)
+            case Expression(expression):
+                self.expression(expression)
+                self.emit(POP)
+            case Print(expression):
+                self.expression(expression)
+                self.emit(PRINT)
+            case Var(name, initializer):
+                if initializer is not None:
+                    self.expression(initializer)
+                else:
+                    self.emit(CONSTANT, self.constant(None))
+                self.define(self.declaration(stmt), name)
+            case Block(statements):
+                if stmt.size is not None:
+                    self.begin_frame(stmt.size)
+                for statement in statements:
+                    self.statement(statement)
+                if stmt.size is not None:
+                    self.end_frame()
+            case If(condition, thenBranch, elseBranch):
+                self.expression(condition)
+                otherwise = self.jump(JUMP_IF_FALSE)
+                self.statement(thenBranch)
+                if elseBranch is None:
+                    self.patch(otherwise)
+                else:
+                    end = self.jump(JUMP)
+                    self.patch(otherwise)
+                    self.statement(elseBranch)
+                    self.patch(end)
+            case While(condition, body):
+                start = len(self.unit.code)
+                self.expression(condition)
+                end = self.jump(JUMP_IF_FALSE)
+                self.statement(body)
+                self.emit(JUMP, start)
+                self.patch(end)
+            case Function(name, _, _):
+                index = self.declaration(stmt)
+                if index is not None:
+                    self.local(DECLARE_LOCAL, index)
+                self.emit(CLOSURE, self.constant(self.function(stmt)))
+                self.define(index, name, STORE_LOCAL)
+            case Return(_, value):
+                if self.unit.is_initializer:
+                    self.local(GET_LOCAL, 0)
+                elif value is not None:
+                    self.expression(value)
+                else:
+                    self.emit(CONSTANT, self.constant(None))
+                self.emit(RETURN)
+            case Import(_, path):
+                self.emit(IMPORT, self.constant(path.literal))
+            case Class(name, superclass, methods):
+                index = self.declaration(stmt)
+                if index is not None:
+                    self.local(DECLARE_LOCAL, index)
+                if superclass is not None:
+                    self.load(superclass, superclass.name)
+                    self.emit(INHERIT, self.constant(superclass.name))
+                    base = self.begin_frame(1)
+                    self.local(DEFINE_LOCAL, base)
+                    self.local(GET_LOCAL, base)
+                else:
+                    self.emit(CONSTANT, self.constant(None))
+                self.emit(CLASS, self.constant(name.lexeme))
+                for method in methods:
+                    self.emit(CLOSURE, self.constant(self.function(method, is_method=True)))
+                    self.emit(METHOD, self.constant(method.name.lexeme))
+                if superclass is not None:
+                    self.end_frame()
+                self.define(index, name, STORE_LOCAL)
+            case _:
+                raise ValueError("Unknown statement type")
+
+    def function(self, declaration: Function, is_method: bool = False) -> FunctionProto:
+        if declaration.lazy is not None:
+            # The closures of a function are known when it is compiled, so a lazy body can't wait for a call here.
+            assert self.interpreter is not None
+            self.interpreter.compile_function(declaration)
+        assert declaration.size is not None
+
+        unit = self.unit = Unit(declaration.name.lexeme, self.unit, len(declaration.params), is_method)
+        if is_method:
+            self.begin_frame(1)
+        self.begin_frame(declaration.size)
+        for statement in declaration.body:
+            self.statement(statement)
+        if unit.is_initializer:
+            self.local(GET_LOCAL, 0)
+        else:
+            self.emit(CONSTANT, self.constant(None))
+        self.emit(RETURN)
+        self.end_frame()
+        if is_method:
+            self.end_frame()
+
+        assert unit.enclosing is not None
+        self.unit = unit.enclosing
+        proto = unit.finish()
+        proto.pure = declaration.pure
+        return proto
+
+    def expression(self, expr: Expr) -> None:
+        match expr:
+            case Literal(value):
+                self.emit(CONSTANT, self.constant(value))
+            case Grouping(expression):
+                self.expression(expression)
+            case Unary(op, right):
+                self.expression(right)
+                match op.type:
+                    case TokenType.MINUS:
+                        self.emit(NEGATE)
+                    case TokenType.BANG:
+                        self.emit(NOT)
+                    case _:
+                        raise ValueError(f"Unknown unary operator {op.lexeme}")
+            case Binary(left, op, Literal(value)) if op.type in BINARY_CONSTANT:
+                self.expression(left)
+                self.emit(BINARY_CONSTANT[op.type], self.constant(value))
+            case Binary(left, op, right):
+                self.expression(left)
+                self.expression(right)
+                if op.type not in BINARY:
+                    raise ValueError(f"Unknown operator {op.lexeme}")
+                self.emit(BINARY[op.type])
+            case Logical(left, op, right):
+                self.expression(left)
+                end = self.jump(OR if op.type == TokenType.OR else AND)
+                self.expression(right)
+                self.patch(end)
+            case Variable(name) | This(name):
+                self.load(expr, name)
+            case Assign(name, value):
+                self.expression(value)
+                self.store(expr, name)
+            case Call(Get(name, obj), _, arguments) if all(is_simple(argument) for argument in arguments):
+                self.expression(obj)
+                for argument in arguments:
+                    self.expression(argument)
+                self.emit(INVOKE, self.constant(name) << 8 | len(arguments))
+            case Call(callee, _, arguments):
+                self.expression(callee)
+                if not all(is_simple(argument) for argument in arguments):
+                    self.emit(CALLABLE)
+                for argument in arguments:
+                    self.expression(argument)
+                self.emit(CALL, len(arguments))
+            case Get(name, obj):
+                self.expression(obj)
+                self.emit(GET_PROPERTY, self.constant(name))
+            case Set(name, obj, value):
+                self.expression(obj)
+                if not is_simple(value):
+                    self.emit(INSTANCE, self.constant(name))
+                self.expression(value)
+                self.emit(SET_PROPERTY, self.constant(name))
+            case Index(obj, index):
+                self.expression(obj)
+                self.expression(index)
+                self.emit(INDEX)
+            case SetIndex(obj, index, value):
+                self.expression(obj)
+                self.expression(index)
+                self.expression(value)
+                self.emit(SET_INDEX)
+            case Super(keyword, method):
+                assert expr.depth is not None
+                this = This(keyword)
+                this.depth, this.slot = expr.depth - 1, 0
+                self.load(this, keyword)
+                self.load(expr, keyword)
+                self.emit(GET_SUPER, self.constant(method))
+            case _:
+                raise ValueError("Unknown expression type")
+
+
+def instructions(proto: FunctionProto) -> Iterator[tuple[int, int, int]]:
+    """The offset, opcode and operand of each instruction of ``proto``."""
+    code = proto.code
+    for offset in range(0, len(code), 2):
+        yield offset, code[offset], code[offset + 1]
+
+
+def disassemble(proto: FunctionProto) -> str:
+    """A listing of ``proto`` and of the functions it creates, for debugging."""
+    lines = [f"== {proto.name} (arity {proto.arity}, {proto.size} locals, upvalues {list(proto.upvalues)}) =="]
+    nested = []
+    for offset, op, arg in instructions(proto):
+        name, detail = OPCODES[op], ""
+        if op in CONSTANT_OPERANDS:
+            value = proto.constants[arg]
+            detail = f" ({value.lexeme if isinstance(value, Token) else value})"
+            if isinstance(value, FunctionProto):
+                nested.append(value)
+        elif op == INVOKE:
+            detail = f" ({proto.constants[arg >> 8].lexeme}, {arg & 0xFF} arguments)"
+        lines.append(f"{offset:6} {name:<14}{arg}{detail}")
+    return "\n".join([*lines, *(disassemble(function) for function in nested)])
@@ -0,0 +1,84 @@
+import dataclasses
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+from typing import Final
+
+from plox import __version__
+from plox import expr, stmt
+from plox.stmt import Stmt
+from plox.token import Token
+
+CACHE_DIRECTORY: Final[str] = "__ploxcache__"
+# Bumped whenever what the resolver records for a program changes shape.
+FORMAT: Final[int] = 6
+
+
+def schema_fingerprint() -> str:
+    """Hash of the node and token layouts, so caches written by an incompatible tree are never unpickled."""
+    layout = [
+        (cls.__qualname__, [field.name for field in dataclasses.fields(cls)])
+        for module in (expr, stmt)
+        for cls in vars(module).values()
+        if dataclasses.is_dataclass(cls)
+    ]
+    layout.append((Token.__qualname__, list(Token.__slots__)))
+    return hashlib.sha256(repr(sorted(layout)).encode()).hexdigest()[:16]
+
+
+MAGIC: Final[bytes] = f"plox {__version__} {FORMAT} {sys.implementation.cache_tag} {schema_fingerprint()}\n".encode()
+
+
+def cache_path(path: str, lazy: bool = False) -> str:
+    """Where the program for the script at ``path`` is cached; lazily parsed programs are kept apart."""
+    directory, name = os.path.split(os.path.abspath(path))
+    variant = "-lazy" if lazy else ""
+    return os.path.join(directory, CACHE_DIRECTORY, f"{name}.plox-{__version__}{variant}.pickle")
+
+
+def source_hash(source: str) -> bytes:
+    return hashlib.sha256(source.encode()).digest()
+
+
+def load(path: str, source: str, lazy: bool = False) -> list[Stmt] | None:
+    """
+    Return the resolved program cached for the script at ``path``, or ``None`` when there is no cache entry or it
+    was written for a different source, plox version or interpreter. Unreadable entries count as missing.
+    """
+    try:
+        with open(cache_path(path, lazy), "rb") as f:
+            if f.readline() != MAGIC or f.read(32) != source_hash(source):
+                return None
+            return pickle.load(f)
+    except Exception:
+        return None
+
+
+def store(path: str, source: str, statements: list[Stmt], lazy: bool = False) -> None:
+    """
+    Cache the resolved program for the script at ``path``; resolution data lives on the nodes, so it is pickled
+    along with them. The entry is written to a temporary file and renamed
+    into place, so concurrent runs only ever see complete entries; failures leave the cache untouched.
+    """
+    target = cache_path(path, lazy)
+    try:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        payload = pickle.dumps(statements, protocol=pickle.HIGHEST_PROTOCOL)
+        fd, temporary = tempfile.mkstemp(dir=os.path.dirname(target), prefix=".", suffix=".tmp")
+    except (OSError, RecursionError, pickle.PicklingError):
+        return
+
+    try:
+        with os.fdopen(fd, "wb") as f:
+            os.fchmod(f.fileno(), os.stat(path).st_mode & 0o666)
+            f.write(MAGIC)
+            f.write(source_hash(source))
+            f.write(payload)
+        os.replace(temporary, target)
+    except OSError:
+        try:
+            os.unlink(temporary)
+        except OSError:
+            pass
@@ -0,0 +1,502 @@
+from collections.abc import Callable
+from typing import Any, Final, override
+
+from plox.environment import UNDEFINED, Environment, Frame
+from plox.expr import (
+    Assign,
+    Binary,
+    Call,
+    Expr,
+    Get,
+    Grouping,
+    Index,
+    Literal,
+    Logical,
+    Set,
+    SetIndex,
+    Super,
+    This,
+    Unary,
+    Variable,
+)
+from plox.interpreter import Interpreter, PloxClass, PloxFunction, PloxInstance, TailCall
+from plox.modules import locate
+from plox.natives import NativeInstance, PloxCallable, arity_error, get_index, set_index
+from plox.stmt import Block, Class, Expression, Function, If, Import, Print, Return, Stmt, Var, While
+from plox.token_type import TokenType
+
+# A compiled expression or statement: called with the environment it runs in, returns the value (statements return
+# nothing useful).
+Compiled = Callable[[Environment | Frame], Any]
+
+
+class PloxReturn(Exception):
+    """Raised by a compiled ``return`` and caught by ``ClosureFunction.run``, with the value, maybe a ``TailCall``."""
+
+    def __init__(self, value: Any) -> None:
+        super().__init__()
+        self.value = value
+
+
+def _slash(left: Any, right: Any) -> Any:
+    if right == 0:
+        raise ValueError("Division by zero")
+    return left / right
+
+
+# For each binary operator: a builder for two compiled operands and one for a compiled left operand and a constant
+# right one, the common ``i + 1`` or ``i < 10``. Both evaluate the operands in order and fail exactly like
+# ``Interpreter.binary``.
+BINARY: Final[dict[TokenType, tuple[Callable[[Compiled, Compiled], Compiled], Callable[[Compiled, Any], Compiled]]]] = {
+    TokenType.PLUS: (
+        lambda left, right: lambda env: left(env) + right(env),
+        lambda left, value: lambda env: left(env) + value,
+    ),
+    TokenType.MINUS: (
+        lambda left, right: lambda env: left(env) - right(env),
+        lambda left, value: lambda env: left(env) - value,
+    ),
+    TokenType.STAR: (
+        lambda left, right: lambda env: left(env) * right(env),
+        lambda left, value: lambda env: left(env) * value,
+    ),
+    TokenType.SLASH: (
+        lambda left, right: lambda env: _slash(left(env), right(env)),
+        lambda left, value: ((lambda env: left(env) / value) if value != 0 else (lambda env: _slash(left(env), value))),
+    ),
+    TokenType.LESS: (
+        lambda left, right: lambda env: left(env) < right(env),
+        lambda left, value: lambda env: left(env) < value,
+    ),
+    TokenType.LESS_EQUAL: (
+        lambda left, right: lambda env: left(env) <= right(env),
+        lambda left, value: lambda env: left(env) <= value,
+    ),
+    TokenType.GREATER: (
+        lambda left, right: lambda env: left(env) > right(env),
+        lambda left, value: lambda env: left(env) > value,
+    ),
+    TokenType.GREATER_EQUAL: (
+        lambda left, right: lambda env: left(env) >= right(env),
+        lambda left, value: lambda env: left(env) >= value,
+    ),
+    TokenType.EQUAL_EQUAL: (
+        lambda left, right: lambda env: Interpreter.is_equal(left(env), right(env)),
+        lambda left, value: lambda env: Interpreter.is_equal(left(env), value),
+    ),
+    TokenType.BANG_EQUAL: (
+        lambda left, right: lambda env: not Interpreter.is_equal(left(env), right(env)),
+        lambda left, value: lambda env: not Interpreter.is_equal(left(env), value),
+    ),
+}
+
+
+class FunctionCode:
+    """The compiled body of a ``Function`` declaration, shared by every closure created from it."""
+
+    __slots__ = ("declaration", "body", "arity", "padding")
+
+    def __init__(self, declaration: Function) -> None:
+        self.declaration = declaration
+        self.body: Compiled | None = None
+        self.arity = len(declaration.params)
+        self.padding: list[Any] = []
+
+    def compile(self, interpreter: "ClosureInterpreter") -> Compiled:
+        # Bodies are compiled on the first call, after a lazy body has been parsed and resolved.
+        if self.declaration.lazy is not None:
+            interpreter.compile_function(self.declaration)
+        self.padding = [None] * (self.declaration.size - self.arity)
+        self.body = interpreter.compiler.sequence(self.declaration.body)
+        return self.body
+
+
+class ClosureFunction(PloxFunction):
+    def __init__(
+        self, declaraction: Function, closure: Environment | Frame, is_initializer: bool, code: FunctionCode
+    ) -> None:
+        super().__init__(declaraction, closure, is_initializer)
+        self.code = code
+
+    @override
+    def arity(self) -> int:
+        return self.code.arity
+
+    @override
+    def run(self, interpreter: Interpreter, closure: Environment | Frame, arguments: list[Any]) -> Any:
+        # Like ``PloxFunction.run``, a trampoline over the ``TailCall``s the functions return.
+        function = self
+        while True:
+            code = function.code
+            body = code.body
+            if body is None:
+                assert isinstance(interpreter, ClosureInterpreter)
+                body = code.compile(interpreter)
+
+            # The arity has been checked by the caller, as for ``PloxFunction.run``.
+            try:
+                body(Frame(closure, arguments + code.padding))
+            except PloxReturn as return_value:
+                if function.is_initializer:
+                    return closure.values[0]
+                value = return_value.value
+                if value.__class__ is not TailCall:
+                    return value
+                function, closure, arguments = value.function, value.closure, value.arguments
+                continue
+
+            if function.is_initializer:
+                return closure.values[0]
+            return None
+
+    @override
+    def bind(self, instance: PloxInstance) -> "ClosureFunction":
+        return ClosureFunction(self.declaraction, Frame(self.closure, [instance]), self.is_initializer, self.code)
+
+
+class ClosureCompiler:
+    """
+    Compiles resolved statements and expressions into trees of Python closures. Each node is looked at once: its
+    operator, the ``depth`` and ``slot`` of the variable it refers to and its constant operands are bound into a
+    closure specialized for them, so running the program is nothing but closure calls.
+
+    Compiled code takes the environment it runs in as its only argument and behaves exactly like
+    ``Interpreter.execute`` and ``Interpreter.evaluate``, including the errors it raises.
+    """
+
+    def __init__(self, interpreter: "ClosureInterpreter") -> None:
+        self.interpreter = interpreter
+
+    def sequence(self, statements: list[Stmt]) -> Compiled:
+        compiled = tuple(self.statement(statement) for statement in statements)
+        if len(compiled) == 1:
+            return compiled[0]
+
+        def run(env: Environment | Frame) -> None:
+            for statement in compiled:
+                statement(env)
+
+        return run
+
+    def statement(self, stmt: Stmt) -> Compiled:
+        interpreter = self.interpreter
+        match stmt:
+            case Print(expression):
+                value = self.expression(expression)
+                return lambda env: print(str(value(env)))
+            case Expression(expression):
+                return self.expression(expression)
+            case Var(name, initializer):
+                value = self.expression(initializer) if initializer else lambda env: None
+                return self.define(stmt, name.lexeme, value)
+            case Block(statements):
+                run = self.sequence(statements)
+                if stmt.size is None:
+                    return run
+                size = stmt.size
+                return lambda env: run(Frame(env, [None] * size))
+            case If(condition, thenBranch, elseBranch):
+                test = self.expression(condition)
+                then = self.statement(thenBranch)
+                if elseBranch is None:
+
+                    def if_then(env: Environment | Frame) -> None:
+                        if (value := test(env)) is not None and value is not False:
+                            then(env)
+
+                    return if_then
+
+                otherwise = self.statement(elseBranch)
+
+                def if_then_else(env: Environment | Frame) -> None:
+                    if (value := test(env)) is not None and value is not False:
+                        then(env)
+                    else:
+                        otherwise(env)
+
+                return if_then_else
+            case While(condition, body):
+                test = self.expression(condition)
+                run = self.statement(body)
+
+                def loop(env: Environment | Frame) -> None:
+                    while (value := test(env)) is not None and value is not False:
+                        run(env)
+
+                return loop
+            case Function(name, _, _):
+                code = FunctionCode(stmt)
+                return self.define(stmt, name.lexeme, lambda env: ClosureFunction(stmt, env, False, code))
+            case Return(_, value):
+                if stmt.tail:
+                    assert isinstance(value, Call)
+                    arguments = [self.expression(argument) for argument in value.arguments]
+                    result = self.tail_call(self.expression(value.callee), arguments)
+                else:
+                    result = self.expression(value) if value is not None else lambda env: None
+
+                def return_(env: Environment | Frame) -> None:
+                    raise PloxReturn(result(env))
+
+                return return_
+            case Import(_, path):
+                return lambda env: interpreter.import_module(locate(interpreter.module, path.literal))
+            case Class(name, _, _):
+                return self.define(stmt, name.lexeme, self.klass(stmt))
+            case _:
+                raise ValueError("Unknown statement type")
+
+    def define(self, declaration: Stmt, name: str, value: Compiled) -> Compiled:
+        slot = declaration.slot
+        if slot is None:
+            return lambda env: env.define(name, value(env))
+
+        def define(env: Environment | Frame) -> None:
+            env.values[slot] = value(env)
+
+        return define
+
+    def klass(self, stmt: Class) -> Compiled:
+        name = stmt.name.lexeme
+        superclass = self.expression(stmt.superclass) if stmt.superclass else None
+        methods = [(method, FunctionCode(method), method.name.lexeme == "init") for method in stmt.methods]
+
+        def klass(env: Environment | Frame) -> PloxClass:
+            s_class = None
+            closure = env
+            if superclass is not None:
+                s_class = superclass(env)
+                if not isinstance(s_class, PloxClass):
+                    raise RuntimeError(stmt.superclass.name, "Superclass must be a class.")
+                closure = Frame(env, [s_class])
+
+            mets: dict[str, PloxFunction] = {
+                method.name.lexeme: ClosureFunction(method, closure, is_initializer, code)
+                for method, code, is_initializer in methods
+            }
+            return PloxClass(name, s_class, mets)
+
+        return klass
+
+    def expression(self, expr: Expr) -> Compiled:
+        match expr:
+            case Binary(left, op, right):
+                operands, constant = BINARY[op.type]
+                if isinstance(right, Literal):
+                    return constant(self.expression(left), right.value)
+                return operands(self.expression(left), self.expression(right))
+            case Literal(value):
+                return lambda env: value
+            case Logical(left, op, right):
+                first, second = self.expression(left), self.expression(right)
+                if op.type == TokenType.OR:
+
+                    def logical_or(env: Environment | Frame) -> Any:
+                        if (value := first(env)) is not None and value is not False:
+                            return value
+                        return second(env)
+
+                    return logical_or
+
+                def logical_and(env: Environment | Frame) -> Any:
+                    if (value := first(env)) is None or value is False:
+                        return value
+                    return second(env)
+
+                return logical_and
+            case Unary(op, right):
+                operand = self.expression(right)
+                match op.type:
+                    case TokenType.MINUS:
+                        return lambda env: -operand(env)
+                    case TokenType.BANG:
+                        return lambda env: (value := operand(env)) is None or value is False
+                raise ValueError(f"Unknown unary operator {op.lexeme}")
+            case Grouping(expression):
+                return self.expression(expression)
+            case Variable(name) | This(name):
+                return self.variable(expr, name)
+            case Assign(name, value):
+                return self.assign(expr, name, self.expression(value))
+            case Call(callee, _, arguments):
+                return self.call(self.expression(callee), [self.expression(argument) for argument in arguments])
+            case Get(name, obj):
+                instance = self.expression(obj)
+
+                def get(env: Environment | Frame) -> Any:
+                    obje = instance(env)
+                    if isinstance(obje, PloxInstance):
+                        return obje.get(name)
+                    if isinstance(obje, NativeInstance):
+                        return obje.lookup(name)
+                    raise RuntimeError(name, "Only instances have properties.")
+
+                return get
+            case Set(name, obj, value):
+                instance, field = self.expression(obj), self.expression(value)
+
+                def set_(env: Environment | Frame) -> Any:
+                    obje = instance(env)
+                    if not isinstance(obje, PloxInstance):
+                        raise RuntimeError(name, "Only instances have fields.")
+                    result = field(env)
+                    obje.set(name, result)
+                    return result
+
+                return set_
+            case Index(obj, index):
+                container, key = self.expression(obj), self.expression(index)
+                return lambda env: get_index(container(env), key(env))
+            case SetIndex(obj, index, value):
+                container, key, item = self.expression(obj), self.expression(index), self.expression(value)
+                return lambda env: set_index(container(env), key(env), item(env))
+            case Super(_, method):
+                depth, slot = expr.depth, expr.slot
+
+                def super_(env: Environment | Frame) -> Any:
+                    superclass: PloxClass = env.get_at(depth, slot)
+                    # 'this' is the only name in the scope just inside the one holding 'super'.
+                    super_object: PloxInstance = env.get_at(depth - 1, 0)
+                    m_func: PloxFunction = superclass.find_method(method.lexeme)
+                    if not m_func:
+                        raise RuntimeError(method, f"Undefined property'{method.lexeme}'.")
+                    return m_func.bind(super_object)
+
+                return super_
+            case _:
+                raise ValueError("Unknown expression type")
+
+    def variable(self, expr: Expr, name: Any) -> Compiled:
+        depth, slot = expr.depth, expr.slot
+        match depth:
+            case None:
+                # The slot is fixed for good, so it is looked up once, here; only its value is checked each time.
+                globals = self.interpreter.globals
+                slots, slot = globals.slots, globals.slot(name.lexeme)
+
+                def get_global(env: Environment | Frame) -> Any:
+                    value = slots[slot]
+                    if value is UNDEFINED:
+                        raise RuntimeError("Undefined variable '" + name.lexeme + "'.")
+                    return value
+
+                return get_global
+            case 0:
+                return lambda env: env.values[slot]
+            case 1:
+                return lambda env: env.enclosing.values[slot]
+            case 2:
+                return lambda env: env.enclosing.enclosing.values[slot]
+        return lambda env: env.get_at(depth, slot)
+
+    def assign(self, expr: Expr, name: Any, value: Compiled) -> Compiled:
+        depth, slot = expr.depth, expr.slot
+        if depth is None:
+            globals = self.interpreter.globals
+            slot = globals.slot(name.lexeme)
+
+            def assign_global(env: Environment | Frame) -> Any:
+                result = value(env)
+                globals.assign_slot(slot, name, result)
+                return result
+
+            return assign_global
+
+        if depth == 0:
+
+            def assign_local(env: Environment | Frame) -> Any:
+                env.values[slot] = result = value(env)
+                return result
+
+            return assign_local
+
+        def assign(env: Environment | Frame) -> Any:
+            result = value(env)
+            env.assign_at(depth, slot, result)
+            return result
+
+        return assign
+
+    def call(self, callee: Compiled, arguments: list[Compiled]) -> Compiled:
+        interpreter = self.interpreter
+        count = len(arguments)
+
+        def checked(function: PloxCallable) -> PloxCallable:
+            # Checked once the arguments have been evaluated, like ``Interpreter.call`` does, so ``call`` can count on
+            # getting exactly as many arguments as it takes.
+            if function.arity() != count:
+                raise arity_error(function.arity(), count)
+            return function
+
+        def call(env: Environment | Frame) -> Any:
+            function = callee(env)
+            if not isinstance(function, PloxCallable):
+                raise RuntimeError("Can only call functions and classes.")
+            values = [argument(env) for argument in arguments]
+            return checked(function).call(interpreter, values)
+
+        if len(arguments) > 1:
+            return call
+        if not arguments:
+
+            def call_0(env: Environment | Frame) -> Any:
+                function = callee(env)
+                if not isinstance(function, PloxCallable):
+                    raise RuntimeError("Can only call functions and classes.")
+                return checked(function).call(interpreter, [])
+
+            return call_0
+
+        argument = arguments[0]
+
+        def call_1(env: Environment | Frame) -> Any:
+            function = callee(env)
+            if not isinstance(function, PloxCallable):
+                raise RuntimeError("Can only call functions and classes.")
+            value = argument(env)
+            return checked(function).call(interpreter, [value])
+
+        return call_1
+
+    def tail_call(self, callee: Compiled, arguments: list[Compiled]) -> Compiled:
+        """A call in tail position: the call of a ``ClosureFunction`` is returned as a ``TailCall``, not made."""
+        interpreter = self.interpreter
+        count = len(arguments)
+
+        def tail_call(env: Environment | Frame) -> Any:
+            function = callee(env)
+            if not isinstance(function, PloxCallable):
+                raise RuntimeError("Can only call functions and classes.")
+            values = [argument(env) for argument in arguments]
+            if function.arity() != count:
+                raise arity_error(function.arity(), count)
+            if type(function) is ClosureFunction:
+                return TailCall(function, function.closure, values)
+            return function.call(interpreter, values)
+
+        return tail_call
+
+
+class ClosureInterpreter(Interpreter):
+    """
+    Runs programs compiled by ``ClosureCompiler`` instead of walking the tree. Top-level statements, module bodies
+    and each function body are compiled once, the first time they run; functions and methods are created as
+    ``ClosureFunction``s that keep their compiled body.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.compiler: Final[ClosureCompiler] = ClosureCompiler(self)
+
+    @override
+    def execute(self, stmt: Stmt):
+        self.compiler.statement(stmt)(self.environment)
+
+    @override
+    def executeBlock(self, statements: list[Stmt], environment: Environment | Frame):
+        previous = self.environment
+        try:
+            self.environment = environment
+            self.compiler.sequence(statements)(environment)
+        finally:
+            self.environment = previous
@@ -0,0 +1,20 @@
+from typing import Final
+
+from plox.closures import ClosureInterpreter
+from plox.interpreter import Interpreter
+from plox.quickening import QuickeningInterpreter
+from plox.transpiler import PythonInterpreter
+from plox.vm import VMInterpreter
+
+ENGINES: Final[dict[str, type[Interpreter]]] = {
+    "tree": Interpreter,
+    "quick": QuickeningInterpreter,
+    "closure": ClosureInterpreter,
+    "vm": VMInterpreter,
+    "python": PythonInterpreter,
+}
+DEFAULT_ENGINE: Final[str] = "tree"
+
+
+def interpreter_for(engine: str = DEFAULT_ENGINE) -> Interpreter:
+    return ENGINES[engine]()
@@ -1,10 +1,15 @@
-from typing import Optional, Self
+from typing import Final, Optional, Self, Union
 
 from plox.token import Token
 from typing import Any
 
+# What a slot of ``Globals`` holds until its name is defined; ``nil`` is ``None``, a value like any other.
+UNDEFINED: Final[Any] = object()
+
 
 class Environment:
+    """The global environment: names are looked up at run time, so it is keyed by name."""
+
     def __init__(self, enclosing: Self | None = None):
         self.enclosing = enclosing
         self.values: dict[str, Any] = {}
@@ -14,10 +19,7 @@ class Environment:
 
     def get(self, name: Token) -> Any:
         if name.lexeme in self.values:
-            if (value := self.values[name.lexeme]) is not None:
-                return value
-            else:
-                raise RuntimeError("Unassigned variable '" + name.lexeme + "'.")
+            return self.values[name.lexeme]
 
         if self.enclosing:
             return self.enclosing.get(name)
@@ -34,17 +36,69 @@ class Environment:
 
         raise RuntimeError("Undefined variable '" + name.lexeme + "'.")
 
-    def get_at(self, distance: int, name: str):
-        return self.ancestor(distance).values[name]
 
-    def assign_at(self, distance: int, name: Token, value: Any):
-        self.ancestor(distance).values[name.lexeme] = value
+class Globals(Environment):
+    """
+    The global environment as a slot table. A name gets an index into ``slots`` the first time it is defined or
+    looked up and keeps it for good, so a site that has looked a name up once can cache the index and from then on
+    read or write the list directly; a name looked up before it is defined has its slot already, holding
+    ``UNDEFINED`` until the definition fills it in. ``values`` isn't used.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.names: dict[str, int] = {}
+        self.slots: list[Any] = []
+
+    def slot(self, name: str) -> int:
+        slot = self.names.get(name)
+        if slot is None:
+            slot = self.names[name] = len(self.slots)
+            self.slots.append(UNDEFINED)
+        return slot
+
+    def define(self, name: str, value: Optional[Any]):
+        self.slots[self.slot(name)] = value
+
+    def get(self, name: Token) -> Any:
+        return self.get_slot(self.slot(name.lexeme), name)
+
+    def assign(self, name: Token, value: Any):
+        self.assign_slot(self.slot(name.lexeme), name, value)
+
+    def get_slot(self, slot: int, name: Token) -> Any:
+        value = self.slots[slot]
+        if value is UNDEFINED:
+            raise RuntimeError("Undefined variable '" + name.lexeme + "'.")
+        return value
+
+    def assign_slot(self, slot: int, name: Token, value: Any):
+        if self.slots[slot] is UNDEFINED:
+            raise RuntimeError("Undefined variable '" + name.lexeme + "'.")
+        self.slots[slot] = value
 
-    def ancestor(self, distance: int):
-        environment: Environment = self
 
-        for _ in range(distance):
-            if environment.enclosing:
-                environment = environment.enclosing
+class Frame:
+    """
+    The environment of a local scope. ``Resolver`` gives every local a slot in the frame it lives in, so values are
+    kept in a list indexed by slot and variables are found by ``(depth, slot)`` with no name lookup. ``values``
+    comes sized for every local of the frame, including those of the flat blocks that run in it.
+    """
+
+    __slots__ = ("enclosing", "values")
+
+    def __init__(self, enclosing: Union["Frame", Environment], values: list[Any]):
+        self.enclosing = enclosing
+        self.values = values
+
+    def get_at(self, depth: int, slot: int) -> Any:
+        frame = self
+        for _ in range(depth):
+            frame = frame.enclosing
+        return frame.values[slot]
 
-        return environment
+    def assign_at(self, depth: int, slot: int, value: Any):
+        frame = self
+        for _ in range(depth):
+            frame = frame.enclosing
+        frame.values[slot] = value
@@ -4,7 +4,25 @@ from plox.token import Token
 
 
 class Expr:
-    pass
+    # Where ``Resolver`` found the local a ``Variable``, ``Assign``, ``This`` or ``Super`` refers to: ``depth``
+    # frames out, at ``slot``. ``depth`` stays ``None`` for globals. These are plain attributes rather than dataclass
+    # fields, so they take no part in the nodes' equality and hashing.
+    depth: int | None = None
+    slot: int = 0
+    # The inline cache of a ``Get`` or ``Super``: the method ``Interpreter`` last found on ``cached_class``, which
+    # stays right as long as the class looked in is that one, as classes don't change.
+    cached_class: Any = None
+    cached_method: Any = None
+    # The inline cache of a ``Get`` or ``Set`` reading or writing a field: the slot of the field in instances of
+    # ``cached_shape`` and, for a ``Set`` that adds the field, the shape the instance moves to.
+    cached_shape: Any = None
+    cached_slot: int = 0
+    cached_transition: Any = None
+    # The inline cache of a global ``Variable`` or ``Assign``: the ``Globals`` its name was last looked up in and its
+    # slot there, which stays the same for as long as that table exists. They are only set by the first lookup, with
+    # no class default, as CPython reads an instance attribute shadowing a class attribute the slow way.
+    cached_globals: Any
+    global_slot: int
 
 
 @dataclass(unsafe_hash=True)
@@ -68,6 +86,19 @@ class Set(Expr):
     value: Expr
 
 
+@dataclass(unsafe_hash=True)
+class Index(Expr):
+    obj: Expr
+    index: Expr
+
+
+@dataclass(unsafe_hash=True)
+class SetIndex(Expr):
+    obj: Expr
+    index: Expr
+    value: Expr
+
+
 @dataclass(unsafe_hash=True)
 class This(Expr):
     keyword: Token
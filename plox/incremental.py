@@ -0,0 +1,293 @@
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from collections.abc import Iterator
+from typing import Final, Optional
+
+from plox.parser import Parser
+from plox.resolver import Resolver
+from plox.scanner import CompactScanner, ScanError
+from plox.stmt import Class, Function, Stmt, Var
+from plox.token import Token
+from plox.token_type import TokenType
+
+
+@dataclass
+class Diagnostic:
+    line: int
+    message: str
+
+
+@dataclass(eq=False)
+class Segment:
+    """
+    One top-level declaration together with the source that follows it up to the next declaration.
+
+    ``offset`` and ``line_offset`` are relative to the owning ``Chunk``, so edits above the segment only have to
+    move chunks. ``tokens``, ``stmt`` and ``errors`` keep the line numbers from when the segment was scanned, which
+    ``line - scanned_line`` maps to the current ones.
+    """
+
+    offset: int
+    length: int
+    line_offset: int
+    scanned_line: int
+    tokens: list[Token]
+    stmt: Stmt | None
+    errors: list[Diagnostic] = field(default_factory=list)
+    chunk: Optional["Chunk"] = None
+
+    @property
+    def start(self) -> int:
+        assert self.chunk is not None
+        return self.chunk.start + self.offset
+
+    @property
+    def end(self) -> int:
+        return self.start + self.length
+
+    @property
+    def line(self) -> int:
+        assert self.chunk is not None
+        return self.chunk.line + self.line_offset
+
+    @property
+    def name(self) -> Token | None:
+        match self.stmt:
+            case Var(name, _) | Function(name, _, _) | Class(name, _, _):
+                return name
+        return None
+
+    def diagnostics(self) -> list[Diagnostic]:
+        shift = self.line - self.scanned_line
+        return [Diagnostic(error.line + shift, error.message) for error in self.errors]
+
+
+class Chunk:
+    """A run of consecutive segments that is moved as a whole when an edit above it changes offsets or lines."""
+
+    SIZE: Final[int] = 64
+
+    def __init__(self, start: int, line: int, segments: list[Segment]) -> None:
+        self.start = start
+        self.line = line
+        self.segments = segments
+        self.offsets = [segment.offset for segment in segments]
+        for segment in segments:
+            segment.chunk = self
+
+
+class IncrementalDocument:
+    """
+    Front-end state for a source buffer that is edited in place, for editor and language server integrations.
+
+    The buffer is kept as a sequence of top-level ``Segment``s. ``edit`` re-scans and re-parses only the segments
+    that overlap the edited range, growing the region while its last declaration is left incomplete (an unclosed
+    block, string or comment), and re-resolves only the declarations that were re-parsed. Later segments are reused
+    as they are; segments are grouped in ``Chunk``s so shifting them costs one update per chunk.
+
+    Diagnostics are tracked per segment, plus an index of top-level names for redeclarations, so collecting them
+    is proportional to the number of problems rather than to the size of the file.
+    """
+
+    def __init__(self, text: str = "") -> None:
+        self.text: str = text
+        self.chunks: Final[list[Chunk]] = []
+        self.failing: Final[set[Segment]] = set()
+        self.declarations: Final[dict[str, set[Segment]]] = {}
+        self.redeclared: Final[set[str]] = set()
+        self.replace(0, 0, 0, 0, self.reparse(0, len(text), 1, final=True)[0])
+
+    @property
+    def segments(self) -> Iterator[Segment]:
+        for chunk in self.chunks:
+            yield from chunk.segments
+
+    @property
+    def statements(self) -> list[Stmt]:
+        return [segment.stmt for segment in self.segments if segment.stmt is not None]
+
+    @property
+    def diagnostics(self) -> list[Diagnostic]:
+        failing = sorted(self.failing, key=lambda segment: segment.start)
+        diagnostics = [diagnostic for segment in failing for diagnostic in segment.diagnostics()]
+
+        for name in self.redeclared:
+            for segment in sorted(self.declarations[name], key=lambda segment: segment.start)[1:]:
+                token = segment.name
+                assert token is not None
+                line = token.line + segment.line - segment.scanned_line
+                diagnostics.append(Diagnostic(line, f"{name}, Already a variable with this name in this scope."))
+
+        diagnostics.sort(key=lambda diagnostic: diagnostic.line)
+        return diagnostics
+
+    def locate(self, offset: int) -> tuple[int, int]:
+        """Return the chunk and segment index of the segment containing ``offset``."""
+        chunk_index = max(bisect_right(self.chunks, offset, key=lambda chunk: chunk.start) - 1, 0)
+        chunk = self.chunks[chunk_index]
+        return chunk_index, max(bisect_right(chunk.offsets, offset - chunk.start) - 1, 0)
+
+    def edit(self, start: int, end: int, text: str) -> list[Diagnostic]:
+        """Replace ``self.text[start:end]`` with ``text`` and return the diagnostics for the new buffer."""
+        delta = len(text) - (end - start)
+        line_delta = text.count("\n") - self.text.count("\n", start, end)
+        self.text = self.text[:start] + text + self.text[end:]
+
+        # An edit right at a boundary may extend the previous declaration, e.g. by typing its missing ';'.
+        first_chunk, first = self.locate(max(start - 1, 0))
+        last_chunk, last = self.locate(end)
+        if (last_chunk, last) < (first_chunk, first):
+            last_chunk, last = first_chunk, first
+
+        # Error recovery in a failing declaration skips ahead to a token that may be part of the edit.
+        while (first_chunk, first) > (0, 0):
+            previous_chunk, previous = (first_chunk, first - 1) if first else (first_chunk - 1, -1)
+            if not self.chunks[previous_chunk].segments[previous].errors:
+                break
+            first_chunk, first = previous_chunk, previous % len(self.chunks[previous_chunk].segments)
+
+        head = self.chunks[first_chunk].segments[first]
+        while True:
+            tail = self.chunks[last_chunk].segments[last]
+            final = last_chunk == len(self.chunks) - 1 and last == len(self.chunks[last_chunk].segments) - 1
+            try:
+                replacement, complete = self.reparse(head.start, tail.end + delta, head.line, final)
+            except ScanError:
+                # An unterminated comment stops the scan of the whole buffer, so, as when it is parsed afresh,
+                # nothing before it is reported either: start over from the first segment.
+                first_chunk, first = 0, 0
+                head = self.chunks[0].segments[0]
+                continue
+            if complete or final:
+                break
+            last += 1
+            if last == len(self.chunks[last_chunk].segments):
+                last_chunk, last = last_chunk + 1, 0
+
+        chunk = self.chunks[last_chunk]
+        for segment in chunk.segments[last + 1 :]:
+            segment.offset += delta
+            segment.line_offset += line_delta
+        chunk.offsets[last + 1 :] = [offset + delta for offset in chunk.offsets[last + 1 :]]
+        for chunk in self.chunks[last_chunk + 1 :]:
+            chunk.start += delta
+            chunk.line += line_delta
+
+        self.replace(first_chunk, first, last_chunk, last + 1, replacement)
+        return self.diagnostics
+
+    def replace(self, first_chunk: int, first: int, last_chunk: int, last: int, segments: list[Segment]) -> None:
+        """
+        Replace the segments from ``first`` in ``first_chunk`` up to, but excluding, ``last`` in ``last_chunk`` with
+        ``segments``, whose offsets and lines are absolute, and re-chunk the affected chunks.
+        """
+        old = self.chunks[first_chunk : last_chunk + 1]
+        before = old[0].segments[:first] if old else []
+        after = old[-1].segments[last:] if old else []
+        for chunk in old:
+            for segment in chunk.segments[first if chunk is old[0] else 0 : last if chunk is old[-1] else None]:
+                self.forget(segment)
+
+        for segment in (*before, *after):
+            assert segment.chunk is not None
+            segment.offset += segment.chunk.start
+            segment.line_offset += segment.chunk.line
+        for segment in segments:
+            self.remember(segment)
+
+        combined = [*before, *segments, *after]
+        chunks: list[Chunk] = []
+        for i in range(0, len(combined), Chunk.SIZE):
+            run = combined[i : i + Chunk.SIZE]
+            start, line = run[0].offset, run[0].line_offset
+            for segment in run:
+                segment.offset -= start
+                segment.line_offset -= line
+            chunks.append(Chunk(start, line, run))
+        self.chunks[first_chunk : last_chunk + 1] = chunks
+
+    def remember(self, segment: Segment) -> None:
+        if segment.errors:
+            self.failing.add(segment)
+        if (name := segment.name) is not None:
+            segments = self.declarations.setdefault(name.lexeme, set())
+            segments.add(segment)
+            if len(segments) > 1:
+                self.redeclared.add(name.lexeme)
+
+    def forget(self, segment: Segment) -> None:
+        self.failing.discard(segment)
+        if (name := segment.name) is not None:
+            segments = self.declarations[name.lexeme]
+            segments.discard(segment)
+            if len(segments) < 2:
+                self.redeclared.discard(name.lexeme)
+
+    def reparse(self, start: int, end: int, line: int, final: bool) -> tuple[list[Segment], bool]:
+        """
+        Scan, parse and resolve ``self.text[start:end]`` into segments with absolute offsets and lines. The second
+        value is false when the last declaration may continue past ``end``; it is always true when ``final`` is set,
+        meaning nothing follows ``end``. A ``ScanError`` in a final region that doesn't start the buffer is raised.
+        """
+        source = self.text[start:end]
+        scanner = CompactScanner(source)
+        scanner.line = line
+        try:
+            store = scanner.scan_tokens()
+        except ScanError as e:
+            if not final:
+                return [], False
+            if start:
+                raise
+            return [Segment(start, end - start, line, line, [], None, [Diagnostic(e.line, str(e))])], True
+
+        if scanner.unterminated and not final:
+            return [], False
+        # A line comment running into ``end`` would go on into what follows it, as a string would.
+        trailing = source[store.ends[-2] if len(store) > 1 else 0 :]
+        if "//" in trailing.rpartition("\n")[2] and not final:
+            return [], False
+
+        parser = Parser(store, report=False)
+        segments: list[Segment] = []
+        complete = True
+        while not parser.is_at_end():
+            begin = parser.current
+            errors = len(parser.errors)
+            stmt = parser.declaration()
+
+            offset = start if not segments else start + store.starts[begin]
+            if segments:
+                previous = segments[-1]
+                previous.length = offset - previous.offset
+                line = previous.line_offset + self.text.count("\n", previous.offset, offset)
+            segment = Segment(offset, end - offset, line, line, store[begin : parser.current], stmt)
+            segment.errors = [
+                Diagnostic(error.token.line, f"Error at '{error.token.lexeme}': {error}")
+                for error in parser.errors[errors:]
+            ]
+            segments.append(segment)
+
+            complete = len(parser.errors) == errors and not any(
+                error.token.type == TokenType.EOF for error in parser.errors[errors:]
+            )
+
+        if not segments:
+            segments.append(Segment(start, end - start, line, line, [], None))
+        if scanner.unterminated:
+            segments[-1].errors.append(Diagnostic(scanner.line, "Unterminated string."))
+
+        for segment in segments:
+            self.resolve(segment)
+        return segments, complete or final
+
+    @staticmethod
+    def resolve(segment: Segment) -> None:
+        if segment.stmt is None or segment.errors:
+            return
+        resolver = Resolver()
+        resolver.begin_scope()
+        try:
+            resolver.resolve(segment.stmt)
+        except Exception as e:
+            segment.errors.append(Diagnostic(segment.tokens[0].line, str(e)))
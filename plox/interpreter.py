@@ -1,11 +1,46 @@
 from dataclasses import dataclass
-import time
-from typing import Any, Optional, override
-from plox.expr import Assign, Binary, Call, Expr, Get, Grouping, Literal, Logical, Set, Super, This, Unary, Variable
-from plox.stmt import Block, Class, Function, If, Return, Stmt, Print, Expression, Var, While
+from typing import TYPE_CHECKING, Any, Optional, override
+from plox.expr import (
+    Assign,
+    Binary,
+    Call,
+    Expr,
+    Get,
+    Grouping,
+    Index,
+    Literal,
+    Logical,
+    Set,
+    SetIndex,
+    Super,
+    This,
+    Unary,
+    Variable,
+)
+from plox.stmt import Block, Class, Function, If, Import, Return, Stmt, Print, Expression, Var, While
 from plox.token import Token
 from plox.token_type import TokenType
-from plox.environment import Environment
+from plox.arrays import ArrayModule
+from plox.environment import UNDEFINED, Environment, Frame, Globals
+from plox.modules import ModuleLoader, locate
+from plox.natives import (
+    ListInstance,
+    MapInstance,
+    MemoizedFunction,
+    NativeClass,
+    NativeClockFunction,
+    NativeInstance,
+    NativeMemoizeFunction,
+    PloxCallable,
+    arity_error,
+    get_index,
+    set_index,
+)
+from plox.parser import Parser
+from plox.resolver import Resolver
+
+if TYPE_CHECKING:
+    from plox.optimizer import Optimizer
 
 
 class LoxRuntimeError(RuntimeError):
@@ -20,16 +55,36 @@ class LoxRuntimeError(RuntimeError):
         return super().__repr__()
 
 
+class LoxCompileError(RuntimeError):
+    """Errors found compiling code whose compilation was put off until it runs: an import or a lazy function body."""
+
+
 class Interpreter:
+    # The type of ``globals``: a ``Globals`` slot table, whose slots global ``Variable`` and ``Assign`` nodes cache,
+    # or a plain ``Environment`` for engines that look globals up by name in its dict.
+    globals_type: type[Environment] = Globals
+
     def __init__(self):
-        self.globals = Environment()
-        self.environment = self.globals
-        self.locals = {}
+        self.globals = self.globals_type()
+        self.environment: Environment | Frame = self.globals
+        self.modules = ModuleLoader()
+        self.module: str | None = None
+        self.imported: set[str] = set()
+        self.optimizer: Optimizer | None = None
+        # The value of the ``return`` statement that has just run, when ``execute`` returns True.
+        self.returning: Any = None
+        # Every function ``memoize`` has made, for their statistics.
+        self.memoized: list[MemoizedFunction] = []
 
         self.globals.define("clock", NativeClockFunction())
+        self.globals.define("memoize", NativeMemoizeFunction())
+        self.globals.define("List", NativeClass("List", ListInstance))
+        self.globals.define("Map", NativeClass("Map", MapInstance))
+        self.globals.define("Array", ArrayModule())
 
-    def resolve(self, expr: Expr, depth: int):
-        self.locals[expr] = depth
+    def optimize(self, statements: list[Stmt]) -> list[Stmt]:
+        """Run the optimizer, if one is set, over resolved statements that are about to be executed."""
+        return statements if self.optimizer is None else self.optimizer.run(statements)
 
     def check_if_number(self, operator: Token, left: Any, right: Any) -> None:
         if isinstance(left, int | float) and isinstance(right, int | float):
@@ -39,7 +94,8 @@ class Interpreter:
 
     @staticmethod
     def is_equal(a: Any, b: Any) -> bool:
-        return a == b
+        # Values of different Lox types are never equal, even where Python says True == 1.0.
+        return type(a) is type(b) and a == b
 
     @staticmethod
     def stringify(obj: Any) -> str:
@@ -62,31 +118,48 @@ class Interpreter:
             return bool(obj)
         return True
 
+    @staticmethod
+    def binary(op: Token, left_val: Any, right_val: Any) -> Any:
+        if op.type == TokenType.PLUS:
+            return left_val + right_val
+        elif op.type == TokenType.MINUS:
+            return left_val - right_val
+        elif op.type == TokenType.STAR:
+            return left_val * right_val
+        elif op.type == TokenType.SLASH:
+            if right_val == 0:
+                raise ValueError("Division by zero")
+            return left_val / right_val
+        elif op.type == TokenType.LESS:
+            return left_val < right_val
+        elif op.type == TokenType.LESS_EQUAL:
+            return left_val <= right_val
+        elif op.type == TokenType.GREATER:
+            return left_val > right_val
+        elif op.type == TokenType.GREATER_EQUAL:
+            return left_val >= right_val
+        elif op.type == TokenType.EQUAL_EQUAL:
+            return Interpreter.is_equal(left_val, right_val)
+        elif op.type == TokenType.BANG_EQUAL:
+            return not Interpreter.is_equal(left_val, right_val)
+        else:
+            raise ValueError(f"Unknown operator {op.lexeme}")
+
+    @staticmethod
+    def unary(op: Token, right_val: Any) -> Any:
+        if op.type == TokenType.MINUS:
+            return -right_val
+        elif op.type == TokenType.BANG:
+            return not Interpreter.is_truthy(right_val)
+        else:
+            raise ValueError(f"Unknown unary operator {op.lexeme}")
+
     def evaluate(self, expr: Expr) -> Any:
         match expr:
             case Binary(left, op, right):
                 left_val = self.evaluate(left)
                 right_val = self.evaluate(right)
-                if op.type == TokenType.PLUS:
-                    return left_val + right_val
-                elif op.type == TokenType.MINUS:
-                    return left_val - right_val
-                elif op.type == TokenType.STAR:
-                    return left_val * right_val
-                elif op.type == TokenType.SLASH:
-                    if right_val == 0:
-                        raise ValueError("Division by zero")
-                    return left_val / right_val
-                elif op.type == TokenType.LESS:
-                    return left_val < right_val
-                elif op.type == TokenType.LESS_EQUAL:
-                    return left_val <= right_val
-                elif op.type == TokenType.GREATER:
-                    return left_val > right_val
-                elif op.type == TokenType.GREATER_EQUAL:
-                    return left_val >= right_val
-                else:
-                    raise ValueError(f"Unknown operator {op.lexeme}")
+                return self.binary(op, left_val, right_val)
             case Literal(value):
                 return value
             case Logical(left, op, right):
@@ -99,44 +172,26 @@ class Interpreter:
                         return logic_left
                 return self.evaluate(right)
             case Unary(op, right):
-                right_val = self.evaluate(right)
-                if op.type == "MINUS":
-                    return -right_val
-                elif op.type == "BANG":
-                    return not right_val
-                else:
-                    raise ValueError(f"Unknown unary operator {op.lexeme}")
+                return self.unary(op, self.evaluate(right))
             case Grouping(expression):
                 return self.evaluate(expression)
             case Variable(name):
                 return self.look_up_variable(name, expr)
             case Assign(name, value):
                 value = self.evaluate(value)
-                distance = self.locals[expr]
-                if distance:
-                    self.environment.assign_at(distance, name, value)
+                if expr.depth is not None:
+                    self.environment.assign_at(expr.depth, expr.slot, value)
                 else:
-                    self.globals.assign(name, value)
+                    self.globals.assign_slot(self.global_slot(name, expr), name, value)
                 return value
             case Call(callee, _, arguments):
-                callee_value = self.evaluate(callee)
-
-                if not isinstance(callee_value, PloxCallable):
-                    raise RuntimeError("Can only call functions and classes.")
-
-                evaluated_args = [self.evaluate(arg) for arg in arguments]
-
-                if len(arguments) != callee_value.arity():
-                    pass
-
-                return callee_value.call(self, evaluated_args)
+                if callee.__class__ is Get:
+                    return self.invoke(callee, arguments)
+                if callee.__class__ is Super:
+                    return self.invoke_super(callee, arguments)
+                return self.call(self.evaluate(callee), arguments)
             case Get(name, obj):
-                obje: Any = self.evaluate(obj)
-
-                if isinstance(obje, PloxInstance):
-                    return obje.get(expr.name)
-
-                raise RuntimeError(expr.name, "Only instances have properties.")
+                return self.get(expr, self.evaluate(obj))
             case Set(name, obj, value):
                 obje = self.evaluate(obj)
 
@@ -144,17 +199,21 @@ class Interpreter:
                     raise RuntimeError(name, "Only instances have fields.")
 
                 value = self.evaluate(value)
-                obje.set(name, value)
+                self.set(expr, obje, value)
                 return value
+            case Index(obj, index):
+                return get_index(self.evaluate(obj), self.evaluate(index))
+            case SetIndex(obj, index, value):
+                return set_index(self.evaluate(obj), self.evaluate(index), self.evaluate(value))
             case This(keyword):
                 return self.look_up_variable(keyword, expr)
             case Super(keyword, method):
-                dist: int = self.locals.get(expr)
-                superclass: PloxClass = self.environment.get_at(dist, "super")
+                superclass: PloxClass = self.environment.get_at(expr.depth, expr.slot)
 
-                super_object: PloxInstance = self.environment.get_at(dist - 1, "this")
+                # 'this' is the only name in the scope just inside the one holding 'super'.
+                super_object: PloxInstance = self.environment.get_at(expr.depth - 1, 0)
 
-                m_func: PloxFunction = superclass.find_method(method.lexeme)
+                m_func = self.method(expr, superclass, method.lexeme)
 
                 if not m_func:
                     raise RuntimeError(method, f"Undefined property'{method.lexeme}'.")
@@ -163,13 +222,145 @@ class Interpreter:
             case _:
                 raise ValueError("Unknown expression type")
 
-    def look_up_variable(self, name: Token, expr: Expr):
-        distance = self.locals.get(expr)
-        if distance is not None:
-            return self.environment.get_at(distance, name.lexeme)
-        return self.globals.get(name)
+    def tail_call(self, expr: Call) -> Any:
+        """Evaluate the call a ``return`` in tail position returns, like ``evaluate``, but leave the call to make."""
+        callee = expr.callee
+        if callee.__class__ is Get:
+            return self.invoke(callee, expr.arguments, tail=True)
+        if callee.__class__ is Super:
+            return self.invoke_super(callee, expr.arguments, tail=True)
+        return self.call(self.evaluate(callee), expr.arguments, tail=True)
+
+    # With ``tail``, the call of a Lox function is not made but returned as a ``TailCall``, for the function
+    # running to make in its place. Other callables are called right away, as they don't recurse into Lox code.
+    def call(self, callee_value: Any, arguments: list[Expr], tail: bool = False) -> Any:
+        if not isinstance(callee_value, PloxCallable):
+            raise RuntimeError("Can only call functions and classes.")
+
+        evaluated_args = [self.evaluate(arg) for arg in arguments]
+
+        # Checked once here, so ``call`` can count on getting exactly as many arguments as it takes.
+        if len(evaluated_args) != callee_value.arity():
+            raise arity_error(callee_value.arity(), len(evaluated_args))
+
+        if tail and type(callee_value) is PloxFunction:
+            return TailCall(callee_value, callee_value.closure, evaluated_args)
+        return callee_value.call(self, evaluated_args)
+
+    def invoke(self, callee: Get, arguments: list[Expr], tail: bool = False) -> Any:
+        """Call ``obj.name(arguments)``: a method is invoked straight away, without binding it."""
+        name = callee.name
+        receiver = self.evaluate(callee.obj)
+        if not isinstance(receiver, PloxInstance) or name.lexeme in receiver.shape.slots:
+            return self.call(self.get(callee, receiver), arguments, tail)
+
+        method = self.method(callee, receiver.klass, name.lexeme)
+        if method is None:
+            raise RuntimeError(f"{name}, undefined property '{name.lexeme}'.")
+        evaluated_args = [self.evaluate(arg) for arg in arguments]
+        if len(evaluated_args) != method.arity():
+            raise arity_error(method.arity(), len(evaluated_args))
+        if tail and type(method) is PloxFunction:
+            return TailCall(method, Frame(method.closure, [receiver]), evaluated_args)
+        return method.invoke(self, receiver, evaluated_args)
+
+    def invoke_super(self, callee: Super, arguments: list[Expr], tail: bool = False) -> Any:
+        """Call ``super.method(arguments)`` like ``invoke``."""
+        superclass: PloxClass = self.environment.get_at(callee.depth, callee.slot)
+        method = self.method(callee, superclass, callee.method.lexeme)
+        if method is None:
+            raise RuntimeError(callee.method, f"Undefined property'{callee.method.lexeme}'.")
+        this: PloxInstance = self.environment.get_at(callee.depth - 1, 0)
+        evaluated_args = [self.evaluate(arg) for arg in arguments]
+        if len(evaluated_args) != method.arity():
+            raise arity_error(method.arity(), len(evaluated_args))
+        if tail and type(method) is PloxFunction:
+            return TailCall(method, Frame(method.closure, [this]), evaluated_args)
+        return method.invoke(self, this, evaluated_args)
+
+    def get(self, expr: Get, obj: Any) -> Any:
+        if not isinstance(obj, PloxInstance):
+            if isinstance(obj, NativeInstance):
+                return obj.lookup(expr.name)
+            raise RuntimeError(expr.name, "Only instances have properties.")
+
+        shape = obj.shape
+        if shape is expr.cached_shape:
+            return obj.values[expr.cached_slot]
+
+        name = expr.name.lexeme
+        slot = shape.slots.get(name)
+        if slot is not None:
+            expr.cached_shape, expr.cached_slot = shape, slot
+            return obj.values[slot]
+
+        method = self.method(expr, obj.klass, name)
+        if method is None:
+            raise RuntimeError(f"{expr.name}, undefined property '{name}'.")
+        return method.bind(obj)
 
-    def execute(self, stmt: Stmt):
+    @staticmethod
+    def set(expr: Set, obj: "PloxInstance", value: Any) -> None:
+        """``PloxInstance.set``, through the inline cache of ``expr``."""
+        shape = obj.shape
+        if shape is expr.cached_shape:
+            if expr.cached_transition is None:
+                obj.values[expr.cached_slot] = value
+            else:
+                obj.shape = expr.cached_transition
+                obj.values.append(value)
+            return
+
+        slot = shape.slots.get(expr.name.lexeme)
+        if slot is None:
+            transition = shape.adding(expr.name.lexeme)
+            expr.cached_shape, expr.cached_slot, expr.cached_transition = shape, len(obj.values), transition
+            obj.shape = transition
+            obj.values.append(value)
+        else:
+            expr.cached_shape, expr.cached_slot, expr.cached_transition = shape, slot, None
+            obj.values[slot] = value
+
+    @staticmethod
+    def method(expr: Get | Super, klass: "PloxClass", name: str) -> "PloxFunction | None":
+        """The method ``name`` of ``klass``, through the inline cache of the ``Get`` or ``Super`` looking it up."""
+        if expr.cached_class is klass:
+            return expr.cached_method
+        method = klass.vtable.get(name)
+        expr.cached_class, expr.cached_method = klass, method
+        return method
+
+    def look_up_variable(self, name: Token, expr: Expr):
+        depth = expr.depth
+        if depth is None:
+            globals = self.globals
+            try:
+                if expr.cached_globals is globals:
+                    value = globals.slots[expr.global_slot]
+                    if value is not UNDEFINED:
+                        return value
+            except AttributeError:
+                pass
+            return globals.get_slot(self.global_slot(name, expr), name)
+        environment = self.environment
+        while depth:
+            environment = environment.enclosing
+            depth -= 1
+        return environment.values[expr.slot]
+
+    def global_slot(self, name: Token, expr: Expr) -> int:
+        """The slot of the global ``name`` in ``globals``, through the inline cache of ``expr``."""
+        globals = self.globals
+        if getattr(expr, "cached_globals", None) is not globals:
+            expr.cached_globals, expr.global_slot = globals, globals.slot(name.lexeme)
+        return expr.global_slot
+
+    def execute(self, stmt: Stmt) -> bool | None:
+        """
+        Run ``stmt``. Returns True when a ``return`` statement ran, with its value in ``returning``: statements
+        containing others pass that on rather than running the rest, up to the function call, which is cheaper than
+        unwinding with an exception.
+        """
         match stmt:
             case Print(expression):
                 value = self.evaluate(expression)
@@ -178,38 +369,44 @@ class Interpreter:
                 self.evaluate(expression)
             case Var(name, initializer):
                 value = self.evaluate(initializer) if initializer else None
-                self.environment.define(name.lexeme, value)
+                self.define(stmt, name, value)
             case Block(statements):
-                self.executeBlock(statements, Environment(self.environment))
+                if stmt.size is None:
+                    for statement in statements:
+                        if self.execute(statement):
+                            return True
+                else:
+                    return self.executeBlock(statements, Frame(self.environment, [None] * stmt.size))
             case If(condition, thenBranch, elseBranch):
                 if self.is_truthy(self.evaluate(condition)):
-                    self.execute(thenBranch)
+                    return self.execute(thenBranch)
                 elif elseBranch is not None:
-                    self.execute(elseBranch)
+                    return self.execute(elseBranch)
             case While(condition, body):
                 while self.is_truthy(self.evaluate(condition)):
-                    self.execute(body)
+                    if self.execute(body):
+                        return True
             case Function(name, _, body):
                 function: PloxFunction = PloxFunction(stmt, self.environment, False)
-                self.environment.define(name.lexeme, function)
+                self.define(stmt, name, function)
             case Return(_, value):
                 return_value: Any = None
 
                 if value is not None:
-                    return_value = self.evaluate(value)
+                    return_value = self.tail_call(value) if stmt.tail else self.evaluate(value)
 
-                raise PloxReturn(return_value)
+                self.returning = return_value
+                return True
+            case Import(_, path):
+                self.import_module(locate(self.module, path.literal))
             case Class(name, superclass, methods):
                 s_class = None
                 if superclass:
                     s_class = self.evaluate(superclass)
                     if not isinstance(s_class, PloxClass):
                         raise RuntimeError(superclass.name, "Superclass must be a class.")
-                self.environment.define(name.lexeme, None)
-
                 if superclass:
-                    environment: Environment = Environment(self.environment)
-                    environment.define("super", s_class)
+                    environment: Frame = Frame(self.environment, [s_class])
 
                 mets = {}
                 for method in methods:
@@ -220,20 +417,73 @@ class Interpreter:
 
                 klass: PloxClass = PloxClass(name.lexeme, s_class, mets)
 
-                if superclass:
-                    environment = self.environment.enclosing
-
-                self.environment.assign(name, klass)
+                # Methods only run once the class exists, so the name can be defined last.
+                self.define(stmt, name, klass)
             case _:
                 raise ValueError("Unknown statement type")
 
-    def executeBlock(self, statements: list[Stmt], environment: Environment):
+    def import_module(self, path: str) -> None:
+        """Execute the module at ``path`` in the global environment, unless it has already been imported."""
+        if path in self.imported:
+            return
+        self.imported.add(path)
+
+        module = self.modules.load(path)
+        if module.errors:
+            raise LoxCompileError("\n".join(f"{path}: {error}" for error in module.errors))
+
+        importer = self.module
+        self.module = path
+        try:
+            self.executeBlock(self.optimize(module.statements), self.globals)
+        finally:
+            self.module = importer
+
+    def apply(self, callee: Any, arguments: list[Any]) -> Any:
+        """Call ``callee`` with values already evaluated, for natives calling back into Lox."""
+        if not isinstance(callee, PloxCallable):
+            raise RuntimeError("Can only call functions and classes.")
+        if len(arguments) != callee.arity():
+            raise arity_error(callee.arity(), len(arguments))
+        return callee.call(self, arguments)
+
+    def memoizable(self, value: Any) -> PloxCallable | None:
+        """The callable to memoize for ``value``, if it is a Lox function the resolver found pure, else ``None``."""
+        if not isinstance(value, PloxFunction):
+            return None
+        declaration = value.declaraction
+        if declaration.lazy is not None:
+            self.compile_function(declaration)
+        return value if declaration.pure else None
+
+    def compile_function(self, function: Function) -> None:
+        """Parse and resolve the body of a lazily parsed function, which is about to be called for the first time."""
+        body, errors = Parser.function_body(function)
+        if errors:
+            raise LoxCompileError(
+                "\n".join(f"[line {error.token.line}] Error at '{error.token.lexeme}': {error}" for error in errors)
+            )
+        try:
+            Resolver().resolve_lazy_function(function, body)
+        except Exception as e:
+            raise LoxCompileError(str(e)) from e
+        function.body = self.optimize(body)
+        function.lazy = None
+
+    def define(self, declaration: Stmt, name: Token, value: Any) -> None:
+        if declaration.slot is None:
+            self.environment.define(name.lexeme, value)
+        else:
+            self.environment.values[declaration.slot] = value
+
+    def executeBlock(self, statements: list[Stmt], environment: Environment | Frame) -> bool | None:
         previous = self.environment
         try:
             self.environment = environment
 
             for statement in statements:
-                self.execute(statement)
+                if self.execute(statement):
+                    return True
         finally:
             self.environment = previous
 
@@ -241,30 +491,15 @@ class Interpreter:
         try:
             for stmt in stmts:
                 self.execute(stmt)
+        except LoxCompileError:
+            raise
         except Exception as e:
             print(e)
 
 
-class PloxReturn(Exception):
-    def __init__(self, value):
-        super().__init__()
-        self.value = value
-
-
-class PloxCallable:
-    def arity(self) -> int:
-        raise NotImplementedError("Subclasses must implement arity")
-
-    def call(self, interpreter: Interpreter, arguments: list[Any]) -> Any:
-        raise NotImplementedError("Subclasses must implement call")
-
-    def __str__(self) -> str:
-        return "<callable>"
-
-
 @dataclass
 class PloxFunction(PloxCallable):
-    def __init__(self, declaraction: Function, closure: Environment, is_initializer: bool) -> None:
+    def __init__(self, declaraction: Function, closure: Environment | Frame, is_initializer: bool) -> None:
         super().__init__()
         self.declaraction = declaraction
         self.closure = closure
@@ -280,40 +515,69 @@ class PloxFunction(PloxCallable):
 
     @override
     def call(self, interpreter: Interpreter, arguments: list[Any]) -> Any:
-        environment: Environment = Environment(self.closure)
-        for i, param in enumerate(self.declaraction.params):
-            environment.define(param.lexeme, arguments[i])
-
-        try:
-            interpreter.executeBlock(self.declaraction.body, environment)
-        except PloxReturn as return_value:
-            if self.is_initializer:
-                return self.closure.get_at(0, "this")
-            return return_value.value
-
-        if self.is_initializer:
-            return self.closure.get_at(0, "this")
-        return None
+        return self.run(interpreter, self.closure, arguments)
+
+    def invoke(self, interpreter: Interpreter, instance: "PloxInstance", arguments: list[Any]) -> Any:
+        """Call the method on ``instance`` directly, without the ``PloxFunction`` that ``bind`` would make."""
+        return self.run(interpreter, Frame(self.closure, [instance]), arguments)
+
+    def run(self, interpreter: Interpreter, closure: Environment | Frame, arguments: list[Any]) -> Any:
+        # A trampoline: a function that returns a ``TailCall`` is followed by the function it calls, here rather than
+        # in a nested call, so a chain of tail calls runs in constant Python stack space.
+        function = self
+        while True:
+            declaration = function.declaraction
+            if declaration.lazy is not None:
+                interpreter.compile_function(declaration)
+
+            # The arity has been checked by the caller, so the arguments become the frame's values as they are.
+            if declaration.size > len(arguments):
+                arguments += [None] * (declaration.size - len(arguments))
+            returned = interpreter.executeBlock(declaration.body, Frame(closure, arguments))
+
+            if function.is_initializer:
+                return closure.values[0]
+            if not returned:
+                return None
+            value = interpreter.returning
+            if value.__class__ is not TailCall:
+                return value
+            function, closure, arguments = value.function, value.closure, value.arguments
 
     def bind(self, instance: "PloxInstance"):
-        environment: Environment = Environment(self.closure)
-        environment.define("this", instance)
+        environment: Frame = Frame(self.closure, [instance])
         return PloxFunction(self.declaraction, environment, self.is_initializer)
 
 
-# Native clock function
-class NativeClockFunction(PloxCallable):
-    @override
-    def arity(self) -> int:
-        return 0  # Takes no arguments
+class TailCall:
+    """What a ``return`` in tail position leaves in ``Interpreter.returning``: the call to make in its place."""
 
-    @override
-    def call(self, interpreter, arguments: list[Any]) -> float:
-        return time.time()  # Python's time.time() is equivalent to System.currentTimeMillis() / 1000.0
+    __slots__ = ("function", "closure", "arguments")
+
+    def __init__(self, function: PloxFunction, closure: Environment | Frame, arguments: list[Any]) -> None:
+        self.function = function
+        self.closure = closure
+        self.arguments = arguments
 
-    @override
-    def __str__(self) -> str:
-        return "<native fn>"
+
+class Shape:
+    """
+    A hidden class: the layout shared by the instances of a class that were given the same fields in the same order.
+    ``slots`` maps each field to the index of its value in the instances' ``values``. Adding a field moves an
+    instance to the shape ``adding`` returns, which is made once and then shared by every instance taking that step.
+    """
+
+    __slots__ = ("slots", "transitions")
+
+    def __init__(self, slots: dict[str, int]) -> None:
+        self.slots = slots
+        self.transitions: dict[str, Shape] = {}
+
+    def adding(self, name: str) -> "Shape":
+        shape = self.transitions.get(name)
+        if shape is None:
+            shape = self.transitions[name] = Shape({**self.slots, name: len(self.slots)})
+        return shape
 
 
 class PloxClass(PloxCallable):
@@ -321,15 +585,21 @@ class PloxClass(PloxCallable):
         self.name = name
         self.methods = methods
         self.super_class = super_class
+        # Every method an instance has, inherited or not, so a lookup is one dict access rather than a walk up the
+        # superclasses. Classes don't change once they are made, so the table can be built here.
+        self.vtable: dict[str, PloxFunction] = {**super_class.vtable, **methods} if super_class else dict(methods)
+        self.initializer: PloxFunction | None = self.vtable.get("init")
+        # The shape of instances with no fields yet. Each class has its own, so a shape also tells the class.
+        self.shape = Shape({})
+
+    def add_method(self, name: str, method: Any) -> None:
+        """Add a method to a class still being made, for a compiler that builds one method at a time."""
+        self.methods[name] = self.vtable[name] = method
+        if name == "init":
+            self.initializer = method
 
     def find_method(self, name: str):
-        if name in self.methods:
-            return self.methods[name]
-
-        if self.super_class:
-            return self.super_class.find_method(name)
-
-        return None
+        return self.vtable.get(name)
 
     @override
     def __str__(self) -> str:
@@ -337,37 +607,50 @@ class PloxClass(PloxCallable):
 
     @override
     def arity(self) -> int:
-        initializer = self.find_method("init")
-        if initializer is None:
+        if self.initializer is None:
             return 0
-        return initializer.arity()
+        return self.initializer.arity()
 
     @override
     def call(self, interpreter: Interpreter, arguments: list[Any]) -> Any:
         instance: PloxInstance = PloxInstance(self)
-        initializer = self.find_method("init")
-        if initializer is not None:
-            initializer.bind(instance).call(interpreter, arguments)
+        if self.initializer is not None:
+            self.initializer.invoke(interpreter, instance, arguments)
         return instance
 
 
 class PloxInstance:
+    # Fields are kept by ``Shape``, in a list, rather than in a dict per instance.
+    __slots__ = ("klass", "shape", "values")
+
     def __init__(self, klass: PloxClass) -> None:
         self.klass = klass
-        self.fields = {}
+        self.shape = klass.shape
+        self.values: list[Any] = []
+
+    @property
+    def fields(self) -> dict[str, Any]:
+        """The fields by name, built anew on each access: for inspection, not for the interpreter's own use."""
+        return {name: self.values[slot] for name, slot in self.shape.slots.items()}
 
     def get(self, name: Token):
-        if name.lexeme in self.fields:
-            return self.fields[name.lexeme]
+        slot = self.shape.slots.get(name.lexeme)
+        if slot is not None:
+            return self.values[slot]
 
-        method: PloxFunction = self.klass.find_method(name.lexeme)
+        method: PloxFunction | None = self.klass.vtable.get(name.lexeme)
         if method:
             return method.bind(self)
 
         raise RuntimeError(f"{name}, undefined property '{name.lexeme}'.")
 
     def set(self, name: Token, value: Any):
-        self.fields[name.lexeme] = value
+        slot = self.shape.slots.get(name.lexeme)
+        if slot is None:
+            self.shape = self.shape.adding(name.lexeme)
+            self.values.append(value)
+        else:
+            self.values[slot] = value
 
     @override
     def __str__(self) -> str:
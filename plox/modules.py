@@ -0,0 +1,165 @@
+import os
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Final
+
+from plox import cache
+from plox.parser import Parser
+from plox.resolver import Resolver
+from plox.scanner import DEFAULT_SCANNER, ScanError, scanner_for
+from plox.stmt import Import, Stmt
+
+
+@dataclass
+class Module:
+    """A compiled script: its resolved statements, the modules it imports and the errors found compiling it."""
+
+    path: str
+    statements: list[Stmt] = field(default_factory=list)
+    errors: list[str] = field(default_factory=list)
+
+    @property
+    def imports(self) -> list[str]:
+        """Absolute paths of the modules imported by this one, in import order."""
+        return [locate(self.path, statement.path.literal) for statement in imports(self.statements)]
+
+
+def imports(statements: list[Stmt]) -> list[Import]:
+    # The resolver only accepts imports at the top level, so there is no need to look inside declarations.
+    return [statement for statement in statements if isinstance(statement, Import)]
+
+
+def locate(importer: str | None, path: str) -> str:
+    """Absolute path of the module ``path`` imported from the script ``importer``, or from the REPL when ``None``."""
+    directory = os.path.dirname(importer) if importer is not None else os.getcwd()
+    return os.path.realpath(os.path.join(directory, path))
+
+
+def cached_module(path: str, lazy: bool = False) -> Module | None:
+    """The module at ``path`` as found in the cache, or ``None`` when it has to be compiled."""
+    try:
+        with open(path) as f:
+            source = f.read()
+    except OSError:
+        return None
+    statements = cache.load(path, source, lazy)
+    return None if statements is None else Module(path, statements)
+
+
+def compile_module(path: str, scanner: str = DEFAULT_SCANNER, use_cache: bool = True, lazy: bool = False) -> Module:
+    """
+    Load the module at ``path`` from the cache, or scan, parse and resolve it. Errors are collected on the module
+    instead of being printed, so this can run in a worker process.
+    """
+    module = Module(path)
+    try:
+        with open(path) as f:
+            source = f.read()
+    except OSError as e:
+        module.errors.append(f"Can't open module '{path}': {e.strerror}.")
+        return module
+
+    statements = cache.load(path, source, lazy) if use_cache else None
+    if statements is not None:
+        module.statements = statements
+        return module
+
+    try:
+        tokens = scanner_for(source, scanner).scan_tokens()
+    except ScanError as e:
+        module.errors.append(str(e))
+        return module
+
+    parser = Parser(tokens, report=False, lazy=lazy)
+    statements = parser.parse()
+    if parser.errors:
+        module.errors.extend(
+            f"[line {error.token.line}] Error at '{error.token.lexeme}': {error}" for error in parser.errors
+        )
+        return module
+
+    try:
+        Resolver().resolve_program(statements)
+    except Exception as e:
+        module.errors.append(str(e))
+        return module
+
+    module.statements = statements
+    if use_cache:
+        cache.store(path, source, statements, lazy)
+    return module
+
+
+class ModuleLoader:
+    """
+    Compiles the modules of an import graph and keeps them for the interpreter, which executes each one the first
+    time it is imported.
+
+    ``load_graph`` walks the graph breadth first. Modules found in the cache are loaded directly; the others are
+    compiled in a process pool, so independent modules are scanned, parsed and resolved in parallel, and the
+    imports of each module are followed as soon as it is done. A lone module with nothing else pending is compiled
+    in-process, since starting a worker would cost more than it saves.
+    """
+
+    def __init__(
+        self, scanner: str = DEFAULT_SCANNER, use_cache: bool = True, jobs: int | None = None, lazy: bool = False
+    ) -> None:
+        self.scanner: str = scanner
+        self.use_cache: bool = use_cache
+        self.jobs: int | None = jobs
+        self.lazy: bool = lazy
+        self.modules: Final[dict[str, Module]] = {}
+
+    def load(self, path: str) -> Module:
+        """The compiled module at the absolute ``path``, compiling it on first use."""
+        module = self.modules.get(path)
+        if module is None:
+            module = self.modules[path] = compile_module(path, self.scanner, self.use_cache, self.lazy)
+        return module
+
+    def load_graph(self, importer: str | None, statements: list[Stmt]) -> list[Module]:
+        """
+        Compile every module reachable from ``statements``, the program of the script at ``importer``, and return
+        the ones that failed to compile.
+        """
+        pending = deque(locate(importer, statement.path.literal) for statement in imports(statements))
+        running: dict[Future[Module], str] = {}
+        seen = set(self.modules)
+        failed: list[Module] = []
+        pool: ProcessPoolExecutor | None = None
+        jobs = self.jobs or os.cpu_count() or 1
+
+        def finish(module: Module) -> None:
+            self.modules[module.path] = module
+            if module.errors:
+                failed.append(module)
+            pending.extend(module.imports)
+
+        try:
+            while pending or running:
+                while pending:
+                    path = pending.popleft()
+                    if path in seen:
+                        continue
+                    seen.add(path)
+                    if self.use_cache and (module := cached_module(path, self.lazy)) is not None:
+                        finish(module)
+                        continue
+                    if jobs == 1 or (not pending and not running):
+                        finish(compile_module(path, self.scanner, self.use_cache, self.lazy))
+                        continue
+                    if pool is None:
+                        pool = ProcessPoolExecutor(jobs)
+                    running[pool.submit(compile_module, path, self.scanner, self.use_cache, self.lazy)] = path
+
+                if running:
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        del running[future]
+                        finish(future.result())
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+
+        return failed
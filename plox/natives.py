@@ -0,0 +1,377 @@
+import functools
+import operator
+import time
+from collections.abc import Callable
+from typing import TYPE_CHECKING, Any, ClassVar, Final, override
+
+from plox.token import Token
+
+if TYPE_CHECKING:
+    from plox.interpreter import Interpreter
+
+
+def arity_error(arity: int, count: int) -> RuntimeError:
+    """The error for calling a callable of ``arity`` with ``count`` arguments, which every engine raises."""
+    return RuntimeError(f"Expected {arity} arguments but got {count}.")
+
+
+class PloxCallable:
+    def arity(self) -> int:
+        raise NotImplementedError("Subclasses must implement arity")
+
+    def call(self, interpreter: "Interpreter", arguments: list[Any]) -> Any:
+        raise NotImplementedError("Subclasses must implement call")
+
+    def __str__(self) -> str:
+        return "<callable>"
+
+
+# Native clock function
+class NativeClockFunction(PloxCallable):
+    @override
+    def arity(self) -> int:
+        return 0  # Takes no arguments
+
+    @override
+    def call(self, interpreter, arguments: list[Any]) -> float:
+        return time.time()  # Python's time.time() is equivalent to System.currentTimeMillis() / 1000.0
+
+    @override
+    def __str__(self) -> str:
+        return "<native fn>"
+
+
+# The types of the values that can key a memoized call or a ``Map``: they are compared by value, not identity.
+KEYS: Final[frozenset[type]] = frozenset((float, str, bool, type(None)))
+
+
+class NativeMemoizeFunction(PloxCallable):
+    """
+    ``memoize(function, size)``: a function calling ``function``, which must be pure, and keeping the results of
+    the last ``size`` calls, or of every call with a ``nil`` size.
+    """
+
+    @override
+    def arity(self) -> int:
+        return 2
+
+    @override
+    def call(self, interpreter: "Interpreter", arguments: list[Any]) -> "MemoizedFunction":
+        value, size = arguments
+        function = interpreter.memoizable(value)
+        if function is None:
+            raise RuntimeError("Can only memoize pure functions.")
+        if size is not None and not (type(size) is float and size.is_integer() and size > 0):
+            raise RuntimeError("Memo size must be a positive whole number or nil.")
+        memoized = MemoizedFunction(interpreter, function, None if size is None else int(size))
+        interpreter.memoized.append(memoized)
+        return memoized
+
+    @override
+    def __str__(self) -> str:
+        return "<native fn>"
+
+
+class MemoizedFunction(PloxCallable):
+    """
+    A pure function behind a least recently used cache of its results. Calls whose arguments are all numbers,
+    strings, booleans or nil are looked up by them, told apart by type as well, since ``true`` isn't ``1``; other
+    calls, which may depend on the state of an instance, always run the function.
+    """
+
+    def __init__(self, interpreter: "Interpreter", function: PloxCallable, size: int | None) -> None:
+        self.function = function
+        self.size = size
+        self.uncached = 0
+        # Results put in the cache. A call that raises is a miss but stores nothing, so evictions are counted from
+        # these rather than from the misses.
+        self.stored = 0
+
+        def store(*arguments: Any) -> Any:
+            result = function.call(interpreter, list(arguments))
+            self.stored += 1
+            return result
+
+        self.cached = functools.lru_cache(maxsize=size, typed=True)(store)
+
+    @override
+    def arity(self) -> int:
+        return self.function.arity()
+
+    @override
+    def call(self, interpreter: "Interpreter", arguments: list[Any]) -> Any:
+        for argument in arguments:
+            if argument.__class__ not in KEYS:
+                self.uncached += 1
+                return self.function.call(interpreter, arguments)
+        return self.cached(*arguments)
+
+    def statistics(self) -> str:
+        info = self.cached.cache_info()
+        evictions = self.stored - info.currsize
+        size = "unbounded" if self.size is None else self.size
+        return (
+            f"{self.function}: {info.hits} hits, {info.misses} misses, {evictions} evictions, "
+            f"{info.currsize}/{size} entries, {self.uncached} uncached calls"
+        )
+
+    @override
+    def __str__(self) -> str:
+        return str(self.function)
+
+
+class NativeInstance:
+    """
+    Base of the values of native classes. Their properties are the Python methods named in ``exposed``, which take
+    the interpreter and then the Lox arguments; ``lookup`` returns one bound as a ``NativeMethod``. Subclasses that
+    support ``[]`` override ``index`` and ``set_index``.
+    """
+
+    __slots__ = ()
+
+    exposed: ClassVar[tuple[str, ...]] = ()
+    arities: ClassVar[dict[str, int]] = {}
+
+    def __init_subclass__(cls) -> None:
+        cls.arities = {name: getattr(cls, name).__code__.co_argcount - 2 for name in cls.exposed}
+
+    def lookup(self, name: Token) -> "NativeMethod":
+        arity = self.arities.get(name.lexeme)
+        if arity is None:
+            raise RuntimeError(f"{name}, undefined property '{name.lexeme}'.")
+        return NativeMethod(self, name.lexeme, arity)
+
+    def index(self, key: Any) -> Any:
+        raise RuntimeError("Only lists, maps and arrays can be indexed.")
+
+    def set_index(self, key: Any, value: Any) -> None:
+        raise RuntimeError("Only lists, maps and arrays can be indexed.")
+
+    def format(self, stringify: Callable[[Any], str]) -> str:
+        raise NotImplementedError("Subclasses must implement format")
+
+    def __str__(self) -> str:
+        return self.format(str)
+
+
+class NativeMethod(PloxCallable):
+    """A method of a ``NativeInstance``, bound to it."""
+
+    def __init__(self, receiver: NativeInstance, name: str, count: int) -> None:
+        self.receiver = receiver
+        self.name = name
+        self.count = count
+
+    @override
+    def arity(self) -> int:
+        return self.count
+
+    @override
+    def call(self, interpreter: "Interpreter", arguments: list[Any]) -> Any:
+        return getattr(self.receiver, self.name)(interpreter, *arguments)
+
+    @override
+    def __str__(self) -> str:
+        return "<native fn>"
+
+
+class NativeClass(PloxCallable):
+    """A native class, like ``List``: calling it with no arguments makes an empty instance."""
+
+    def __init__(self, name: str, make: Callable[[], NativeInstance]) -> None:
+        self.name = name
+        self.make = make
+
+    @override
+    def arity(self) -> int:
+        return 0
+
+    @override
+    def call(self, interpreter: "Interpreter", arguments: list[Any]) -> NativeInstance:
+        return self.make()
+
+    @override
+    def __str__(self) -> str:
+        return self.name
+
+
+def get_index(obj: Any, key: Any) -> Any:
+    """``obj[key]``, as every engine evaluates it."""
+    if not isinstance(obj, NativeInstance):
+        raise RuntimeError("Only lists, maps and arrays can be indexed.")
+    return obj.index(key)
+
+
+def set_index(obj: Any, key: Any, value: Any) -> Any:
+    """``obj[key] = value``, as every engine evaluates it."""
+    if not isinstance(obj, NativeInstance):
+        raise RuntimeError("Only lists, maps and arrays can be indexed.")
+    obj.set_index(key, value)
+    return value
+
+
+def whole_number(value: Any, what: str) -> int:
+    if type(value) is not float or not value.is_integer():
+        raise RuntimeError(f"{what} must be a whole number.")
+    return int(value)
+
+
+class ListInstance(NativeInstance):
+    """
+    A Lox ``List``, kept in a Python list. Indices are whole numbers from 0; ``map``, ``filter``, ``reduce`` and
+    ``sortBy`` call back into Lox for each item but loop in Python.
+    """
+
+    __slots__ = ("items",)
+
+    exposed = ("append", "extend", "pop", "length", "get", "set", "slice", "sort", "sortBy", "map", "filter", "reduce")
+
+    def __init__(self, items: list[Any] | None = None) -> None:
+        self.items: list[Any] = [] if items is None else items
+
+    def position(self, key: Any) -> int:
+        position = whole_number(key, "List index")
+        if not 0 <= position < len(self.items):
+            raise RuntimeError("List index out of range.")
+        return position
+
+    @override
+    def index(self, key: Any) -> Any:
+        return self.items[self.position(key)]
+
+    @override
+    def set_index(self, key: Any, value: Any) -> None:
+        self.items[self.position(key)] = value
+
+    @override
+    def format(self, stringify: Callable[[Any], str]) -> str:
+        return "[" + ", ".join(map(stringify, self.items)) + "]"
+
+    def append(self, interpreter: "Interpreter", value: Any) -> None:
+        self.items.append(value)
+
+    def extend(self, interpreter: "Interpreter", other: Any) -> None:
+        if not isinstance(other, ListInstance):
+            raise RuntimeError("Can only extend a list with a list.")
+        self.items.extend(other.items)
+
+    def pop(self, interpreter: "Interpreter") -> Any:
+        if not self.items:
+            raise RuntimeError("Can't pop from an empty list.")
+        return self.items.pop()
+
+    def length(self, interpreter: "Interpreter") -> float:
+        return float(len(self.items))
+
+    def get(self, interpreter: "Interpreter", key: Any) -> Any:
+        return self.index(key)
+
+    def set(self, interpreter: "Interpreter", key: Any, value: Any) -> Any:
+        self.set_index(key, value)
+        return value
+
+    def slice(self, interpreter: "Interpreter", start: Any, end: Any) -> "ListInstance":
+        """The items from ``start`` up to ``end``, either of which may be nil or negative, like a Python slice."""
+        first = None if start is None else whole_number(start, "Slice start")
+        last = None if end is None else whole_number(end, "Slice end")
+        return ListInstance(self.items[first:last])
+
+    def sort(self, interpreter: "Interpreter") -> None:
+        self.items.sort(key=sort_key)
+
+    def sortBy(self, interpreter: "Interpreter", function: Any) -> None:
+        """Sort by what ``function`` returns for each item, calling it once per item."""
+        apply = interpreter.apply
+        keyed = [(sort_key(apply(function, [item])), item) for item in self.items]
+        keyed.sort(key=operator.itemgetter(0))
+        self.items[:] = [item for _, item in keyed]
+
+    def map(self, interpreter: "Interpreter", function: Any) -> "ListInstance":
+        apply = interpreter.apply
+        return ListInstance([apply(function, [item]) for item in self.items])
+
+    def filter(self, interpreter: "Interpreter", function: Any) -> "ListInstance":
+        apply, is_truthy = interpreter.apply, interpreter.is_truthy
+        return ListInstance([item for item in self.items if is_truthy(apply(function, [item]))])
+
+    def reduce(self, interpreter: "Interpreter", function: Any, initial: Any) -> Any:
+        apply = interpreter.apply
+        result = initial
+        for item in self.items:
+            result = apply(function, [result, item])
+        return result
+
+
+def sort_key(value: Any) -> Any:
+    # Numbers sort before strings, and each among themselves; anything else can't be ordered.
+    kind = value.__class__
+    if kind is float:
+        return (0, value)
+    if kind is str:
+        return (1, value)
+    raise RuntimeError("Can only sort numbers and strings.")
+
+
+class MapInstance(NativeInstance):
+    """
+    A Lox ``Map``, kept in a Python dict. Keys are numbers, strings, booleans or nil; a boolean is stored as a tuple
+    with its type so that ``true`` and ``1`` are different keys, as they are different Lox values.
+    """
+
+    __slots__ = ("entries",)
+
+    exposed = ("get", "set", "has", "remove", "length", "keys", "values")
+
+    def __init__(self) -> None:
+        self.entries: dict[Any, Any] = {}
+
+    @staticmethod
+    def key(value: Any) -> Any:
+        kind = value.__class__
+        if kind is bool:
+            return (bool, value)
+        if kind not in KEYS:
+            raise RuntimeError("Map keys must be numbers, strings, booleans or nil.")
+        return value
+
+    @override
+    def index(self, key: Any) -> Any:
+        try:
+            return self.entries[self.key(key)]
+        except KeyError:
+            raise RuntimeError("Undefined key.") from None
+
+    @override
+    def set_index(self, key: Any, value: Any) -> None:
+        self.entries[self.key(key)] = value
+
+    @override
+    def format(self, stringify: Callable[[Any], str]) -> str:
+        return "{" + ", ".join(f"{stringify(key)}: {stringify(value)}" for key, value in self.items()) + "}"
+
+    def items(self) -> list[tuple[Any, Any]]:
+        return [(key[1] if key.__class__ is tuple else key, value) for key, value in self.entries.items()]
+
+    def get(self, interpreter: "Interpreter", key: Any) -> Any:
+        """The value for ``key``, or nil if there is none."""
+        return self.entries.get(self.key(key))
+
+    def set(self, interpreter: "Interpreter", key: Any, value: Any) -> Any:
+        self.set_index(key, value)
+        return value
+
+    def has(self, interpreter: "Interpreter", key: Any) -> bool:
+        return self.key(key) in self.entries
+
+    def remove(self, interpreter: "Interpreter", key: Any) -> Any:
+        """Remove ``key``, returning its value, or nil if there was none."""
+        return self.entries.pop(self.key(key), None)
+
+    def length(self, interpreter: "Interpreter") -> float:
+        return float(len(self.entries))
+
+    def keys(self, interpreter: "Interpreter") -> ListInstance:
+        return ListInstance([key for key, _ in self.items()])
+
+    def values(self, interpreter: "Interpreter") -> ListInstance:
+        return ListInstance(list(self.entries.values()))
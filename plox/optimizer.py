@@ -0,0 +1,205 @@
+import copy
+import dataclasses
+import math
+from collections.abc import Iterable
+from typing import Any, Final
+
+from plox.expr import Binary, Expr, Grouping, Literal, Logical, Unary
+from plox.interpreter import Interpreter
+from plox.stmt import Block, Expression, If, Return, Stmt, While
+from plox.token_type import TokenType
+
+
+class Optimization:
+    """
+    One rewrite of the ``Optimizer`` pipeline over resolved statements. ``visit`` rewrites the children of a node
+    first and then hands the node to ``visit_<NodeClass>`` when the subclass defines it, so each rule sees operands
+    that are already optimized.
+
+    Nodes are never changed in place: a node whose children change is copied, which keeps the resolver's ``depth``
+    and ``slot`` on it and leaves the program that was cached untouched. ``visit`` may return ``None`` for a
+    statement to drop it.
+    """
+
+    def run(self, statements: list[Stmt]) -> list[Stmt]:
+        return self.statements(statements)
+
+    def statements(self, statements: list[Stmt]) -> list[Stmt]:
+        rewritten: list[Stmt] = []
+        for statement in statements:
+            statement = self.visit(statement)
+            if statement is not None:
+                rewritten.append(statement)
+        return rewritten
+
+    def visit(self, node: Any) -> Any:
+        changes: dict[str, Any] = {}
+        for field in dataclasses.fields(node):
+            value = getattr(node, field.name)
+            if isinstance(value, Expr):
+                rewritten = self.visit(value)
+            elif isinstance(value, Stmt):
+                # A statement in a branch or loop body can't just disappear.
+                rewritten = self.visit(value)
+                if rewritten is None:
+                    rewritten = Block([])
+            elif isinstance(value, list) and value and isinstance(value[0], Stmt):
+                rewritten = self.statements(value)
+            elif isinstance(value, list) and value and isinstance(value[0], Expr):
+                rewritten = [self.visit(item) for item in value]
+            else:
+                continue
+            if not unchanged(rewritten, value):
+                changes[field.name] = rewritten
+
+        if changes:
+            node = copy.copy(node)
+            for name, value in changes.items():
+                setattr(node, name, value)
+
+        method = getattr(self, f"visit_{type(node).__name__}", None)
+        return node if method is None else method(node)
+
+
+def unchanged(rewritten: Any, original: Any) -> bool:
+    if isinstance(rewritten, list):
+        return len(rewritten) == len(original) and all(new is old for new, old in zip(rewritten, original, strict=True))
+    return rewritten is original
+
+
+def is_constant(expr: Expr) -> bool:
+    return isinstance(expr, Literal)
+
+
+def is_literal_number(expr: Expr, value: float) -> bool:
+    """Whether ``expr`` is the number literal ``value``, telling 0 from -0 and numbers from booleans."""
+    return (
+        isinstance(expr, Literal)
+        and type(expr.value) is float
+        and expr.value == value
+        and math.copysign(1.0, expr.value) == math.copysign(1.0, value)
+    )
+
+
+ARITHMETIC: Final[frozenset[TokenType]] = frozenset((TokenType.PLUS, TokenType.MINUS, TokenType.STAR, TokenType.SLASH))
+
+
+def is_number(expr: Expr) -> bool:
+    """Whether ``expr`` evaluates to a number whenever it evaluates without raising."""
+    match expr:
+        case Literal(value):
+            return type(value) is float
+        case Unary(operator, right):
+            return operator.type == TokenType.MINUS and is_number(right)
+        case Binary(left, operator, right):
+            # Arithmetic with a number operand either raises or gives a number.
+            return operator.type in ARITHMETIC and (is_number(left) or is_number(right))
+    return False
+
+
+class FoldGroupings(Optimization):
+    """``(e)`` evaluates exactly like ``e``: grouping only matters to the parser."""
+
+    def visit_Grouping(self, expr: Grouping) -> Expr:
+        return expr.expression
+
+
+class FoldConstants(Optimization):
+    """
+    Evaluate operators whose operands are literals at compile time, with the interpreter's own operator semantics.
+    Operations that would raise, like dividing by zero or adding a string to a number, are left for run time so the
+    error is still reported when, and only if, the code runs.
+    """
+
+    def visit_Binary(self, expr: Binary) -> Expr:
+        if is_constant(expr.left) and is_constant(expr.right):
+            try:
+                return Literal(Interpreter.binary(expr.operator, expr.left.value, expr.right.value))
+            except Exception:
+                pass
+        return expr
+
+    def visit_Unary(self, expr: Unary) -> Expr:
+        if is_constant(expr.right):
+            try:
+                return Literal(Interpreter.unary(expr.operator, expr.right.value))
+            except Exception:
+                pass
+        return expr
+
+    def visit_Logical(self, expr: Logical) -> Expr:
+        if not is_constant(expr.left):
+            return expr
+        truthy = Interpreter.is_truthy(expr.left.value)
+        short_circuits = truthy if expr.operator.type == TokenType.OR else not truthy
+        return expr.left if short_circuits else expr.right
+
+
+class SimplifyAlgebra(Optimization):
+    """
+    Drop identity operations on numbers: ``e * 1``, ``1 * e``, ``e / 1`` and ``e - 0``. Only when ``e`` is known to
+    be a number, since with any other operand the operation raises; ``e + 0`` is kept because it turns -0 into 0.
+    """
+
+    def visit_Binary(self, expr: Binary) -> Expr:
+        left, right = expr.left, expr.right
+        match expr.operator.type:
+            case TokenType.STAR if is_literal_number(right, 1.0) and is_number(left):
+                return left
+            case TokenType.STAR if is_literal_number(left, 1.0) and is_number(right):
+                return right
+            case TokenType.SLASH if is_literal_number(right, 1.0) and is_number(left):
+                return left
+            case TokenType.MINUS if is_literal_number(right, 0.0) and is_number(left):
+                return left
+        return expr
+
+
+class EliminateDeadCode(Optimization):
+    """
+    Remove code that can never run or has no effect: branches and loops on constant conditions, statements after
+    a ``return`` in the same block and expression statements that are just a literal.
+    """
+
+    def statements(self, statements: list[Stmt]) -> list[Stmt]:
+        rewritten = super().statements(statements)
+        for index, statement in enumerate(rewritten):
+            if isinstance(statement, Return):
+                return rewritten[: index + 1]
+        return rewritten
+
+    def visit_If(self, stmt: If) -> Stmt | None:
+        if not is_constant(stmt.condition):
+            return stmt
+        return stmt.thenBranch if Interpreter.is_truthy(stmt.condition.value) else stmt.elseBranch
+
+    def visit_While(self, stmt: While) -> Stmt | None:
+        if is_constant(stmt.condition) and not Interpreter.is_truthy(stmt.condition.value):
+            return None
+        return stmt
+
+    def visit_Expression(self, stmt: Expression) -> Stmt | None:
+        return None if is_constant(stmt.expression) else stmt
+
+
+DEFAULT_PASSES: Final[tuple[type[Optimization], ...]] = (
+    FoldGroupings,
+    FoldConstants,
+    SimplifyAlgebra,
+    EliminateDeadCode,
+)
+
+
+class Optimizer:
+    """
+    Runs a pipeline of ``Optimization`` passes over a resolved program before it is interpreted. Passes run in
+    order, each over the output of the previous one; add a pass by subclassing ``Optimization`` and listing it.
+    """
+
+    def __init__(self, passes: Iterable[type[Optimization]] = DEFAULT_PASSES) -> None:
+        self.passes: Final[list[Optimization]] = [optimization() for optimization in passes]
+
+    def run(self, statements: list[Stmt]) -> list[Stmt]:
+        for optimization in self.passes:
+            statements = optimization.run(statements)
+        return statements
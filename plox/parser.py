@@ -1,7 +1,24 @@
+from collections.abc import Iterable, Iterator, Sequence
 from typing import Final
-from plox.stmt import Block, Class, Expression, Function, If, Print, Return, Stmt, Var, While
-from plox.token import Token
-from plox.expr import Assign, Binary, Call, Expr, Get, Grouping, Literal, Logical, Set, Super, This, Unary, Variable
+from plox.stmt import Block, Class, Expression, Function, If, Import, LazyBody, Print, Return, Stmt, Var, While
+from plox.token import Token, TokenStore
+from plox.expr import (
+    Assign,
+    Binary,
+    Call,
+    Expr,
+    Get,
+    Grouping,
+    Index,
+    Literal,
+    Logical,
+    Set,
+    SetIndex,
+    Super,
+    This,
+    Unary,
+    Variable,
+)
 from plox.token_type import TokenType
 
 
@@ -11,6 +28,124 @@ class ParseError(RuntimeError):
         self.token = token
 
 
+# Binding power of the infix operators for the precedence climbing ``Parser.expression``; higher binds tighter.
+BINARY_PRECEDENCE: Final[dict[TokenType, int]] = {
+    TokenType.OR: 1,
+    TokenType.AND: 2,
+    TokenType.BANG_EQUAL: 3,
+    TokenType.EQUAL_EQUAL: 3,
+    TokenType.GREATER: 4,
+    TokenType.GREATER_EQUAL: 4,
+    TokenType.LESS: 4,
+    TokenType.LESS_EQUAL: 4,
+    TokenType.MINUS: 5,
+    TokenType.PLUS: 5,
+    TokenType.SLASH: 6,
+    TokenType.STAR: 6,
+}
+
+# What may follow each token type in a well-formed program, for the check ``Parser.skip_block`` makes of a function
+# body before leaving it unparsed. A type missing here may be followed by anything but the end of the file. The
+# check is loose, so a body that passes can still have errors, but one that fails certainly has.
+_EXPRESSION_START: Final[frozenset[TokenType]] = frozenset(
+    {
+        TokenType.IDENTIFIER,
+        TokenType.NUMBER,
+        TokenType.STRING,
+        TokenType.TRUE,
+        TokenType.FALSE,
+        TokenType.NIL,
+        TokenType.THIS,
+        TokenType.SUPER,
+        TokenType.LEFT_PAREN,
+        TokenType.MINUS,
+        TokenType.BANG,
+    }
+)
+_AFTER_OPERAND: Final[frozenset[TokenType]] = frozenset(BINARY_PRECEDENCE) | {
+    TokenType.DOT,
+    TokenType.LEFT_PAREN,
+    TokenType.LEFT_BRACE,
+    TokenType.RIGHT_PAREN,
+    TokenType.RIGHT_BRACE,
+    TokenType.COMMA,
+    TokenType.SEMICOLON,
+}
+_STATEMENT_START: Final[frozenset[TokenType]] = _EXPRESSION_START | {
+    TokenType.CLASS,
+    TokenType.FUN,
+    TokenType.VAR,
+    TokenType.IMPORT,
+    TokenType.FOR,
+    TokenType.IF,
+    TokenType.WHILE,
+    TokenType.PRINT,
+    TokenType.RETURN,
+    TokenType.LEFT_CURLY_BRACE,
+    TokenType.RIGHT_CURLY_BRACE,
+}
+_FOLLOWERS: Final[dict[TokenType, frozenset[TokenType]]] = {
+    TokenType.LEFT_CURLY_BRACE: _STATEMENT_START,
+    TokenType.RIGHT_CURLY_BRACE: _STATEMENT_START | {TokenType.ELSE},
+    # Empty ``for`` clauses put a ';' before another or before the ')'.
+    TokenType.SEMICOLON: _STATEMENT_START | {TokenType.ELSE, TokenType.SEMICOLON, TokenType.RIGHT_PAREN},
+    **dict.fromkeys(BINARY_PRECEDENCE, _EXPRESSION_START),
+    **dict.fromkeys((TokenType.BANG, TokenType.EQUAL, TokenType.COMMA, TokenType.PRINT), _EXPRESSION_START),
+    TokenType.LEFT_BRACE: _EXPRESSION_START,
+    TokenType.LEFT_PAREN: _EXPRESSION_START | {TokenType.RIGHT_PAREN, TokenType.SEMICOLON, TokenType.VAR},
+    TokenType.RETURN: _EXPRESSION_START | {TokenType.SEMICOLON},
+    **dict.fromkeys(
+        (TokenType.NUMBER, TokenType.STRING, TokenType.TRUE, TokenType.FALSE, TokenType.NIL, TokenType.THIS),
+        _AFTER_OPERAND,
+    ),
+    TokenType.IDENTIFIER: _AFTER_OPERAND | {TokenType.EQUAL, TokenType.LEFT_CURLY_BRACE},
+    TokenType.RIGHT_BRACE: _AFTER_OPERAND | {TokenType.EQUAL},
+    TokenType.RIGHT_PAREN: _AFTER_OPERAND
+    | _EXPRESSION_START
+    | {TokenType.LEFT_CURLY_BRACE, TokenType.PRINT, TokenType.RETURN, TokenType.IF, TokenType.WHILE, TokenType.FOR},
+    TokenType.DOT: frozenset({TokenType.IDENTIFIER}),
+    TokenType.SUPER: frozenset({TokenType.DOT}),
+    **dict.fromkeys((TokenType.VAR, TokenType.FUN, TokenType.CLASS), frozenset({TokenType.IDENTIFIER})),
+    **dict.fromkeys((TokenType.IF, TokenType.WHILE, TokenType.FOR), frozenset({TokenType.LEFT_PAREN})),
+    TokenType.IMPORT: frozenset({TokenType.STRING}),
+}
+FOLLOWERS: Final[dict[TokenType, frozenset[TokenType]]] = {
+    type: _FOLLOWERS.get(type, frozenset(TokenType) - {TokenType.EOF}) for type in TokenType
+}
+_BRACKETS: Final[frozenset[TokenType]] = frozenset(
+    {
+        TokenType.LEFT_PAREN,
+        TokenType.RIGHT_PAREN,
+        TokenType.LEFT_BRACE,
+        TokenType.RIGHT_BRACE,
+        TokenType.LEFT_CURLY_BRACE,
+        TokenType.RIGHT_CURLY_BRACE,
+    }
+)
+
+
+class TokenWindow:
+    """
+    Indexable view over a token iterator for ``Parser``. Tokens are pulled from the iterator as the parser looks
+    ahead, and ``discard_before`` drops the ones it can no longer reach.
+    """
+
+    def __init__(self, tokens: Iterable[Token]) -> None:
+        self.source: Final[Iterator[Token]] = iter(tokens)
+        self.buffer: Final[list[Token]] = []
+        self.offset: int = 0
+
+    def __getitem__(self, index: int) -> Token:
+        index -= self.offset
+        while index >= len(self.buffer):
+            self.buffer.append(next(self.source))
+        return self.buffer[index]
+
+    def discard_before(self, index: int) -> None:
+        del self.buffer[: index - self.offset]
+        self.offset = index
+
+
 class Parser:
     """
     program     → declaration* eof ;
@@ -18,6 +153,7 @@ class Parser:
     declaration → classDecl
                 | funDecl
                 | varDecl
+                | importDecl
                 | statement ;
     classDecl   → "class" IDENTIFIER ( "<" IDENTIFIER )?
                   {" function* "}" ;
@@ -25,6 +161,7 @@ class Parser:
     function    → IDENTIFIER "(" parameters? ")" block ;
     parameters  → IDENTIFIER ("," IDENTIFIER)* ;
     varDecl     → "var" IDENTIFIER ( "=" expression )? ";" ;
+    importDecl  → "import" STRING ";" ;
     statement   → exprStmt
                 | forStmt
                 | ifStmt
@@ -45,6 +182,7 @@ class Parser:
     exprStmt    → "return" expression? ";" ;
     expression  → assignment ;
     assignment  → ( call "." )? IDENTIFIER "=" assignment
+                | call "[" expression "]" "=" assignment
                 | logic_or ;
     logic_or    → logic_and ( "or" logic_and )* ;
     logic_and   → equality ( "and" equality )* ;
@@ -53,16 +191,22 @@ class Parser:
     term        → factor ( ( "-" | "+" ) factor )*
     factor      → unary ( ( "/" | "*" ) unary | "(" expression ")" )*
     unary       → ( "!" | "-" ) unary | call
-    call        → primary ( "(" arguments? ")" | "." INDENTIFIER )*;
+    call        → primary ( "(" arguments? ")" | "." INDENTIFIER | "[" expression "]" )*;
     arguments   → expression ( "," expression )* ;
     primary     → NUMBER | STRING | "false" | "true" | "nil"
                 | "(" expression ")"
                 | "super" "." IDENTIFIER ;
     """
 
-    def __init__(self, tokens: list[Token]) -> None:
-        self.tokens: Final[list[Token]] = tokens
+    def __init__(self, tokens: Iterable[Token], report: bool = True, lazy: bool = False) -> None:
+        self.tokens: Final[Sequence[Token] | TokenWindow] = (
+            tokens if isinstance(tokens, Sequence) else TokenWindow(tokens)
+        )
         self.current: int = 0
+        self.report: Final[bool] = report
+        # Only bracket-match function bodies, leaving them to ``Parser.function_body`` on the first call.
+        self.lazy: Final[bool] = lazy
+        self.errors: Final[list[ParseError]] = []
 
     def parse(self) -> list[Stmt]:
         stmts: list[Stmt] = []
@@ -71,6 +215,17 @@ class Parser:
 
         return stmts
 
+    def parse_iter(self) -> Iterator[Stmt]:
+        """
+        Yield each top-level declaration as soon as it has been parsed. When reading from a token iterator the
+        tokens of finished declarations are released, so memory stays bounded by the largest declaration.
+        """
+        while not self.is_at_end():
+            stmt = self.declaration()
+            if isinstance(self.tokens, TokenWindow):
+                self.tokens.discard_before(self.current - 1)
+            yield stmt
+
     def declaration(self):
         try:
             if self.match(TokenType.CLASS):
@@ -79,6 +234,8 @@ class Parser:
                 return self.function("function")
             if self.match(TokenType.VAR):
                 return self.var_declaration()
+            if self.match(TokenType.IMPORT):
+                return self.import_declaration()
             return self.statement()
         except ParseError:
             self.synchronize()
@@ -99,9 +256,66 @@ class Parser:
 
         self.consume(TokenType.RIGHT_PAREN, "Expect ')' after parameters.")
         self.consume(TokenType.LEFT_CURLY_BRACE, f"Expect '{{' before {kind} body.")
+        if self.lazy:
+            skipped = self.skip_block()
+            if skipped is not None:
+                return Function(name, params, [], LazyBody(skipped))
         body = self.block()
         return Function(name, params, body)
 
+    def skip_block(self) -> list[Token] | None:
+        """
+        Skip to the '}' closing the current block and return the tokens skipped, including that '}'. Each token is
+        checked against ``FOLLOWERS`` and the brackets for nesting on the way, and on a sure syntax error nothing is
+        skipped and ``None`` returned, so the caller parses the block now and its errors are reported before it runs.
+        """
+        tokens = self.tokens
+        # A ``TokenStore`` can tell the type without materializing the token.
+        type_at = tokens.type if isinstance(tokens, TokenStore) else lambda index: tokens[index].type
+        followers = FOLLOWERS
+        start = index = self.current
+        depth = 1
+        previous = TokenType.LEFT_CURLY_BRACE
+        # The ')' or ']' closing each open '(' or '['.
+        closing: list[TokenType] = []
+        while depth:
+            type = type_at(index)
+            if type not in followers[previous]:
+                return None
+            if type in _BRACKETS:
+                if type is TokenType.LEFT_PAREN:
+                    closing.append(TokenType.RIGHT_PAREN)
+                elif type is TokenType.LEFT_BRACE:
+                    closing.append(TokenType.RIGHT_BRACE)
+                elif closing:
+                    if closing.pop() is not type:
+                        return None
+                elif type is TokenType.LEFT_CURLY_BRACE:
+                    depth += 1
+                elif type is TokenType.RIGHT_CURLY_BRACE:
+                    depth -= 1
+                else:
+                    return None
+            previous = type
+            index += 1
+        self.current = index
+        return [tokens[i] for i in range(start, index)]
+
+    @staticmethod
+    def function_body(function: Function) -> tuple[list[Stmt], list[ParseError]]:
+        """
+        Parse the body a lazy parser skipped for ``function``, reporting errors exactly as ``block`` would. Functions
+        declared in it are parsed too, so that the resolver sees all the body does in deciding whether it is pure.
+        """
+        assert function.lazy is not None
+        tokens = function.lazy.tokens
+        parser = Parser([*tokens, Token(TokenType.EOF, "", None, tokens[-1].line)], report=False)
+        try:
+            body = parser.block()
+        except ParseError:
+            body = []
+        return body, parser.errors
+
     def var_declaration(self):
         name = self.consume(TokenType.IDENTIFIER, "Expect variable name.")
 
@@ -113,6 +327,12 @@ class Parser:
         self.consume(TokenType.SEMICOLON, "Expect ';' after variable declaration")
         return Var(name, initializer)
 
+    def import_declaration(self) -> Stmt:
+        keyword: Token = self.previous()
+        path: Token = self.consume(TokenType.STRING, "Expect module path after 'import'.")
+        self.consume(TokenType.SEMICOLON, "Expect ';' after module path.")
+        return Import(keyword, path)
+
     def class_declaration(self):
         name: Token = self.consume(TokenType.IDENTIFIER, "Expect class name.")
         superclass: Variable = None
@@ -237,6 +457,7 @@ class Parser:
                 TokenType.CLASS,
                 TokenType.FUN,
                 TokenType.VAR,
+                TokenType.IMPORT,
                 TokenType.FOR,
                 TokenType.IF,
                 TokenType.WHILE,
@@ -246,10 +467,12 @@ class Parser:
                 return
             self.advance()
 
-    @staticmethod
-    def error(token: Token, message: str) -> ParseError:
-        print(f"[line {token.line}] Error at '{token.lexeme}': {message}")
-        return ParseError(token, message)
+    def error(self, token: Token, message: str) -> ParseError:
+        if self.report:
+            print(f"[line {token.line}] Error at '{token.lexeme}': {message}")
+        error = ParseError(token, message)
+        self.errors.append(error)
+        return error
 
     def consume(self, type: TokenType, message: str) -> Token:
         if self.check(type):
@@ -303,11 +526,18 @@ class Parser:
             elif self.match(TokenType.DOT):
                 name: Token = self.consume(TokenType.IDENTIFIER, "Expect property name after '.'.")
                 expr = Get(name, expr)
+            elif self.match(TokenType.LEFT_BRACE):
+                expr = self.finish_index(expr)
             else:
                 break
 
         return expr
 
+    def finish_index(self, obj: Expr) -> Expr:
+        index = self.expression()
+        self.consume(TokenType.RIGHT_BRACE, "Expect ']' after index.")
+        return Index(obj, index)
+
     def finish_call(self, callee: Expr) -> Expr:
         arguments: list[Expr] = []
         if not self.check(TokenType.RIGHT_PAREN):
@@ -404,6 +634,8 @@ class Parser:
             elif isinstance(expr, Get):
                 get: Get = expr
                 return Set(get.name, get.obj, value)
+            elif isinstance(expr, Index):
+                return SetIndex(expr.obj, expr.index, value)
 
             self.error(equals, "Invalid assignment target.")
 
@@ -414,18 +646,99 @@ class Parser:
 
         while self.match(TokenType.OR):
             operator: Token = self.previous()
-            right: Expr = self.equality()
+            right: Expr = self.logic_and()
             expr = Logical(expr, operator, right)
         return expr
 
     def logic_and(self) -> Expr:
         expr: Expr = self.equality()
 
-        while self.match(TokenType.OR):
+        while self.match(TokenType.AND):
             operator: Token = self.previous()
             right: Expr = self.equality()
             expr = Logical(expr, operator, right)
         return expr
 
+    def expression(self) -> Expr:
+        """
+        Precedence climbing replacement for the ``assignment`` → ... → ``unary`` chain. Builds the same nodes, but a
+        primary expression costs one ``binary`` and one ``operand`` call instead of a frame per precedence level.
+        """
+        expr = self.binary(1)
+
+        if self.tokens[self.current].type == TokenType.EQUAL:
+            equals = self.advance()
+            value = self.expression()
+
+            if isinstance(expr, Variable):
+                return Assign(expr.name, value)
+            elif isinstance(expr, Get):
+                return Set(expr.name, expr.obj, value)
+            elif isinstance(expr, Index):
+                return SetIndex(expr.obj, expr.index, value)
+
+            self.error(equals, "Invalid assignment target.")
+
+        return expr
+
+    def binary(self, min_precedence: int) -> Expr:
+        expr = self.operand()
+        tokens = self.tokens
+        precedence_of = BINARY_PRECEDENCE.get
+
+        while True:
+            operator = tokens[self.current]
+            precedence = precedence_of(operator.type, 0)
+            if precedence < min_precedence:
+                return expr
+            self.current += 1
+            right = self.binary(precedence + 1)
+            if operator.type == TokenType.OR or operator.type == TokenType.AND:
+                expr = Logical(expr, operator, right)
+            else:
+                expr = Binary(expr, operator, right)
+
+    def operand(self) -> Expr:
+        """The ``unary`` and ``call`` rules, dispatching on the current token type instead of trying each rule."""
+        tokens = self.tokens
+        token = tokens[self.current]
+        type = token.type
+
+        if type == TokenType.BANG or type == TokenType.MINUS:
+            self.current += 1
+            return Unary(token, self.operand())
+
+        expr: Expr
+        if type == TokenType.IDENTIFIER:
+            self.current += 1
+            expr = Variable(token)
+        elif type == TokenType.NUMBER or type == TokenType.STRING:
+            self.current += 1
+            expr = Literal(token.literal)
+        else:
+            expr = self.primary()
+
+        while True:
+            type = tokens[self.current].type
+            if type == TokenType.LEFT_PAREN:
+                self.current += 1
+                expr = self.finish_call(expr)
+            elif type == TokenType.DOT:
+                self.current += 1
+                name: Token = self.consume(TokenType.IDENTIFIER, "Expect property name after '.'.")
+                expr = Get(name, expr)
+            elif type == TokenType.LEFT_BRACE:
+                self.current += 1
+                expr = self.finish_index(expr)
+            else:
+                return expr
+
+
+class RecursiveDescentParser(Parser):
+    """
+    Parser that handles expressions with one method per precedence level, as laid out in the ``Parser`` grammar.
+    Kept as the reference for the precedence climbing ``Parser.expression``.
+    """
+
     def expression(self) -> Expr:
         return self.assignment()
@@ -1,16 +1,20 @@
+import mmap
+import os
 import sys
-from plox.interpreter import Interpreter, LoxRuntimeError
+from plox import cache
+from plox.interpreter import Interpreter, LoxCompileError, LoxRuntimeError
 from plox.resolver import Resolver
 from plox.token import Token
 from plox.token_type import TokenType
-from plox.scanner import Scanner
+from plox.scanner import DEFAULT_SCANNER, StreamScanner, scanner_for
 from plox.parser import Parser
 
 import logging
 
-from typing import TYPE_CHECKING
+from typing import IO, TYPE_CHECKING
 
 if TYPE_CHECKING:
+    from collections.abc import Sequence
     from plox.stmt import Stmt
 
 
@@ -21,6 +25,11 @@ class Plox:
     interpreter = Interpreter()
     had_error = False
     had_runtime_error = False
+    scanner = DEFAULT_SCANNER
+    stream = False
+    use_cache = True
+    jobs: int | None = None
+    lazy = False
 
     @staticmethod
     def report(line: int, where: str, message: str):
@@ -42,40 +51,113 @@ class Plox:
         Plox.had_runtime_error = True
 
     @staticmethod
-    def run(input: str):
-        scanner = Scanner(input)
-        tokens: list[Token] = scanner.scan_tokens()
+    def compile(input: str) -> list["Stmt"] | None:
+        """Scan, parse and resolve ``input``. Returns ``None`` once an error has been reported."""
+        scanner = scanner_for(input, Plox.scanner)
+        tokens: Sequence[Token] = scanner.scan_tokens()
 
         if Plox.had_error:
-            return
+            return None
 
-        parser: Parser = Parser(tokens)
+        parser: Parser = Parser(tokens, lazy=Plox.lazy)
         statements: list[Stmt] = parser.parse()
 
+        if parser.errors:
+            Plox.had_error = True
         if Plox.had_error:
-            return
+            return None
 
         try:
-            resolver: Resolver = Resolver(Plox.interpreter)
+            resolver: Resolver = Resolver()
             resolver.resolve_program(statements)
         except Exception as e:
             Plox.had_error = True
             print(e)
-            return
+            return None
 
-        if Plox.had_error:
-            return
+        return statements
 
+    @staticmethod
+    def execute(statements: list["Stmt"]):
         try:
-            Plox.interpreter.interpret(statements)
+            Plox.interpreter.interpret(Plox.interpreter.optimize(statements))
+        except LoxCompileError as e:
+            Plox.had_error = True
+            print(e)
         except RuntimeError:
             Plox.had_runtime_error = True
 
+    @staticmethod
+    def run(input: str):
+        statements = Plox.compile(input)
+        if statements is not None:
+            Plox.execute(statements)
+
+    @staticmethod
+    def run_stream(stream: IO[str] | IO[bytes] | mmap.mmap):
+        """
+        Scan, parse, resolve and execute one top-level declaration at a time, so output starts before the whole
+        source has been read. Once an error has been reported the remaining declarations are only parsed.
+        """
+        parser: Parser = Parser(StreamScanner(stream), lazy=Plox.lazy)
+        resolver: Resolver = Resolver()
+        resolver.begin_scope()
+
+        for statement in parser.parse_iter():
+            if parser.errors:
+                Plox.had_error = True
+            if Plox.had_error or Plox.had_runtime_error:
+                continue
+
+            try:
+                resolver.resolve(statement)
+            except Exception as e:
+                Plox.had_error = True
+                print(e)
+                continue
+
+            try:
+                for optimized in Plox.interpreter.optimize([statement]):
+                    Plox.interpreter.execute(optimized)
+            except LoxCompileError as e:
+                Plox.had_error = True
+                print(e)
+            except Exception as e:
+                Plox.had_runtime_error = True
+                print(e)
+
+    @staticmethod
+    def load_modules(path: str, statements: list["Stmt"]) -> bool:
+        """Compile the modules imported, directly or not, by the script at ``path``. Reports any errors."""
+        failed = Plox.interpreter.modules.load_graph(path, statements)
+        for module in failed:
+            for error in module.errors:
+                print(f"{module.path}: {error}")
+        if failed:
+            Plox.had_error = True
+        return not failed
+
     @staticmethod
     def runFile(path: str):
-        with open(path) as f:
-            file = f.read(-1)
-            Plox.run(file)
+        modules = Plox.interpreter.modules
+        modules.scanner, modules.use_cache, modules.jobs = Plox.scanner, Plox.use_cache, Plox.jobs
+        modules.lazy = Plox.lazy
+        Plox.interpreter.module = os.path.realpath(path)
+        Plox.interpreter.imported.add(Plox.interpreter.module)
+
+        with open(path, "rb" if Plox.stream else "r") as f:
+            if not Plox.stream:
+                source = f.read(-1)
+                statements = cache.load(path, source, Plox.lazy) if Plox.use_cache else None
+                if statements is None:
+                    statements = Plox.compile(source)
+                    if statements is not None and Plox.use_cache:
+                        cache.store(path, source, statements, Plox.lazy)
+                if statements is not None and Plox.load_modules(Plox.interpreter.module, statements):
+                    Plox.execute(statements)
+            elif os.fstat(f.fileno()).st_size:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as source:
+                    Plox.run_stream(source)
 
             if Plox.had_error:
                 sys.exit(65)
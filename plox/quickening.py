@@ -0,0 +1,269 @@
+import operator
+from collections import Counter
+from collections.abc import Callable
+from typing import Any, Final, override
+
+from plox.environment import Frame
+from plox.expr import Binary, Call, Expr, Get, Grouping, Literal, Super, Variable
+from plox.interpreter import Interpreter, PloxFunction, PloxInstance, Shape, TailCall
+from plox.natives import arity_error
+from plox.token_type import TokenType
+
+
+def _divide(left: float, right: float) -> float:
+    if right == 0:
+        raise ValueError("Division by zero")
+    return left / right
+
+
+# What a specialized ``Binary`` applies to its operands once its guard holds. For numbers and strings alike these
+# are exactly ``Interpreter.binary``, including its failures.
+OPERATIONS: Final[dict[TokenType, Callable[[Any, Any], Any]]] = {
+    TokenType.PLUS: operator.add,
+    TokenType.MINUS: operator.sub,
+    TokenType.STAR: operator.mul,
+    TokenType.SLASH: _divide,
+    TokenType.LESS: operator.lt,
+    TokenType.LESS_EQUAL: operator.le,
+    TokenType.GREATER: operator.gt,
+    TokenType.GREATER_EQUAL: operator.ge,
+    TokenType.EQUAL_EQUAL: operator.eq,
+    TokenType.BANG_EQUAL: operator.ne,
+}
+
+
+# The specialized variants a node is rewritten to by assigning its ``__class__``. They add no fields, only the
+# attributes ``QuickeningInterpreter`` sets when it specializes the node.
+class NumberBinary(Binary):
+    """A ``Binary`` that has only seen two numbers. ``operation`` is its operator from ``OPERATIONS``."""
+
+    operation: Callable[[Any, Any], Any]
+
+
+class StringBinary(Binary):
+    """A ``Binary`` that has only seen two strings, like a concatenation."""
+
+    operation: Callable[[Any, Any], Any]
+
+
+# The variant for a ``Binary`` by the types of its operands, as ``Feedback`` records them.
+SPECIALIZATIONS: Final[dict[str, type[Binary]]] = {"float float": NumberBinary, "str str": StringBinary}
+
+
+class FieldGet(Get):
+    """A ``Get`` that has only read a field of instances of one class, found at ``slot`` of instances of ``shape``."""
+
+    shape: Shape
+    slot: int
+
+
+class MethodGet(Get):
+    """
+    A ``Get`` that has only looked up ``method`` on instances of one class. Instances of ``shape``, which tells their
+    class, have no field by that name.
+    """
+
+    shape: Shape
+    method: PloxFunction
+
+
+class Feedback:
+    """
+    The types a ``Binary`` or ``Get`` site has seen, and what became of its specialization. Only runs of the generic
+    node are counted: a specialized one skips the bookkeeping along with the rest.
+    """
+
+    def __init__(self, site: Expr, line: int, description: str) -> None:
+        self.site = site
+        self.line = line
+        self.description = description
+        self.types: Counter[str] = Counter()
+        self.deoptimizations = 0
+
+    @property
+    def polymorphic(self) -> bool:
+        return len(self.types) > 1
+
+    def __str__(self) -> str:
+        types = ", ".join(f"{key} x{count}" for key, count in self.types.most_common())
+        state = type(self.site).__name__
+        if self.deoptimizations:
+            state += f", deoptimized {self.deoptimizations}x"
+        return f"[line {self.line}] {self.description}: {state}: {types}"
+
+
+class QuickeningInterpreter(Interpreter):
+    """
+    The tree-walking ``Interpreter`` with self-specializing ``Binary`` and ``Get`` nodes. A site records the types
+    it sees; once it has run ``threshold`` times having seen only one, it is rewritten in place to a variant for
+    those types, which skips the operator dispatch or the method lookup. The ``Get`` of a method call ``obj.m()``
+    is a site too, which as a ``MethodGet`` calls its method without binding it. A variant first checks its
+    assumption and, when that fails, evaluates the node generically and rewrites it back for good: its feedback now
+    shows two kinds of operands, so it stays polymorphic. ``feedback`` lists every site, to see which ones stayed
+    generic.
+    """
+
+    threshold = 8
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.feedback: list[Feedback] = []
+        self.handlers: Final[dict[type, Callable[[Any], Any]]] = {
+            Binary: self.generic_binary,
+            NumberBinary: self.number_binary,
+            StringBinary: self.string_binary,
+            Get: self.generic_get,
+            FieldGet: self.field_get,
+            MethodGet: self.method_get,
+            Call: self.evaluate_call,
+            # The most common nodes, which need no feedback, but whose place in ``Interpreter.evaluate``'s
+            # ``match`` would otherwise cost more than the specializations save.
+            Literal: operator.attrgetter("value"),
+            Grouping: lambda expr: self.evaluate(expr.expression),
+            Variable: lambda expr: self.look_up_variable(expr.name, expr),
+        }
+
+    @override
+    def evaluate(self, expr: Expr) -> Any:
+        handler = self.handlers.get(expr.__class__)
+        if handler is None:
+            return super().evaluate(expr)
+        return handler(expr)
+
+    def observe(self, expr: Expr, line: int, description: str, key: str) -> Feedback:
+        feedback: Feedback | None = getattr(expr, "feedback", None)
+        if feedback is None:
+            feedback = expr.feedback = Feedback(expr, line, description)
+            self.feedback.append(feedback)
+        feedback.types[key] += 1
+        return feedback
+
+    def quickens(self, feedback: Feedback) -> bool:
+        """Whether the site has just warmed up, having seen only one kind of operands."""
+        return not feedback.polymorphic and feedback.types.total() == self.threshold
+
+    def deoptimize(self, expr: Expr, generic: type) -> None:
+        expr.__class__ = generic
+        expr.feedback.deoptimizations += 1
+
+    def generic_binary(self, expr: Binary) -> Any:
+        left = self.evaluate(expr.left)
+        right = self.evaluate(expr.right)
+        return self.observe_binary(expr, left, right)
+
+    def observe_binary(self, expr: Binary, left: Any, right: Any) -> Any:
+        op = expr.operator
+        key = f"{type(left).__name__} {type(right).__name__}"
+        feedback = self.observe(expr, op.line, op.lexeme, key)
+        if self.quickens(feedback) and key in SPECIALIZATIONS:
+            expr.__class__ = SPECIALIZATIONS[key]
+            expr.operation = OPERATIONS[op.type]
+        return self.binary(op, left, right)
+
+    def number_binary(self, expr: NumberBinary) -> Any:
+        left = self.evaluate(expr.left)
+        right = self.evaluate(expr.right)
+        if type(left) is float and type(right) is float:
+            return expr.operation(left, right)
+        self.deoptimize(expr, Binary)
+        return self.observe_binary(expr, left, right)
+
+    def string_binary(self, expr: StringBinary) -> Any:
+        left = self.evaluate(expr.left)
+        right = self.evaluate(expr.right)
+        if type(left) is str and type(right) is str:
+            return expr.operation(left, right)
+        self.deoptimize(expr, Binary)
+        return self.observe_binary(expr, left, right)
+
+    def generic_get(self, expr: Get) -> Any:
+        return self.observe_get(expr, self.evaluate(expr.obj))
+
+    def observe_get(self, expr: Get, obj: Any) -> Any:
+        self.observe_property(expr, obj)
+        return self.get(expr, obj)
+
+    def observe_property(self, expr: Get, obj: Any) -> None:
+        """Record what ``expr`` finds on ``obj``, rewriting it to ``FieldGet`` or ``MethodGet`` once warmed up."""
+        name = expr.name
+        if type(obj) is not PloxInstance:
+            self.observe(expr, name.line, f".{name.lexeme}", type(obj).__name__)
+            return
+
+        slot = obj.shape.slots.get(name.lexeme)
+        if slot is not None:
+            feedback = self.observe(expr, name.line, f".{name.lexeme}", f"{obj.klass} field")
+            if self.quickens(feedback):
+                expr.__class__ = FieldGet
+                expr.shape, expr.slot = obj.shape, slot
+            return
+
+        feedback = self.observe(expr, name.line, f".{name.lexeme}", f"{obj.klass} method")
+        method = obj.klass.find_method(name.lexeme)
+        if method is not None and self.quickens(feedback):
+            expr.__class__ = MethodGet
+            expr.shape, expr.method = obj.shape, method
+
+    def field_get(self, expr: FieldGet) -> Any:
+        obj = self.evaluate(expr.obj)
+        if type(obj) is PloxInstance and obj.shape is expr.shape:
+            return obj.values[expr.slot]
+        self.deoptimize(expr, Get)
+        return self.observe_get(expr, obj)
+
+    def method_get(self, expr: MethodGet) -> Any:
+        obj = self.evaluate(expr.obj)
+        if type(obj) is PloxInstance and obj.shape is expr.shape:
+            return expr.method.bind(obj)
+        self.deoptimize(expr, Get)
+        return self.observe_get(expr, obj)
+
+    def evaluate_call(self, expr: Call) -> Any:
+        # ``Interpreter.evaluate`` only sends a plain ``Get`` callee to ``invoke``, not a specialized one.
+        callee = expr.callee
+        if isinstance(callee, Get):
+            return self.invoke(callee, expr.arguments)
+        if callee.__class__ is Super:
+            return self.invoke_super(callee, expr.arguments)
+        return self.call(self.evaluate(callee), expr.arguments)
+
+    @override
+    def tail_call(self, expr: Call) -> Any:
+        if isinstance(expr.callee, Get):
+            return self.invoke(expr.callee, expr.arguments, tail=True)
+        return super().tail_call(expr)
+
+    @override
+    def invoke(self, callee: Get, arguments: list[Expr], tail: bool = False) -> Any:
+        """
+        Call ``obj.name(arguments)`` like ``Interpreter.invoke``, with ``callee`` a site like any ``Get``. Once
+        specialized, a ``MethodGet`` calls its method on the receiver without looking it up, and a ``FieldGet``
+        calls what its field holds.
+        """
+        receiver = self.evaluate(callee.obj)
+        kind = callee.__class__
+        if kind is MethodGet:
+            if type(receiver) is PloxInstance and receiver.shape is callee.shape:
+                return self.call_method(callee.method, receiver, arguments, tail)
+            self.deoptimize(callee, Get)
+        elif kind is FieldGet:
+            if type(receiver) is PloxInstance and receiver.shape is callee.shape:
+                return self.call(receiver.values[callee.slot], arguments, tail)
+            self.deoptimize(callee, Get)
+
+        self.observe_property(callee, receiver)
+        name = callee.name
+        if not isinstance(receiver, PloxInstance) or name.lexeme in receiver.shape.slots:
+            return self.call(self.get(callee, receiver), arguments, tail)
+        method = self.method(callee, receiver.klass, name.lexeme)
+        if method is None:
+            raise RuntimeError(f"{name}, undefined property '{name.lexeme}'.")
+        return self.call_method(method, receiver, arguments, tail)
+
+    def call_method(self, method: PloxFunction, receiver: PloxInstance, arguments: list[Expr], tail: bool) -> Any:
+        evaluated_args = [self.evaluate(arg) for arg in arguments]
+        if len(evaluated_args) != method.arity():
+            raise arity_error(method.arity(), len(evaluated_args))
+        if tail and type(method) is PloxFunction:
+            return TailCall(method, Frame(method.closure, [receiver]), evaluated_args)
+        return method.invoke(self, receiver, evaluated_args)
@@ -1,12 +1,31 @@
+import copyreg
+from dataclasses import dataclass
 from enum import Enum
-from typing import TYPE_CHECKING, Union
+from typing import Any, Optional, SupportsIndex, Union
 
-from plox.expr import Assign, Binary, Call, Expr, Get, Grouping, Literal, Logical, Set, Super, This, Unary, Variable
-from plox.stmt import Block, Class, Expression, Function, If, Print, Return, Stmt, Var, While
+from plox.expr import (
+    Assign,
+    Binary,
+    Call,
+    Expr,
+    Get,
+    Grouping,
+    Index,
+    Literal,
+    Logical,
+    Set,
+    SetIndex,
+    Super,
+    This,
+    Unary,
+    Variable,
+)
+from plox.stmt import Block, Class, Expression, Function, If, Import, Print, Return, Stmt, Var, While
 from plox.token import Token
 
-if TYPE_CHECKING:
-    from plox.interpreter import Interpreter
+
+class ResolveError(Exception):
+    """A static error in a program, like a return outside a function or reading a local in its own initializer."""
 
 
 class FunctionType(Enum):
@@ -22,15 +41,113 @@ class ClassType(Enum):
     SUBCLASS = 2
 
 
+class Scope(dict[str, bool]):
+    """
+    The names declared in a block, mapped to whether their initializer has run. ``order`` records when each name
+    was declared, which lets a ``ScopeView`` show the scope as it was at an earlier point, and ``slots`` where its
+    value is kept in the ``Frame`` of ``frame``.
+
+    A scope normally gets a frame of its own. A flat scope, one that no closure can capture, puts its names in the
+    frame of the enclosing scope instead, so entering it allocates nothing; ``size`` counts the slots of a frame,
+    including those of the flat scopes inside it.
+    """
+
+    def __init__(self, frame: Optional["Scope"] = None) -> None:
+        super().__init__()
+        self.order: dict[str, int] = {}
+        self.slots: dict[str, int] = {}
+        self.frame: Scope = self if frame is None else frame
+        self.flat: bool = frame is not None
+        self.size: int = 0
+
+    def __setitem__(self, name: str, defined: bool) -> None:
+        if name not in self.order:
+            self.order[name] = len(self.order)
+            self.slots[name] = self.frame.size
+            self.frame.size += 1
+        super().__setitem__(name, defined)
+
+    def slot(self, name: str) -> int:
+        return self.slots[name]
+
+    def __reduce_ex__(self, protocol: SupportsIndex) -> tuple[Any, ...]:
+        # Pickle would add the names through ``__setitem__`` before restoring ``order``, so they go in the state.
+        return copyreg.__newobj__, (Scope,), (dict(self), self.__dict__)
+
+    def __setstate__(self, state: tuple[dict[str, bool], dict[str, Any]]) -> None:
+        names, attributes = state
+        self.__dict__.update(attributes)
+        dict.update(self, names)
+
+
+class ScopeView:
+    """Read-only view of the first ``size`` names declared in ``scope``."""
+
+    def __init__(self, scope: Scope, size: int) -> None:
+        self.scope = scope
+        self.size = size
+        self.flat = scope.flat
+
+    def __contains__(self, name: str) -> bool:
+        return self.scope.order.get(name, self.size) < self.size
+
+    def __getitem__(self, name: str) -> bool:
+        return self.scope[name]
+
+    def slot(self, name: str) -> int:
+        return self.scope.slots[name]
+
+
+def declares_closure(statements: list[Stmt]) -> bool:
+    """Whether a function or class is declared anywhere in ``statements``, so that a closure may capture them."""
+    for statement in statements:
+        match statement:
+            case Function() | Class():
+                return True
+            case Block(body):
+                nested = body
+            case If(_, thenBranch, elseBranch):
+                nested = [thenBranch] if elseBranch is None else [thenBranch, elseBranch]
+            case While(_, body):
+                nested = [body]
+            case _:
+                continue
+        if declares_closure(nested):
+            return True
+    return False
+
+
+@dataclass
+class Context:
+    """What ``Resolver`` knew where a lazily parsed function was declared, to resolve its body on the first call."""
+
+    scopes: list[ScopeView]
+    function: "FunctionType"
+    current_class: "ClassType"
+
+
 class Resolver:
-    def __init__(self, interpreter) -> None:
-        self.interpreter: Interpreter = interpreter
+    """
+    Binds every use of a local variable to its declaration, recording on the expression node the ``depth`` of the
+    ``Frame`` the local lives in and its ``slot`` there, and on the declaration the ``slot`` it stores to. The
+    outermost scope is the global one, whose names stay in ``Interpreter.globals``, so its declarations and their uses
+    get no slot here: the global table gives each name its own at run time, which the uses then cache.
+
+    Blocks that declare no function or class can't have their locals captured, so they are made flat: their locals
+    get slots in the enclosing frame and the block records no ``size``, telling the interpreter to run it without a
+    frame of its own.
+    """
+
+    def __init__(self) -> None:
         self.scopes = []
         self.currentFunction = FunctionType.NONE
         self.current_class: ClassType = ClassType.NONE
+        # The functions whose bodies are being resolved, innermost last, each with the index in ``scopes`` of the
+        # scope of its parameters.
+        self.declarations: list[tuple[Function, int]] = []
 
-    def begin_scope(self):
-        self.scopes.append({})
+    def begin_scope(self, flat: bool = False):
+        self.scopes.append(Scope(self.scopes[-1].frame if flat else None))
 
     def end_scope(self):
         self.scopes.pop()
@@ -39,12 +156,12 @@ class Resolver:
         match expr:
             case Variable(name):
                 if self.scopes and name.lexeme in self.scopes[-1] and self.scopes[-1][name.lexeme] is False:
-                    raise Exception(f"{name}, Can't read local variable in it's own initializer.")
+                    raise ResolveError(f"{name}, Can't read local variable in it's own initializer.")
 
                 self.resolve_local(expr, name)
             case Assign(name, value):
                 self.resolve(value)
-                self.resolve_local(expr, name)
+                self.impure(self.resolve_local(expr, name))
             case Literal(_):
                 pass
             case Binary(left, _, right):
@@ -66,23 +183,50 @@ class Resolver:
             case Set(_, obj, value):
                 self.resolve(value)
                 self.resolve(obj)
+                self.impure()
+            case Index(obj, index):
+                self.resolve(obj)
+                self.resolve(index)
+            case SetIndex(obj, index, value):
+                self.resolve(obj)
+                self.resolve(index)
+                self.resolve(value)
+                self.impure()
             case This(keyword):
                 if self.current_class == ClassType.NONE:
-                    raise Exception(f"Can't use 'this' outside of a class.")
+                    raise ResolveError(f"Can't use 'this' outside of a class.")
                 self.resolve_local(expr, keyword)
             case Super(keyword, _):
                 if self.current_class == ClassType.NONE:
-                    raise Exception(keyword, "Can't use 'super' outside of a class.")
+                    raise ResolveError(keyword, "Can't use 'super' outside of a class.")
                 elif self.current_class != ClassType.SUBCLASS:
-                    raise Exception(keyword, "Can't use 'super' in a class with no superclass.")
+                    raise ResolveError(keyword, "Can't use 'super' in a class with no superclass.")
 
                 self.resolve_local(expr, keyword)
 
-    def resolve_local(self, expr, name):
-        for distance, scope in enumerate(reversed(self.scopes)):
+    def resolve_local(self, expr, name) -> int:
+        """Bind ``expr`` to the local ``name``, returning the index of the scope declaring it, or 0 for a global."""
+        depth = 0
+        for index in range(len(self.scopes) - 1, 0, -1):
+            scope = self.scopes[index]
             if name.lexeme in scope:
-                self.interpreter.resolve(expr, distance)
+                expr.depth = depth
+                expr.slot = scope.slot(name.lexeme)
+                return index
+            if not scope.flat:
+                depth += 1
+        return 0
+
+    def impure(self, declared: int | None = None) -> None:
+        """
+        Mark the functions being resolved impure: all of them, as a side effect in a nested function is one of the
+        functions around it too, or, given the index in ``scopes`` of the scope declaring a variable assigned to, those
+        declared inside that scope.
+        """
+        for declaration, scope in reversed(self.declarations):
+            if declared is not None and declared >= scope:
                 return
+            declaration.pure = False
 
     def resolve_stmt(self, stmt: Stmt):
         match stmt:
@@ -90,16 +234,20 @@ class Resolver:
                 self.resolve(expression)
             case Print(expression):
                 self.resolve(expression)
+                self.impure()
             case Block(statements):
-                self.begin_scope()
+                self.begin_scope(flat=len(self.scopes) > 1 and not declares_closure(statements))
                 for s in statements:
                     self.resolve_stmt(s)
+                scope = self.scopes[-1]
+                stmt.size = None if scope.flat else scope.size
                 self.end_scope()
             case Var(name, initializer):
                 self.declare(name)
                 if initializer is not None:
                     self.resolve(initializer)
                 self.define(name)
+                stmt.slot = self.local_slot(name)
             case If(condition, thenBranch, elseBranch):
                 self.resolve(condition)
                 self.resolve(thenBranch)
@@ -108,30 +256,36 @@ class Resolver:
             case Function(name, _, _):
                 self.declare(name)
                 self.define(name)
+                stmt.slot = self.local_slot(name)
                 self.resolve_function(stmt, FunctionType.FUNCTION)
             case Return(keyword, value):
                 if self.currentFunction == FunctionType.NONE:
-                    raise Exception(f"{keyword}, Can't return from top-level code.")
+                    raise ResolveError(f"{keyword}, Can't return from top-level code.")
 
                 if value is not None:
                     if self.currentFunction == FunctionType.INITIALIZER:
-                        raise Exception(f"{value} Can't return a value from an initializer.")
+                        raise ResolveError(f"{value} Can't return a value from an initializer.")
 
                     self.resolve(value)
+                    stmt.tail = isinstance(value, Call)
             case While(condition, body):
                 self.resolve(condition)
                 self.resolve(body)
+            case Import(keyword, _):
+                if len(self.scopes) > 1:
+                    raise ResolveError(f"{keyword}, Can only import at top level.")
             case Class(name, superclass, methods):
                 exclosingClass: ClassType = self.current_class
                 self.current_class = ClassType.CLASS
 
                 self.declare(name)
                 self.define(name)
+                stmt.slot = self.local_slot(name)
 
                 if superclass:
                     self.current_class = ClassType.SUBCLASS
                     if name.lexeme == superclass.name.lexeme:
-                        raise Exception("A class can't inheir from itself.")
+                        raise ResolveError("A class can't inheir from itself.")
                     self.resolve(superclass)
 
                     self.begin_scope()
@@ -152,26 +306,49 @@ class Resolver:
                 self.current_class = exclosingClass
 
     def resolve_function(self, func: Function, type: FunctionType):
+        if func.lazy is not None:
+            scopes = [scope if isinstance(scope, ScopeView) else ScopeView(scope, len(scope)) for scope in self.scopes]
+            func.lazy.context = Context(scopes, type, self.current_class)
+            return
+
         enclosingFunction = self.currentFunction
         self.currentFunction = type
+        func.pure = type == FunctionType.FUNCTION
 
         self.begin_scope()
+        self.declarations.append((func, len(self.scopes) - 1))
         for param in func.params:
             self.declare(param)
             self.define(param)
 
         for statement in func.body:
             self.resolve_stmt(statement)
+        func.size = self.scopes[-1].size
         self.end_scope()
+        self.declarations.pop()
         self.currentFunction = enclosingFunction
 
+    def resolve_lazy_function(self, func: Function, body: list[Stmt]):
+        """Resolve ``body``, just parsed for the lazily parsed ``func``, in the scopes seen at its declaration."""
+        assert func.lazy is not None
+        context: Context = func.lazy.context
+        self.scopes = list(context.scopes)
+        self.current_class = context.current_class
+        resolved = Function(func.name, func.params, body)
+        self.resolve_function(resolved, context.function)
+        func.size, func.pure = resolved.size, resolved.pure
+
+    def local_slot(self, name: Token) -> int | None:
+        """The slot of ``name``, just declared in the innermost scope, or ``None`` when that scope is the global one."""
+        return self.scopes[-1].slot(name.lexeme) if len(self.scopes) > 1 else None
+
     def declare(self, name: Token):
         if not self.scopes:
             return
 
         scope = self.scopes[-1]
         if name.lexeme in scope:
-            raise Exception(f"{name}, Already a variable with this name in this scope.")
+            raise ResolveError(f"{name}, Already a variable with this name in this scope.")
         scope[name.lexeme] = False
 
     def define(self, name: Token):
@@ -1,11 +1,24 @@
-from typing import Final
-from plox.token import Token
-from plox.token_type import ONE_OR_MORE_CHARS, SINGLE_CHARS, TokenType
+import codecs
+import re
+import sys
+from collections.abc import Iterator
+from typing import IO, Final
+from plox.token import Token, TokenStore
+from plox.token_type import KEYWORDS, ONE_OR_MORE_CHARS, SINGLE_CHARS, TokenType
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+class ScanError(Exception):
+    """An error that stops scanning, like an unterminated comment: ``message``, found on ``line``."""
+
+    def __init__(self, message: str, line: int) -> None:
+        super().__init__(f"{message} on line: {line}")
+        self.message = message
+        self.line = line
+
+
 class Scanner:
     def __init__(self, source: str) -> None:
         self.source: Final[str] = source
@@ -77,9 +90,8 @@ class Scanner:
         while self.peek().isalnum():
             self.advance()
 
-        text = self.source[self.start : self.current]
-        type: TokenType = TokenType.IDENTIFIER if text not in TokenType else TokenType(text)
-        self.add_token(type)
+        text = sys.intern(self.source[self.start : self.current])
+        self.tokens.append(Token(KEYWORDS.get(text, TokenType.IDENTIFIER), text, None, self.line))
 
     def multi_line_comment(self) -> None:
         while self.peek() != "*" and not self.is_at_end():
@@ -91,7 +103,7 @@ class Scanner:
             self.advance()
             self.advance()
         else:
-            raise Exception("unterminated comment on line: %s", self.line)  # noqa: TRY002
+            raise ScanError("unterminated comment", self.line)
 
     def scan_token(self) -> None:
         c: str = self.advance()
@@ -129,3 +141,191 @@ class Scanner:
     def add_token(self, type: TokenType, litral: object = None) -> None:
         text = self.source[self.start : self.current]
         self.tokens.append(Token(type, text, litral, self.line))
+
+
+# Every alternative is a single top level group so ``match.lastindex`` identifies the token kind.
+_TOKEN_PATTERN: Final[re.Pattern[str]] = re.compile(
+    r"""
+    ([(){}[\],.\-+;*]|[!=<>]=?|/(?![/*]))  # 1: punctuation and operators
+    |([^\W\d_][^\W_]*)                    # 2: identifier or keyword
+    |([ \t\r]+)                           # 3: blank
+    |(\n[ \t\r\n]*)                       # 4: newlines
+    |(\d+(?:\.\d+)?)                      # 5: number
+    |("[^"]*"?)                           # 6: string, possibly unterminated
+    |(//[^\n]*)                           # 7: line comment
+    |(/\*[^*]*(?:\*/)?)                   # 8: block comment, ends at the first '*'
+    |(.)                                  # 9: anything else is skipped
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+_PUNCTUATION, _IDENTIFIER, _BLANK, _NEWLINES, _NUMBER, _STRING, _LINE_COMMENT, _BLOCK_COMMENT, _OTHER = range(1, 10)
+
+_OPERATORS: Final[dict[str, TokenType]] = {text: TokenType(text) for text in (*SINGLE_CHARS, *ONE_OR_MORE_CHARS, "/")}
+
+
+class FastScanner:
+    """
+    Table driven scanner that emits the same token stream as ``Scanner``.
+
+    A single compiled master pattern finds each lexeme and the index of the group that matched selects the token
+    kind, so the per character ``advance``/``peek`` calls of ``Scanner`` are replaced by one regex step per token.
+    """
+
+    def __init__(self, source: str) -> None:
+        self.source: Final[str] = source
+        self.tokens: Final[list[Token]] = []
+        self.line: int = 1
+        self.unterminated: bool = False
+
+    def scan_tokens(self) -> list[Token]:
+        self.scan_chunk(self.source, final=True)
+        self.tokens.append(Token(TokenType.EOF, "", None, self.line))
+        return self.tokens
+
+    def scan_chunk(self, source: str, final: bool) -> int:
+        """
+        Append the tokens of ``source`` to ``self.tokens`` and return how many characters were consumed.
+
+        Unless ``final`` is set, scanning stops before a lexeme that could still change with more input: one that
+        ends within two characters of the end of ``source`` (enough lookahead for ``12.5`` or ``==``), or an
+        unterminated string or block comment.
+        """
+        append = self.tokens.append
+        operators = _OPERATORS
+        keywords = KEYWORDS.get
+        identifier = TokenType.IDENTIFIER
+        intern = sys.intern
+        line = self.line
+        limit = len(source) if final else len(source) - 2
+
+        for m in _TOKEN_PATTERN.finditer(source):
+            if m.end() > limit:
+                self.line = line
+                return m.start()
+            kind = m.lastindex
+            if kind == _PUNCTUATION:
+                text = m.group()
+                append(Token(operators[text], text, None, line))
+            elif kind == _IDENTIFIER:
+                text = intern(m.group())
+                append(Token(keywords(text, identifier), text, None, line))
+            elif kind in (_BLANK, _LINE_COMMENT, _OTHER):
+                continue
+            elif kind == _NEWLINES:
+                line += m.group().count("\n")
+            elif kind == _NUMBER:
+                text = m.group()
+                append(Token(TokenType.NUMBER, text, float(text), line))
+            elif kind == _STRING:
+                text = m.group()
+                if len(text) < 2 or text[-1] != '"':
+                    if not final:
+                        self.line = line
+                        return m.start()
+                    line += text.count("\n")
+                    logger.error("%s unterminated string.", line)
+                    self.unterminated = True
+                    continue
+                line += text.count("\n")
+                append(Token(TokenType.STRING, text, text[1:-1], line))
+            else:
+                text = m.group()
+                if not text.endswith("*/", 2):
+                    if not final:
+                        self.line = line
+                        return m.start()
+                    raise ScanError("unterminated comment", line + text.count("\n"))
+                line += text.count("\n")
+
+        self.line = line
+        return len(source)
+
+
+class StreamScanner(FastScanner):
+    """
+    Scanner that reads its source in chunks from a text or binary file object, or an ``mmap``, and yields tokens as
+    soon as they are complete. Only the unconsumed tail of the current chunk is kept in memory.
+    """
+
+    def __init__(self, stream: IO[str] | IO[bytes], chunk_size: int = 1 << 16) -> None:
+        super().__init__("")
+        self.stream = stream
+        self.chunk_size = chunk_size
+
+    def __iter__(self) -> Iterator[Token]:
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        buffer = ""
+        final = False
+        while not final:
+            chunk = self.stream.read(self.chunk_size)
+            final = not chunk
+            if isinstance(chunk, bytes):
+                chunk = decoder.decode(chunk, final)
+            buffer += chunk
+            consumed = self.scan_chunk(buffer, final)
+            buffer = buffer[consumed:]
+            yield from self.tokens
+            self.tokens.clear()
+
+        yield Token(TokenType.EOF, "", None, self.line)
+
+    def scan_tokens(self) -> list[Token]:
+        return list(self)
+
+
+class CompactScanner(FastScanner):
+    """
+    Scanner that records type codes and source offsets in a ``TokenStore`` instead of building a ``Token`` object
+    and a lexeme string per token.
+    """
+
+    def scan_tokens(self) -> TokenStore:  # type: ignore[override]
+        source = self.source
+        store = TokenStore(source)
+        append = store.append
+        operators = _OPERATORS
+        keywords = KEYWORDS.get
+        identifier = TokenType.IDENTIFIER
+        line = self.line
+
+        for m in _TOKEN_PATTERN.finditer(source):
+            kind = m.lastindex
+            if kind == _PUNCTUATION:
+                append(operators[m.group()], m.start(), m.end(), line)
+            elif kind == _IDENTIFIER:
+                append(keywords(m.group(), identifier), m.start(), m.end(), line)
+            elif kind in (_BLANK, _LINE_COMMENT, _OTHER):
+                continue
+            elif kind == _NEWLINES:
+                line += m.group().count("\n")
+            elif kind == _NUMBER:
+                append(TokenType.NUMBER, m.start(), m.end(), line)
+            elif kind == _STRING:
+                text = m.group()
+                line += text.count("\n")
+                if len(text) < 2 or text[-1] != '"':
+                    logger.error("%s unterminated string.", line)
+                    self.unterminated = True
+                    continue
+                append(TokenType.STRING, m.start(), m.end(), line)
+            else:
+                text = m.group()
+                line += text.count("\n")
+                if not text.endswith("*/", 2):
+                    raise ScanError("unterminated comment", line)
+
+        self.line = line
+        append(TokenType.EOF, len(source), len(source), line)
+        return store
+
+
+SCANNERS: Final[dict[str, type[Scanner] | type[FastScanner]]] = {
+    "fast": FastScanner,
+    "compact": CompactScanner,
+    "legacy": Scanner,
+}
+DEFAULT_SCANNER: Final[str] = "fast"
+
+
+def scanner_for(source: str, backend: str = DEFAULT_SCANNER) -> Scanner | FastScanner:
+    return SCANNERS[backend](source)
@@ -1,10 +1,22 @@
 from dataclasses import dataclass
+from typing import Any
 from plox.expr import Expr, Variable
 from plox.token import Token
 
 
 class Stmt:
-    pass
+    # Set by ``Resolver``: the slot a local ``Var``, ``Function`` or ``Class`` declaration stores its value at, and
+    # the number of slots in the frame a ``Function`` call or ``Block`` creates. Globals get no slot and flat blocks,
+    # which run in the enclosing frame, no size. Plain attributes, like ``Expr.depth``, so not part of equality.
+    slot: int | None = None
+    size: int | None = None
+    # Also set by ``Resolver``: whether a ``Return`` returns a call as it is, so that the call can take the place of
+    # the function returning it instead of running inside it.
+    tail: bool = False
+    # And whether a ``Function`` is pure enough to be memoized: a function, not a method, whose body, including the
+    # functions declared in it, neither prints, sets a field nor assigns a variable declared outside it. Callees
+    # aren't looked at.
+    pure: bool = False
 
 
 @dataclass
@@ -40,11 +52,23 @@ class Block(Stmt):
     statements: list[Stmt]
 
 
+@dataclass(eq=False)
+class LazyBody:
+    """
+    A function body that a lazy ``Parser`` only bracket-matched: its tokens up to and including the closing '}',
+    and the resolver state at the declaration, which ``Resolver`` fills in so the body resolves as if eagerly.
+    """
+
+    tokens: list[Token]
+    context: Any = None
+
+
 @dataclass
 class Function(Stmt):
     name: Token
     params: list[Token]
     body: list[Stmt]
+    lazy: LazyBody | None = None
 
 
 @dataclass
@@ -54,6 +78,12 @@ class If(Stmt):
     elseBranch: Stmt
 
 
+@dataclass
+class Import(Stmt):
+    keyword: Token
+    path: Token
+
+
 @dataclass
 class Class(Stmt):
     name: Token
@@ -1,8 +1,13 @@
-from typing import Final
-from plox.token_type import TokenType
+from array import array
+from collections.abc import Iterator, Sequence
+import sys
+from typing import Final, overload
+from plox.token_type import KEYWORDS, TokenType
 
 
 class Token:
+    __slots__ = ("type", "lexeme", "literal", "line")
+
     def __init__(self, type: TokenType, lexeme: str, literal: object, line: int):
         self.type: Final[TokenType] = type
         self.lexeme: Final[str] = lexeme
@@ -14,3 +19,81 @@ class Token:
 
     def __repr__(self) -> str:
         return f"{self.type} {self.lexeme} {self.literal}"
+
+
+TOKEN_TYPES: Final[tuple[TokenType, ...]] = tuple(TokenType)
+TYPE_CODES: Final[dict[TokenType, int]] = {type: code for code, type in enumerate(TOKEN_TYPES)}
+NAME_CODES: Final[frozenset[int]] = frozenset(TYPE_CODES[type] for type in (TokenType.IDENTIFIER, *KEYWORDS.values()))
+
+
+class TokenStore(Sequence[Token]):
+    """
+    Struct of arrays token list: one byte of type code and three unsigned ints (start, end, line) per token. The
+    lexeme is sliced from the source, and identifiers interned, only when a ``Token`` is requested.
+
+    Materialized tokens are kept in a small direct mapped cache because ``Parser`` looks at the same few
+    positions repeatedly.
+    """
+
+    CACHE_SIZE: Final[int] = 8
+
+    def __init__(self, source: str) -> None:
+        self.source: Final[str] = source
+        self.types: Final[array[int]] = array("B")
+        self.starts: Final[array[int]] = array("I")
+        self.ends: Final[array[int]] = array("I")
+        self.lines: Final[array[int]] = array("I")
+        self.cache: Final[list[tuple[int, Token] | None]] = [None] * self.CACHE_SIZE
+
+    def append(self, type: TokenType, start: int, end: int, line: int) -> None:
+        self.types.append(TYPE_CODES[type])
+        self.starts.append(start)
+        self.ends.append(end)
+        self.lines.append(line)
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    def type(self, index: int) -> TokenType:
+        return TOKEN_TYPES[self.types[index]]
+
+    def lexeme(self, index: int) -> str:
+        text = self.source[self.starts[index] : self.ends[index]]
+        if self.types[index] in NAME_CODES:
+            return sys.intern(text)
+        return text
+
+    def token(self, index: int) -> Token:
+        code = self.types[index]
+        type = TOKEN_TYPES[code]
+        text = self.source[self.starts[index] : self.ends[index]]
+        literal: object = None
+        if code in NAME_CODES:
+            text = sys.intern(text)
+        elif type == TokenType.NUMBER:
+            literal = float(text)
+        elif type == TokenType.STRING:
+            literal = text[1:-1]
+        return Token(type, text, literal, self.lines[index])
+
+    @overload
+    def __getitem__(self, index: int) -> Token: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[Token]: ...
+
+    def __getitem__(self, index: int | slice) -> Token | list[Token]:
+        if isinstance(index, slice):
+            return [self.token(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        slot = index % self.CACHE_SIZE
+        cached = self.cache[slot]
+        if cached is not None and cached[0] == index:
+            return cached[1]
+        token = self.token(index)
+        self.cache[slot] = (index, token)
+        return token
+
+    def __iter__(self) -> Iterator[Token]:
+        return (self.token(i) for i in range(len(self)))
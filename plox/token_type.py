@@ -40,6 +40,7 @@ class TokenType(Enum):
     FUN = "fun"
     FOR = "for"
     IF = "if"
+    IMPORT = "import"
     NIL = "nil"
     OR = "or"
     PRINT = "print"
@@ -61,6 +62,8 @@ SINGLE_CHARS: tuple[str, ...] = (
     ")",
     "{",
     "}",
+    "[",
+    "]",
     ",",
     ".",
     "-",
@@ -79,6 +82,7 @@ KEYWORDS: dict[str, TokenType] = {
     "fun": TokenType.FUN,
     "for": TokenType.FOR,
     "if": TokenType.IF,
+    "import": TokenType.IMPORT,
     "nil": TokenType.NIL,
     "or": TokenType.OR,
     "print": TokenType.PRINT,
@@ -0,0 +1,738 @@
+import ast
+import dataclasses
+import keyword
+from collections.abc import Callable, Iterable
+from types import FunctionType, MethodType
+from typing import Any, Final, override
+
+from plox.environment import Environment, Frame
+from plox.expr import (
+    Assign,
+    Binary,
+    Call,
+    Expr,
+    Get,
+    Grouping,
+    Index,
+    Literal,
+    Logical,
+    Set,
+    SetIndex,
+    Super,
+    This,
+    Unary,
+    Variable,
+)
+from plox.interpreter import Interpreter
+from plox.modules import locate
+from plox.natives import NativeInstance, PloxCallable, arity_error, get_index, set_index
+from plox.resolver import declares_closure
+from plox.stmt import Block, Class, Expression, Function, If, Import, Print, Return, Stmt, Var, While
+from plox.token import Token
+from plox.token_type import TokenType
+
+
+class Instance:
+    """Base of the Python classes Lox classes are transpiled to. Lox instances take any field, so this has a dict."""
+
+    def __init__(self, *arguments: Any) -> None:
+        # Only a class without an initializer gets here.
+        if arguments:
+            raise arity_error(0, len(arguments))
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("__"):
+            raise AttributeError(name)
+        raise RuntimeError(f"{Token(TokenType.IDENTIFIER, name, None, 0)}, undefined property '{name}'.")
+
+
+MISSING: Final = object()
+NO_RETURN: Final = object()
+CALLABLES: Final[frozenset[type]] = frozenset((FunctionType, MethodType, type))
+
+
+def lox_name(function: FunctionType) -> str:
+    # Locals are renamed ``<name>_<n>``; Lox names have no underscores.
+    return function.__name__.partition("_")[0]
+
+
+def stringify(value: Any) -> str:
+    kind = type(value)
+    if kind is FunctionType:
+        return f"<fn {lox_name(value)} >"
+    if kind is MethodType:
+        return f"<fn {lox_name(value.__func__)} >"
+    if kind is type:
+        return value.__name__
+    if isinstance(value, Instance):
+        return f"{kind.__name__} instance"
+    if isinstance(value, NativeInstance):
+        return value.format(stringify)
+    return str(value)
+
+
+def arity(expected: int, parameters: tuple[Any, ...], extra: tuple[Any, ...]) -> None:
+    count = sum(parameter is not MISSING for parameter in parameters) + len(extra)
+    raise arity_error(expected, count)
+
+
+def pure(function: FunctionType) -> FunctionType:
+    function.pure = True  # type: ignore[attr-defined]
+    return function
+
+
+class PythonFunction(PloxCallable):
+    """A transpiled Lox function as a ``PloxCallable``, for ``memoize``."""
+
+    def __init__(self, function: FunctionType) -> None:
+        self.function = function
+
+    @override
+    def arity(self) -> int:
+        return self.function.__code__.co_argcount
+
+    @override
+    def call(self, interpreter: Interpreter, arguments: list[Any]) -> Any:
+        return self.function(*arguments)
+
+    @override
+    def __str__(self) -> str:
+        return stringify(self.function)
+
+
+def only_instances(name: Token) -> Any:
+    raise RuntimeError(name, "Only instances have properties.")
+
+
+def native_property(value: Any, name: Token) -> Any:
+    if isinstance(value, NativeInstance):
+        return value.lookup(name)
+    return only_instances(name)
+
+
+def only_fields(name: Token) -> Any:
+    raise RuntimeError(name, "Only instances have fields.")
+
+
+def division_by_zero() -> Any:
+    raise ValueError("Division by zero")
+
+
+def set_field(instance: Instance, name: str, value: Any) -> Any:
+    setattr(instance, name, value)
+    return value
+
+
+def find_method(klass: type, name: str) -> FunctionType | None:
+    for base in klass.__mro__:
+        method = base.__dict__.get(name)
+        if type(method) is FunctionType:
+            return method
+    return None
+
+
+def super_method(superclass: type, instance: Instance, method: Token) -> MethodType:
+    function = find_method(superclass, method.lexeme)
+    if function is None:
+        raise RuntimeError(method, f"Undefined property'{method.lexeme}'.")
+    return MethodType(function, instance)
+
+
+def inherit(superclass: Any, name: Token) -> type:
+    if not (type(superclass) is type and issubclass(superclass, Instance)):
+        raise RuntimeError(name, "Superclass must be a class.")
+    return superclass
+
+
+def make_class(name: str, superclass: type | None, methods: dict[str, FunctionType], fields: tuple[str, ...]) -> type:
+    """
+    The Python class for a Lox class. Fields its methods assign to ``this`` get ``__slots__``, unless a method of
+    the class or a superclass has the same name: a field shadows a method only once it is set, which a slot,
+    found on the class before the method, would not do.
+    """
+    base = superclass or Instance
+    taken = set(methods)
+    for klass in base.__mro__:
+        taken.update(klass.__dict__)
+    namespace: dict[str, Any] = {"__slots__": tuple(field for field in fields if field not in taken), **methods}
+
+    initializer = methods.get("init")
+    if initializer is not None:
+
+        def __init__(self: Instance, *arguments: Any) -> None:
+            initializer(self, *arguments)
+
+        namespace["__init__"] = __init__
+    return type(name, (base,), namespace)
+
+
+def this_fields(methods: list[Function]) -> tuple[str, ...]:
+    """The names of the fields ``methods`` assign to ``this``, in order of appearance."""
+    fields: dict[str, None] = {}
+
+    def walk(node: Any) -> None:
+        if isinstance(node, Set) and isinstance(node.obj, This):
+            fields[node.name.lexeme] = None
+        for field in dataclasses.fields(node):
+            value = getattr(node, field.name)
+            for item in value if isinstance(value, list) else [value]:
+                if isinstance(item, Expr | Stmt):
+                    walk(item)
+
+    for method in methods:
+        for statement in method.body:
+            walk(statement)
+    return tuple(fields)
+
+
+def returns(statements: list[Stmt]) -> bool:
+    """Whether a ``return`` in ``statements``, outside of the functions declared there, may run."""
+    for statement in statements:
+        match statement:
+            case Return():
+                return True
+            case Block(body) if returns(body):
+                return True
+            case If(_, thenBranch, elseBranch) if returns([thenBranch]) or (
+                elseBranch is not None and returns([elseBranch])
+            ):
+                return True
+            case While(_, body) if returns([body]):
+                return True
+    return False
+
+
+def is_boolean(expr: Expr) -> bool:
+    """Whether ``expr`` always evaluates to a bool, whose Python truthiness is then its Lox truthiness."""
+    match expr:
+        case Literal(value):
+            return type(value) is bool
+        case Grouping(expression):
+            return is_boolean(expression)
+        case Unary(operator, _):
+            return operator.type == TokenType.BANG
+        case Binary(_, operator, _):
+            return operator.type in COMPARISONS
+        case Logical(left, _, right):
+            return is_boolean(left) and is_boolean(right)
+    return False
+
+
+def is_identifier(name: str) -> bool:
+    """Whether the Lox name can be used as a Python name as it is."""
+    return not keyword.iskeyword(name)
+
+
+ARITHMETIC: Final[dict[TokenType, type[ast.operator]]] = {
+    TokenType.PLUS: ast.Add,
+    TokenType.MINUS: ast.Sub,
+    TokenType.STAR: ast.Mult,
+}
+COMPARISONS: Final[dict[TokenType, type[ast.cmpop] | None]] = {
+    TokenType.LESS: ast.Lt,
+    TokenType.LESS_EQUAL: ast.LtE,
+    TokenType.GREATER: ast.Gt,
+    TokenType.GREATER_EQUAL: ast.GtE,
+    TokenType.EQUAL_EQUAL: None,
+    TokenType.BANG_EQUAL: None,
+}
+
+
+def name(id: str) -> ast.Name:
+    return ast.Name(id, ast.Load())
+
+
+def call(function: str | ast.expr, *arguments: ast.expr) -> ast.Call:
+    return ast.Call(name(function) if isinstance(function, str) else function, list(arguments), [])
+
+
+def walrus(target: str, value: ast.expr) -> ast.NamedExpr:
+    return ast.NamedExpr(ast.Name(target, ast.Store()), value)
+
+
+def identical(left: ast.expr, right: ast.expr, negate: bool = False) -> ast.Compare:
+    return ast.Compare(left, [ast.IsNot() if negate else ast.Is()], [right])
+
+
+class Unit:
+    """A Python function being generated: the transpiled script, a Lox function or method, or a loop body."""
+
+    def __init__(self, enclosing: "Unit | None", this: str | None = None) -> None:
+        self.enclosing = enclosing
+        self.globals: set[str] = set()
+        self.nonlocals: set[str] = set()
+        self.loops = 0
+        # In an initializer, the name of ``this``, which every return returns.
+        self.this = this
+
+    def declarations(self) -> list[ast.stmt]:
+        declarations: list[ast.stmt] = []
+        if self.globals:
+            declarations.append(ast.Global(sorted(self.globals)))
+        if self.nonlocals:
+            declarations.append(ast.Nonlocal(sorted(self.nonlocals)))
+        return declarations
+
+
+class Transpiler:
+    """
+    Translates resolved statements to a Python ``ast.Module`` that defines one function, ``SCRIPT``, whose
+    parameters are the runtime helpers and the constants that can't be Python literals, like tokens for error
+    messages. Calling it runs the statements.
+
+    Lox globals are the Python globals of the generated code. Locals become Python locals, with a fresh name for
+    every declaration so that shadowing and the resolver's scoping carry over as they are, and Python's own cells
+    handle closures. A block in a loop body that declares a closure is turned into a function that is called on
+    every iteration, as each iteration needs new variables for its closures to capture.
+
+    Truthiness, equality, calls, property access and the errors of the tree-walking ``Interpreter`` are kept by
+    inlined checks and small helpers; where a value is known to be a bool, like that of a comparison, Python's own
+    truthiness is used directly.
+    """
+
+    SCRIPT: Final[str] = "_script"
+
+    def __init__(self, interpreter: Interpreter | None = None) -> None:
+        self.interpreter = interpreter
+        self.unit = Unit(None)
+        self.frames: list[tuple[Unit, dict[int, str]]] = []
+        self.constants: list[Any] = []
+        self.counter = 0
+
+    def transpile(self, statements: list[Stmt], helpers: Iterable[str]) -> tuple[ast.Module, list[Any]]:
+        """The module defining ``SCRIPT``, which takes ``helpers`` and then the constants returned along with it."""
+        body = self.statements(statements)
+        parameters = [*helpers, *(f"_k{index}" for index in range(len(self.constants)))]
+        script = ast.FunctionDef(
+            self.SCRIPT,
+            ast.arguments([], [ast.arg(parameter) for parameter in parameters], None, [], [], None, []),
+            [*self.unit.declarations(), *body] or [ast.Pass()],
+            [],
+        )
+        module = ast.Module([script], [])
+        ast.fix_missing_locations(module)
+        return module, self.constants
+
+    def fresh(self, prefix: str) -> str:
+        self.counter += 1
+        return f"{prefix}_{self.counter}"
+
+    def constant(self, value: Any) -> ast.Name:
+        self.constants.append(value)
+        return name(f"_k{len(self.constants) - 1}")
+
+    def local(self, depth: int, slot: int, store: bool = False) -> str:
+        unit, names = self.frames[-1 - depth]
+        local = names[slot]
+        if store and unit is not self.unit:
+            self.unit.nonlocals.add(local)
+        return local
+
+    def load(self, expr: Expr, token: Token) -> ast.expr:
+        if expr.depth is not None:
+            return name(self.local(expr.depth, expr.slot))
+        if not is_identifier(token.lexeme):
+            return call("_global", ast.Constant(token.lexeme))
+        return name(token.lexeme)
+
+    def store(self, expr: Expr, token: Token, value: ast.expr) -> ast.expr:
+        """An assignment of ``value`` as an expression, which raises when the variable is an undefined global."""
+        if expr.depth is not None:
+            return walrus(self.local(expr.depth, expr.slot, store=True), value)
+        if not is_identifier(token.lexeme):
+            return call("_assign_global", ast.Constant(token.lexeme), value)
+        # Reading the global after the value is evaluated raises NameError when it isn't defined.
+        self.unit.globals.add(token.lexeme)
+        checked = ast.Subscript(ast.Tuple([value, name(token.lexeme)], ast.Load()), ast.Constant(0), ast.Load())
+        return walrus(token.lexeme, checked)
+
+    def assign(self, target: str, value: ast.expr) -> ast.stmt:
+        return ast.Assign([ast.Name(target, ast.Store())], value)
+
+    def declare(self, declaration: Stmt, token: Token) -> str | None:
+        """The Python name ``declaration`` binds, or ``None`` for a global whose name is a Python keyword."""
+        if declaration.slot is not None:
+            local = self.fresh(token.lexeme)
+            _, names = self.frames[-1]
+            names[declaration.slot] = local
+            return local
+        if not is_identifier(token.lexeme):
+            return None
+        self.unit.globals.add(token.lexeme)
+        return token.lexeme
+
+    def define(self, declaration: Stmt, token: Token, value: ast.expr) -> ast.stmt:
+        return self.bind(self.declare(declaration, token), token, value)
+
+    def bind(self, target: str | None, token: Token, value: ast.expr) -> ast.stmt:
+        """Stores ``value`` at what ``declare`` returned for the declaration of ``token``."""
+        if target is None:
+            return ast.Expr(call("_define_global", ast.Constant(token.lexeme), value))
+        return self.assign(target, value)
+
+    def statements(self, statements: list[Stmt]) -> list[ast.stmt]:
+        return [translated for statement in statements for translated in self.statement(statement)]
+
+    def statement(self, stmt: Stmt) -> list[ast.stmt]:
+        match stmt:
+            case Expression(Assign(token, value) as assign) if assign.depth is not None:
+                return [self.assign(self.local(assign.depth, assign.slot, store=True), self.expression(value))]
+            case Expression(Set(token, obj, value)):
+                if isinstance(obj, This):
+                    target = self.expression(obj)
+                    return [ast.Assign([ast.Attribute(target, token.lexeme, ast.Store())], self.expression(value))]
+                # Python evaluates the value of an attribute assignment first, Lox the object.
+                instance = self.fresh("_o")
+                return [
+                    self.assign(instance, self.instance(obj, "_only_fields", token)),
+                    ast.Assign([ast.Attribute(name(instance), token.lexeme, ast.Store())], self.expression(value)),
+                ]
+            case Expression(expression):
+                return [ast.Expr(self.expression(expression))]
+            case Print(expression):
+                return [ast.Expr(call("_print", self.expression(expression)))]
+            case Var(token, initializer):
+                value = self.expression(initializer) if initializer is not None else ast.Constant(None)
+                return [self.define(stmt, token, value)]
+            case Block():
+                return self.block(stmt)
+            case If(condition, thenBranch, elseBranch):
+                otherwise = self.statement(elseBranch) if elseBranch is not None else []
+                return [ast.If(self.truthy(condition), self.statement(thenBranch) or [ast.Pass()], otherwise)]
+            case While(condition, body):
+                test = self.truthy(condition)
+                self.unit.loops += 1
+                translated = self.statement(body) or [ast.Pass()]
+                self.unit.loops -= 1
+                return [ast.While(test, translated, [])]
+            case Function(token, _, _):
+                target = self.declare(stmt, token)
+                function = self.function(stmt, target or self.fresh(token.lexeme))
+                if target is None:
+                    return [function, ast.Expr(call("_define_global", ast.Constant(token.lexeme), name(function.name)))]
+                return [function]
+            case Return(_, value):
+                if self.unit.this is not None:
+                    return [ast.Return(name(self.unit.this))]
+                return [ast.Return(self.expression(value) if value is not None else ast.Constant(None))]
+            case Import(_, path):
+                return [ast.Expr(call("_import", ast.Constant(path.literal)))]
+            case Class():
+                return self.klass(stmt)
+            case _:
+                raise ValueError("Unknown statement type")
+
+    def block(self, stmt: Block) -> list[ast.stmt]:
+        if stmt.size is None:
+            return self.statements(stmt.statements)
+        if not (self.unit.loops and declares_closure(stmt.statements)):
+            self.frames.append((self.unit, {}))
+            translated = self.statements(stmt.statements)
+            self.frames.pop()
+            return translated
+
+        enclosing = self.unit
+        unit = self.unit = Unit(enclosing, enclosing.this)
+        self.frames.append((unit, {}))
+        body = self.statements(stmt.statements)
+        self.frames.pop()
+        self.unit = enclosing
+
+        function = self.fresh("_block")
+        body = [*unit.declarations(), *body, ast.Return(name("_NO_RETURN"))]
+        definition = ast.FunctionDef(function, ast.arguments([], [], None, [], [], None, []), body, [])
+        if not returns(stmt.statements):
+            return [definition, ast.Expr(call(function))]
+        result = self.fresh("_r")
+        test = identical(walrus(result, call(function)), name("_NO_RETURN"), negate=True)
+        return [definition, ast.If(test, [ast.Return(name(result))], [])]
+
+    def function(self, declaration: Function, target: str, this: str | None = None) -> ast.FunctionDef:
+        if declaration.lazy is not None:
+            # Python compiles a function with the ones it contains, so a lazy body can't wait for a call here.
+            assert self.interpreter is not None
+            self.interpreter.compile_function(declaration)
+
+        enclosing = self.unit
+        is_initializer = this is not None and declaration.name.lexeme == "init"
+        unit = self.unit = Unit(enclosing, this if is_initializer else None)
+        if this is not None:
+            self.frames.append((unit, {0: this}))
+        parameters = {index: self.fresh(param.lexeme) for index, param in enumerate(declaration.params)}
+        self.frames.append((unit, dict(parameters)))
+        body = self.statements(declaration.body)
+        self.frames.pop()
+        if this is not None:
+            self.frames.pop()
+        self.unit = enclosing
+
+        prologue: list[ast.stmt] = list(unit.declarations())
+        # Missing arguments are left at MISSING, and the last one is enough to tell; extra ones end up in _extra.
+        wrong: ast.expr = name("_extra")
+        if parameters:
+            last = name(parameters[len(parameters) - 1])
+            wrong = ast.BoolOp(ast.Or(), [wrong, identical(last, name("_MISSING"))])
+        received = ast.Tuple([name(local) for local in parameters.values()], ast.Load())
+        count = call("_arity", ast.Constant(len(parameters)), received, name("_extra"))
+        prologue.append(ast.If(wrong, [ast.Expr(count)], []))
+        if is_initializer:
+            body.append(ast.Return(name(this)))
+
+        arguments = ast.arguments(
+            [],
+            [*([ast.arg(this)] if this is not None else []), *(ast.arg(local) for local in parameters.values())],
+            ast.arg("_extra"),
+            [],
+            [],
+            None,
+            [name("_MISSING") for _ in parameters],
+        )
+        # Pure functions are marked for ``memoize``, which has no declaration to look at.
+        decorators = [name("_pure")] if declaration.pure else []
+        return ast.FunctionDef(target, arguments, [*prologue, *body] or [ast.Pass()], decorators)
+
+    def klass(self, stmt: Class) -> list[ast.stmt]:
+        translated: list[ast.stmt] = []
+        # Declared first, as the methods may refer to the class.
+        target = self.declare(stmt, stmt.name)
+        superclass: ast.expr = ast.Constant(None)
+        if stmt.superclass is not None:
+            local = self.fresh("super")
+            token = stmt.superclass.name
+            value = call("_inherit", self.load(stmt.superclass, token), self.constant(token))
+            translated.append(self.assign(local, value))
+            self.frames.append((self.unit, {0: local}))
+            superclass = name(local)
+
+        methods: dict[str, str] = {}
+        for method in stmt.methods:
+            function = self.function(method, self.fresh(method.name.lexeme), this=self.fresh("this"))
+            translated.append(function)
+            methods[method.name.lexeme] = function.name
+        if stmt.superclass is not None:
+            self.frames.pop()
+
+        value = call(
+            "_class",
+            ast.Constant(stmt.name.lexeme),
+            superclass,
+            ast.Dict([ast.Constant(method) for method in methods], [name(function) for function in methods.values()]),
+            ast.Constant(this_fields(stmt.methods)),
+        )
+        translated.append(self.bind(target, stmt.name, value))
+        return translated
+
+    def truthy(self, expr: Expr) -> ast.expr:
+        """A Python condition that holds when ``expr`` is truthy in Lox: neither nil nor false."""
+        if is_boolean(expr):
+            return self.expression(expr)
+        return self.truthy_name(self.fresh("_t"), self.expression(expr))
+
+    def truthy_name(self, value: str, expr: ast.expr) -> ast.expr:
+        """The Lox truthiness of ``expr``, which is also assigned to the local ``value``."""
+        return ast.BoolOp(
+            ast.And(),
+            [
+                identical(walrus(value, expr), ast.Constant(None), negate=True),
+                identical(name(value), ast.Constant(False), negate=True),
+            ],
+        )
+
+    def instance(self, obj: Expr, error: str, token: Token) -> ast.expr:
+        """``obj``, checked to be an instance; ``error`` raises the error for ``token`` when it isn't."""
+        if isinstance(obj, This):
+            return self.expression(obj)
+        value = self.fresh("_o")
+        test = call("_isinstance", walrus(value, self.expression(obj)), name("_Instance"))
+        return ast.IfExp(test, name(value), call(error, self.constant(token)))
+
+    def expression(self, expr: Expr) -> ast.expr:
+        match expr:
+            case Literal(value):
+                return ast.Constant(value)
+            case Grouping(expression):
+                return self.expression(expression)
+            case Unary(operator, right):
+                match operator.type:
+                    case TokenType.MINUS:
+                        return ast.UnaryOp(ast.USub(), self.expression(right))
+                    case TokenType.BANG:
+                        return ast.UnaryOp(ast.Not(), self.truthy(right))
+                raise ValueError(f"Unknown unary operator {operator.lexeme}")
+            case Binary(left, operator, right):
+                return self.binary(left, operator, right)
+            case Logical(left, operator, right):
+                if is_boolean(left):
+                    op = ast.Or() if operator.type == TokenType.OR else ast.And()
+                    return ast.BoolOp(op, [self.expression(left), self.expression(right)])
+                value = self.fresh("_t")
+                test = self.truthy_name(value, self.expression(left))
+                if operator.type == TokenType.OR:
+                    return ast.IfExp(test, name(value), self.expression(right))
+                return ast.IfExp(test, self.expression(right), name(value))
+            case Variable(token) | This(token):
+                return self.load(expr, token)
+            case Assign(token, value):
+                return self.store(expr, token, self.expression(value))
+            case Call(callee, _, arguments):
+                # Lox functions, bound methods and classes are called as they are, natives through an adapter.
+                function = self.fresh("_c")
+                kind = call("_type", walrus(function, self.expression(callee)))
+                test = ast.Compare(kind, [ast.In()], [name("_CALLABLES")])
+                checked = ast.IfExp(test, name(function), call("_callable", name(function)))
+                return ast.Call(checked, [self.expression(argument) for argument in arguments], [])
+            case Get(token, obj):
+                if isinstance(obj, This):
+                    return ast.Attribute(self.expression(obj), token.lexeme, ast.Load())
+                # Anything but a Lox instance is a native one or an error, which ``_native_property`` tells apart.
+                value = self.fresh("_o")
+                test = call("_isinstance", walrus(value, self.expression(obj)), name("_Instance"))
+                attribute = ast.Attribute(name(value), token.lexeme, ast.Load())
+                return ast.IfExp(test, attribute, call("_native_property", name(value), self.constant(token)))
+            case Set(token, obj, value):
+                instance = self.instance(obj, "_only_fields", token)
+                return call("_set_field", instance, ast.Constant(token.lexeme), self.expression(value))
+            case Index(obj, index):
+                return call("_get_index", self.expression(obj), self.expression(index))
+            case SetIndex(obj, index, value):
+                return call("_set_index", self.expression(obj), self.expression(index), self.expression(value))
+            case Super(_, method):
+                assert expr.depth is not None
+                superclass = self.local(expr.depth, expr.slot)
+                this = self.local(expr.depth - 1, 0)
+                return call("_super", name(superclass), name(this), self.constant(method))
+            case _:
+                raise ValueError("Unknown expression type")
+
+    def binary(self, left: Expr, operator: Token, right: Expr) -> ast.expr:
+        kind = operator.type
+        if kind in ARITHMETIC:
+            return ast.BinOp(self.expression(left), ARITHMETIC[kind](), self.expression(right))
+        if kind == TokenType.SLASH:
+            if isinstance(right, Literal) and type(right.value) is float and right.value != 0:
+                return ast.BinOp(self.expression(left), ast.Div(), self.expression(right))
+            # ``Interpreter.binary`` raises its own error for a zero divisor, checked after both operands.
+            dividend = self.expression(left)
+            divisor = self.fresh("_d")
+            test = ast.Compare(walrus(divisor, self.expression(right)), [ast.NotEq()], [ast.Constant(0)])
+            return ast.BinOp(dividend, ast.Div(), ast.IfExp(test, name(divisor), call("_division_by_zero")))
+        if kind in (TokenType.EQUAL_EQUAL, TokenType.BANG_EQUAL):
+            # Values of different types are never equal, even where Python says True == 1.0.
+            first, second = self.fresh("_l"), self.fresh("_r")
+            same_type = identical(
+                call("_type", walrus(first, self.expression(left))),
+                call("_type", walrus(second, self.expression(right))),
+            )
+            equal = ast.BoolOp(ast.And(), [same_type, ast.Compare(name(first), [ast.Eq()], [name(second)])])
+            return equal if kind == TokenType.EQUAL_EQUAL else ast.UnaryOp(ast.Not(), equal)
+        comparison = COMPARISONS.get(kind)
+        if comparison is None:
+            raise ValueError(f"Unknown operator {operator.lexeme}")
+        return ast.Compare(self.expression(left), [comparison()], [self.expression(right)])
+
+
+def helpers(interpreter: Interpreter) -> dict[str, Any]:
+    """The runtime helpers transpiled code refers to, by the names ``Transpiler`` generates."""
+    values = interpreter.globals.values
+
+    def callable_(value: Any) -> Callable[..., Any]:
+        if isinstance(value, PloxCallable):
+
+            def call(*arguments: Any) -> Any:
+                if len(arguments) != value.arity():
+                    raise arity_error(value.arity(), len(arguments))
+                return value.call(interpreter, list(arguments))
+
+            return call
+        raise RuntimeError("Can only call functions and classes.")
+
+    def print_(value: Any) -> None:
+        print(stringify(value))
+
+    def import_(path: str) -> None:
+        interpreter.import_module(locate(interpreter.module, path))
+
+    def global_(lexeme: str) -> Any:
+        if lexeme not in values:
+            raise RuntimeError("Undefined variable '" + lexeme + "'.")
+        return values[lexeme]
+
+    def define_global(lexeme: str, value: Any) -> None:
+        values[lexeme] = value
+
+    def assign_global(lexeme: str, value: Any) -> Any:
+        global_(lexeme)
+        values[lexeme] = value
+        return value
+
+    return {
+        "_print": print_,
+        "_type": type,
+        "_isinstance": isinstance,
+        "_Instance": Instance,
+        "_CALLABLES": CALLABLES,
+        "_callable": callable_,
+        "_MISSING": MISSING,
+        "_NO_RETURN": NO_RETURN,
+        "_arity": arity,
+        "_pure": pure,
+        "_native_property": native_property,
+        "_get_index": get_index,
+        "_set_index": set_index,
+        "_only_fields": only_fields,
+        "_division_by_zero": division_by_zero,
+        "_set_field": set_field,
+        "_super": super_method,
+        "_inherit": inherit,
+        "_class": make_class,
+        "_import": import_,
+        "_global": global_,
+        "_define_global": define_global,
+        "_assign_global": assign_global,
+    }
+
+
+class PythonInterpreter(Interpreter):
+    """
+    Runs programs by transpiling them with ``Transpiler`` and executing the result as CPython bytecode. Each
+    top-level statement and module body is transpiled as it is about to run.
+    """
+
+    # Transpiled code runs with the dict of a plain ``Environment`` as its Python globals.
+    globals_type = Environment
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.helpers: Final[dict[str, Any]] = helpers(self)
+        # Lox globals are the globals of transpiled code, which must not fall back to Python's builtins.
+        self.globals.values["__builtins__"] = {}
+
+    @override
+    def apply(self, callee: Any, arguments: list[Any]) -> Any:
+        if type(callee) in CALLABLES:
+            return callee(*arguments)
+        return super().apply(callee, arguments)
+
+    @override
+    def memoizable(self, value: Any) -> PloxCallable | None:
+        return PythonFunction(value) if type(value) is FunctionType and getattr(value, "pure", False) else None
+
+    def run(self, statements: list[Stmt]) -> None:
+        module, constants = Transpiler(self).transpile(statements, self.helpers)
+        namespace: dict[str, Any] = self.globals.values
+        exec(compile(module, self.module or "<script>", "exec"), namespace)
+        script = namespace.pop(Transpiler.SCRIPT)
+        try:
+            script(*self.helpers.values(), *constants)
+        except NameError as e:
+            raise RuntimeError("Undefined variable '" + str(e.name) + "'.") from None
+
+    @override
+    def execute(self, stmt: Stmt):
+        self.run([stmt])
+
+    @override
+    def executeBlock(self, statements: list[Stmt], environment: Environment | Frame):
+        # Only module bodies get here, and they run, like any top-level code, on the globals.
+        assert environment is self.globals
+        self.run(statements)
@@ -0,0 +1,453 @@
+from typing import Any, Final, override
+
+from plox.bytecode import (
+    ADD,
+    ADD_CONSTANT,
+    AND,
+    CALL,
+    CALLABLE,
+    CLASS,
+    CLOSURE,
+    CONSTANT,
+    DECLARE_LOCAL,
+    DEFINE_CELL,
+    DEFINE_GLOBAL,
+    DEFINE_LOCAL,
+    DIVIDE,
+    EQUAL,
+    GET_CELL,
+    GET_GLOBAL,
+    GET_LOCAL,
+    GET_PROPERTY,
+    GET_SUPER,
+    GET_UPVALUE,
+    GREATER,
+    GREATER_EQUAL,
+    IMPORT,
+    INDEX,
+    INHERIT,
+    INSTANCE,
+    INVOKE,
+    JUMP,
+    JUMP_IF_FALSE,
+    LESS,
+    LESS_CONSTANT,
+    LESS_EQUAL,
+    MAKE_CELL,
+    METHOD,
+    MULTIPLY,
+    NEGATE,
+    NOT,
+    NOT_EQUAL,
+    OR,
+    POP,
+    PRINT,
+    RETURN,
+    SET_CELL,
+    SET_GLOBAL,
+    SET_INDEX,
+    SET_LOCAL,
+    SET_PROPERTY,
+    SET_UPVALUE,
+    STORE_CELL,
+    STORE_GLOBAL,
+    STORE_LOCAL,
+    STORE_UPVALUE,
+    SUBTRACT,
+    SUBTRACT_CONSTANT,
+    Compiler,
+    FunctionProto,
+)
+from plox.environment import Environment, Frame
+from plox.interpreter import Interpreter, PloxClass, PloxInstance
+from plox.modules import locate
+from plox.natives import NativeInstance, PloxCallable, arity_error, get_index, set_index
+from plox.stmt import Stmt
+from plox.token import Token
+
+
+class Cell:
+    """A local captured by a closure, shared by the frame that declared it and every closure that captured it."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any = None) -> None:
+        self.value = value
+
+
+class VMClosure(PloxCallable):
+    def __init__(self, proto: FunctionProto, upvalues: list[Cell]) -> None:
+        self.proto = proto
+        self.upvalues = upvalues
+
+    @override
+    def arity(self) -> int:
+        return self.proto.arity
+
+    @override
+    def call(self, interpreter: Interpreter, arguments: list[Any]) -> Any:
+        assert isinstance(interpreter, VMInterpreter)
+        return interpreter.vm.run(self, locals_for(self.proto, arguments))
+
+    @override
+    def __str__(self) -> str:
+        return str(self.proto)
+
+
+class BoundMethod(PloxCallable):
+    def __init__(self, receiver: PloxInstance, method: VMClosure) -> None:
+        self.receiver = receiver
+        self.method = method
+
+    @override
+    def arity(self) -> int:
+        return self.method.arity()
+
+    @override
+    def call(self, interpreter: Interpreter, arguments: list[Any]) -> Any:
+        assert isinstance(interpreter, VMInterpreter)
+        return interpreter.vm.run(self.method, locals_for(self.method.proto, arguments, self.receiver))
+
+    @override
+    def __str__(self) -> str:
+        return str(self.method)
+
+
+class VMClass(PloxClass):
+    @override
+    def call(self, interpreter: Interpreter, arguments: list[Any]) -> Any:
+        instance = VMInstance(self)
+        initializer = self.initializer
+        if initializer is not None:
+            BoundMethod(instance, initializer).call(interpreter, arguments)
+        elif arguments:
+            raise arity_error(0, len(arguments))
+        return instance
+
+
+class VMInstance(PloxInstance):
+    __slots__ = ()
+
+    @override
+    def get(self, name: Token) -> Any:
+        slot = self.shape.slots.get(name.lexeme)
+        if slot is not None:
+            return self.values[slot]
+
+        method = self.klass.find_method(name.lexeme)
+        if method:
+            return BoundMethod(self, method)
+
+        raise RuntimeError(f"{name}, undefined property '{name.lexeme}'.")
+
+
+def locals_for(proto: FunctionProto, arguments: list[Any], *receiver: PloxInstance) -> list[Any]:
+    """The locals of a call to ``proto``: the receiver of a method, the arguments and room for the other locals."""
+    if len(arguments) != proto.arity:
+        raise arity_error(proto.arity, len(arguments))
+    values = [*receiver, *arguments, *proto.padding]
+    for index in proto.cells:
+        values[index] = Cell(values[index])
+    return values
+
+
+class VM:
+    """
+    Runs ``FunctionProto``s on an operand stack. Calls between Lox functions, methods and classes push a frame onto
+    the VM's own call stack instead of recursing in Python; other callables, like natives, are called through
+    ``PloxCallable.call``, which may in turn ``run`` Lox code on a fresh stack.
+
+    Values behave exactly as they do in the tree-walking ``Interpreter``, and errors are raised at the same points
+    and with the same messages.
+    """
+
+    def __init__(self, interpreter: "VMInterpreter") -> None:
+        self.interpreter = interpreter
+        self.globals: Final[dict[str, Any]] = interpreter.globals.values
+
+    def run(self, closure: VMClosure, locals_: list[Any]) -> Any:
+        interpreter = self.interpreter
+        globals_ = self.globals
+        stack: list[Any] = []
+        push = stack.append
+        pop = stack.pop
+        frames: list[tuple[Any, ...]] = []
+        proto = closure.proto
+        code, constants, upvalues = proto.code, proto.constants, closure.upvalues
+        ip = 0
+
+        while True:
+            op = code[ip]
+            arg = code[ip + 1]
+            ip += 2
+
+            if op == GET_LOCAL:
+                push(locals_[arg])
+            elif op == CONSTANT:
+                push(constants[arg])
+            elif op == GET_GLOBAL:
+                name = constants[arg]
+                try:
+                    push(globals_[name.lexeme])
+                except KeyError:
+                    raise RuntimeError("Undefined variable '" + name.lexeme + "'.") from None
+            elif op == JUMP_IF_FALSE:
+                value = pop()
+                if value is None or value is False:
+                    ip = arg
+            elif op == ADD_CONSTANT:
+                stack[-1] = stack[-1] + constants[arg]
+            elif op == LESS_CONSTANT:
+                stack[-1] = stack[-1] < constants[arg]
+            elif op in (STORE_LOCAL, DEFINE_LOCAL):
+                locals_[arg] = pop()
+            elif op == JUMP:
+                ip = arg
+            elif op == ADD:
+                right = pop()
+                stack[-1] = stack[-1] + right
+            elif op == SUBTRACT_CONSTANT:
+                stack[-1] = stack[-1] - constants[arg]
+            elif op == SUBTRACT:
+                right = pop()
+                stack[-1] = stack[-1] - right
+            elif op == LESS:
+                right = pop()
+                stack[-1] = stack[-1] < right
+            elif op == STORE_GLOBAL:
+                name = constants[arg]
+                if name.lexeme not in globals_:
+                    raise RuntimeError("Undefined variable '" + name.lexeme + "'.")
+                globals_[name.lexeme] = pop()
+            elif op == SET_LOCAL:
+                locals_[arg] = stack[-1]
+            elif op == POP:
+                pop()
+            elif op in (CALL, INVOKE):
+                if op == INVOKE:
+                    argc = arg & 0xFF
+                    name = constants[arg >> 8]
+                    receiver = stack[-argc - 1]
+                    method = None
+                    if not isinstance(receiver, PloxInstance):
+                        if not isinstance(receiver, NativeInstance):
+                            raise RuntimeError(name, "Only instances have properties.")
+                        callee = stack[-argc - 1] = receiver.lookup(name)
+                    elif (slot := receiver.shape.slots.get(name.lexeme)) is not None:
+                        callee = stack[-argc - 1] = receiver.values[slot]
+                    else:
+                        method = receiver.klass.find_method(name.lexeme)
+                        if not method:
+                            raise RuntimeError(f"{name}, undefined property '{name.lexeme}'.")
+                        callee = method
+                else:
+                    argc = arg
+                    callee = stack[-argc - 1]
+                    method = None
+                if method is None and type(callee) is BoundMethod:
+                    receiver, method = callee.receiver, callee.method
+
+                if method is not None or type(callee) is VMClosure:
+                    function = callee if method is None else method
+                    callee_proto = function.proto
+                    arity = callee_proto.arity
+                    if argc != arity:
+                        raise arity_error(arity, argc)
+                    arguments = stack[len(stack) - argc :]
+                    del stack[len(stack) - argc - 1 :]
+                    frames.append((code, constants, upvalues, locals_, ip))
+                    if method is None:
+                        locals_ = arguments + callee_proto.padding
+                    else:
+                        locals_ = [receiver, *arguments, *callee_proto.padding]
+                    for index in callee_proto.cells:
+                        locals_[index] = Cell(locals_[index])
+                    code, constants, upvalues = callee_proto.code, callee_proto.constants, function.upvalues
+                    ip = 0
+                elif type(callee) is VMClass:
+                    instance = VMInstance(callee)
+                    initializer = callee.initializer
+                    if initializer is None:
+                        if argc:
+                            raise arity_error(0, argc)
+                        del stack[len(stack) - argc :]
+                        stack[-1] = instance
+                        continue
+                    arguments = stack[len(stack) - argc :]
+                    del stack[len(stack) - argc - 1 :]
+                    frames.append((code, constants, upvalues, locals_, ip))
+                    callee_proto = initializer.proto
+                    locals_ = locals_for(callee_proto, arguments, instance)
+                    code, constants, upvalues = callee_proto.code, callee_proto.constants, initializer.upvalues
+                    ip = 0
+                elif isinstance(callee, PloxCallable):
+                    if callee.arity() != argc:
+                        raise arity_error(callee.arity(), argc)
+                    arguments = stack[len(stack) - argc :]
+                    del stack[len(stack) - argc :]
+                    stack[-1] = callee.call(interpreter, arguments)
+                else:
+                    raise RuntimeError("Can only call functions and classes.")
+            elif op == RETURN:
+                if not frames:
+                    return pop()
+                code, constants, upvalues, locals_, ip = frames.pop()
+            elif op == GET_CELL:
+                push(locals_[arg].value)
+            elif op == GET_UPVALUE:
+                push(upvalues[arg].value)
+            elif op == GET_PROPERTY:
+                name = constants[arg]
+                obj = stack[-1]
+                if isinstance(obj, PloxInstance):
+                    stack[-1] = obj.get(name)
+                elif isinstance(obj, NativeInstance):
+                    stack[-1] = obj.lookup(name)
+                else:
+                    raise RuntimeError(name, "Only instances have properties.")
+            elif op == MULTIPLY:
+                right = pop()
+                stack[-1] = stack[-1] * right
+            elif op == DIVIDE:
+                right = pop()
+                if right == 0:
+                    raise ValueError("Division by zero")
+                stack[-1] = stack[-1] / right
+            elif op == LESS_EQUAL:
+                right = pop()
+                stack[-1] = stack[-1] <= right
+            elif op == GREATER:
+                right = pop()
+                stack[-1] = stack[-1] > right
+            elif op == GREATER_EQUAL:
+                right = pop()
+                stack[-1] = stack[-1] >= right
+            elif op == EQUAL:
+                right = pop()
+                left = stack[-1]
+                stack[-1] = type(left) is type(right) and left == right
+            elif op == NOT_EQUAL:
+                right = pop()
+                left = stack[-1]
+                stack[-1] = not (type(left) is type(right) and left == right)
+            elif op == NOT:
+                value = stack[-1]
+                stack[-1] = value is None or value is False
+            elif op == NEGATE:
+                stack[-1] = -stack[-1]
+            elif op == AND:
+                value = stack[-1]
+                if value is None or value is False:
+                    ip = arg
+                else:
+                    pop()
+            elif op == OR:
+                value = stack[-1]
+                if value is None or value is False:
+                    pop()
+                else:
+                    ip = arg
+            elif op == SET_CELL:
+                locals_[arg].value = stack[-1]
+            elif op == SET_UPVALUE:
+                upvalues[arg].value = stack[-1]
+            elif op == STORE_UPVALUE:
+                upvalues[arg].value = pop()
+            elif op == SET_GLOBAL:
+                name = constants[arg]
+                if name.lexeme not in globals_:
+                    raise RuntimeError("Undefined variable '" + name.lexeme + "'.")
+                globals_[name.lexeme] = stack[-1]
+            elif op == SET_PROPERTY:
+                value = pop()
+                obj = stack[-1]
+                if not isinstance(obj, PloxInstance):
+                    raise RuntimeError(constants[arg], "Only instances have fields.")
+                obj.set(constants[arg], value)
+                stack[-1] = value
+            elif op == INSTANCE:
+                if not isinstance(stack[-1], PloxInstance):
+                    raise RuntimeError(constants[arg], "Only instances have fields.")
+            elif op == CALLABLE:
+                if not isinstance(stack[-1], PloxCallable):
+                    raise RuntimeError("Can only call functions and classes.")
+            elif op == PRINT:
+                print(str(pop()))
+            elif op == DEFINE_CELL:
+                locals_[arg] = Cell(pop())
+            elif op == STORE_CELL:
+                locals_[arg].value = pop()
+            elif op == MAKE_CELL:
+                locals_[arg] = Cell()
+            elif op == DECLARE_LOCAL:
+                pass
+            elif op == DEFINE_GLOBAL:
+                globals_[constants[arg].lexeme] = pop()
+            elif op == CLOSURE:
+                function_proto: FunctionProto = constants[arg]
+                push(
+                    VMClosure(
+                        function_proto,
+                        [
+                            locals_[index] if is_local else upvalues[index]
+                            for is_local, index in function_proto.upvalues
+                        ],
+                    )
+                )
+            elif op == GET_SUPER:
+                superclass = pop()
+                method = superclass.find_method(constants[arg].lexeme)
+                if not method:
+                    raise RuntimeError(constants[arg], f"Undefined property'{constants[arg].lexeme}'.")
+                stack[-1] = BoundMethod(stack[-1], method)
+            elif op == CLASS:
+                stack[-1] = VMClass(constants[arg], stack[-1], {})
+            elif op == METHOD:
+                method = pop()
+                stack[-1].add_method(constants[arg], method)
+            elif op == INHERIT:
+                if not isinstance(stack[-1], PloxClass):
+                    raise RuntimeError(constants[arg], "Superclass must be a class.")
+            elif op == IMPORT:
+                interpreter.import_module(locate(interpreter.module, constants[arg]))
+            elif op == INDEX:
+                key = pop()
+                stack[-1] = get_index(stack[-1], key)
+            elif op == SET_INDEX:
+                value = pop()
+                key = pop()
+                stack[-1] = set_index(stack[-1], key, value)
+            else:
+                raise ValueError(f"Unknown opcode {op}")
+
+
+class VMInterpreter(Interpreter):
+    """
+    Compiles programs to bytecode with ``plox.bytecode.Compiler`` and runs them on a ``VM``. Each top-level
+    statement and module body is compiled as it is about to run.
+    """
+
+    # The VM reads globals by name from the dict of a plain ``Environment``.
+    globals_type = Environment
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.vm: Final[VM] = VM(self)
+
+    def run(self, statements: list[Stmt]) -> None:
+        proto = Compiler(self).script(statements)
+        self.vm.run(VMClosure(proto, []), [None] * proto.size)
+
+    @override
+    def memoizable(self, value: Any) -> PloxCallable | None:
+        return value if isinstance(value, VMClosure) and value.proto.pure else None
+
+    @override
+    def execute(self, stmt: Stmt):
+        self.run([stmt])
+
+    @override
+    def executeBlock(self, statements: list[Stmt], environment: Environment | Frame):
+        # Only module bodies get here, and the VM runs them, like any top-level code, on the globals.
+        assert environment is self.globals
+        self.run(statements)
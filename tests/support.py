@@ -0,0 +1,39 @@
+import contextlib
+import dataclasses
+import io
+from typing import Any
+
+from plox.interpreter import Interpreter
+from plox.parser import Parser
+from plox.resolver import Resolver
+from plox.scanner import FastScanner
+from plox.token import Token
+
+# The attributes ``Resolver`` sets on nodes, which aren't dataclass fields.
+RESOLVED = ("depth", "slot", "size", "tail", "pure")
+
+
+def dump(node: Any) -> Any:
+    """
+    ``node``, a syntax tree or part of one, as nested tuples that are equal when the trees are, tokens included, and
+    with what the resolver recorded on each node.
+    """
+    if isinstance(node, Token):
+        return (node.type, node.lexeme, node.literal, node.line)
+    if isinstance(node, list):
+        return [dump(item) for item in node]
+    if dataclasses.is_dataclass(node):
+        fields = (dump(getattr(node, field.name)) for field in dataclasses.fields(node))
+        resolved = {name: getattr(node, name) for name in RESOLVED if hasattr(node, name)}
+        return (type(node).__name__, *fields, resolved)
+    return node
+
+
+def run(source: str, interpreter: Interpreter) -> str:
+    """What ``interpreter`` prints running ``source``, which is scanned, parsed and resolved first."""
+    statements = Parser(FastScanner(source).scan_tokens(), report=False).parse()
+    Resolver().resolve_program(statements)
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        interpreter.interpret(statements)
+    return output.getvalue()
@@ -0,0 +1,46 @@
+import contextlib
+import io
+import pathlib
+
+import pytest
+
+from plox.arena import AstArena
+from plox.interpreter import Interpreter
+from plox.parser import Parser
+from plox.resolver import Resolver
+from plox.scanner import FastScanner
+from tests.support import dump
+
+TEST_FILES = sorted(pathlib.Path(__file__).parent.parent.joinpath("test_files").iterdir())
+
+
+def resolved(source: str, lazy: bool) -> list:
+    statements = Parser(FastScanner(source).scan_tokens(), lazy=lazy).parse()
+    Resolver().resolve_program(statements)
+    return statements
+
+
+def run(statements: list) -> str:
+    interpreter = Interpreter()
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        interpreter.executeBlock(statements, interpreter.globals)
+    return output.getvalue()
+
+
+@pytest.mark.parametrize("lazy", [False, True], ids=["eager", "lazy"])
+@pytest.mark.parametrize("path", TEST_FILES, ids=lambda path: path.name)
+def test_round_trip_keeps_resolved_and_lazy_trees(path, lazy):
+    source = path.read_text()
+    statements = resolved(source, lazy)
+    assert dump(AstArena.from_program(statements).to_program()) == dump(statements)
+
+
+@pytest.mark.parametrize("lazy", [False, True], ids=["eager", "lazy"])
+@pytest.mark.parametrize("path", TEST_FILES, ids=lambda path: path.name)
+def test_pickled_arena_runs_like_the_program(path, lazy):
+    source = path.read_text()
+    file = io.BytesIO()
+    AstArena.from_program(resolved(source, lazy)).dump(file)
+    file.seek(0)
+    assert run(AstArena.load(file).to_program()) == run(resolved(source, lazy))
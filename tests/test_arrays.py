@@ -0,0 +1,58 @@
+import contextlib
+import io
+
+import pytest
+
+from plox.engines import ENGINES, interpreter_for
+from plox.parser import Parser
+from plox.resolver import Resolver
+from plox.scanner import FastScanner
+
+pytest.importorskip("numpy")
+
+# Each program and what it prints.
+PROGRAMS = {
+    "array and number": ("var xs = Array.range(0, 4); print xs * 2 + 1;", "[1.0, 3.0, 5.0, 7.0]\n"),
+    "number and array": (
+        "print 10 - Array.range(0, 3); print 6 / Array.range(1, 4);",
+        "[10.0, 9.0, 8.0]\n[6.0, 3.0, 2.0]\n",
+    ),
+    "array and array": (
+        "var xs = Array.range(1, 4); print xs * xs - xs; print xs / xs; print -xs;",
+        "[0.0, 2.0, 6.0]\n[1.0, 1.0, 1.0]\n[-1.0, -2.0, -3.0]\n",
+    ),
+    "reductions": (
+        "var xs = Array.range(1, 5); print xs.sum(); print xs.min(); print xs.max(); print xs.dot(xs);",
+        "10.0\n1.0\n4.0\n30.0\n",
+    ),
+    "slice is a view": (
+        "var xs = Array.zeros(4); var view = xs.slice(1, 3); view[0] = 5; view = view * 2; print xs; print view;",
+        "[0.0, 5.0, 0.0, 0.0]\n[10.0, 0.0]\n",
+    ),
+    "writes through a slice": (
+        "var xs = Array.range(0, 4); var tail = xs.slice(2, nil); tail[1] = 9; print xs[3]; print tail.length();",
+        "9.0\n2.0\n",
+    ),
+    "copy is not a view": (
+        "var xs = Array.zeros(2); var c = xs.copy(); c[0] = 1; print xs; print c;",
+        "[0.0, 0.0]\n[1.0, 0.0]\n",
+    ),
+    "lengths must match": ("print Array.zeros(2) + Array.zeros(3);", "Arrays must have the same length.\n"),
+    "division by zero": ("print 1 / Array.zeros(1);", "Division by zero\n"),
+}
+
+
+def run(engine: str, source: str) -> str:
+    statements = Parser(FastScanner(source).scan_tokens(), report=False).parse()
+    Resolver().resolve_program(statements)
+    interpreter = interpreter_for(engine)
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        interpreter.interpret(statements)
+    return output.getvalue()
+
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+@pytest.mark.parametrize(("source", "printed"), PROGRAMS.values(), ids=PROGRAMS)
+def test_array_arithmetic_and_slices(engine, source, printed):
+    assert run(engine, source) == printed
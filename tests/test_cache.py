@@ -0,0 +1,129 @@
+import contextlib
+import dataclasses
+import io
+import os
+
+import pytest
+
+from plox import cache, stmt
+from plox.interpreter import Interpreter
+from plox.parser import Parser
+from plox.resolver import Resolver
+from plox.scanner import FastScanner
+from tests.support import dump
+
+SOURCE = "fun f(n) { var m = n + 1; return m; } print f(1);"
+EDITED = SOURCE.replace("n + 1", "n + 2")
+
+
+def resolved(source: str, lazy: bool) -> list:
+    statements = Parser(FastScanner(source).scan_tokens(), report=False, lazy=lazy).parse()
+    Resolver().resolve_program(statements)
+    return statements
+
+
+def run(statements: list) -> str:
+    interpreter = Interpreter()
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        interpreter.interpret(statements)
+    return output.getvalue()
+
+
+@pytest.fixture
+def script(tmp_path):
+    """A script holding ``SOURCE``, which nothing has cached yet."""
+    path = tmp_path / "script.lox"
+    path.write_text(SOURCE)
+    return str(path)
+
+
+def test_stored_program_is_loaded_with_what_the_resolver_recorded(script):
+    assert cache.load(script, SOURCE) is None
+    statements = resolved(SOURCE, False)
+    cache.store(script, SOURCE, statements)
+    assert dump(cache.load(script, SOURCE)) == dump(statements)
+
+
+def test_lazy_programs_are_cached_apart(script):
+    cache.store(script, SOURCE, resolved(SOURCE, True), lazy=True)
+    assert cache.load(script, SOURCE) is None
+    assert run(cache.load(script, SOURCE, lazy=True)) == "2.0\n"
+
+
+def test_entry_for_another_source_is_ignored(script):
+    cache.store(script, SOURCE, resolved(SOURCE, False))
+    assert cache.load(script, EDITED) is None
+
+
+def test_entry_for_another_tree_layout_is_ignored(script, monkeypatch):
+    cache.store(script, SOURCE, resolved(SOURCE, False))
+    fingerprint = cache.schema_fingerprint()
+
+    # A node type gained since the entry was written.
+    monkeypatch.setattr(stmt, "Extra", dataclasses.make_dataclass("Extra", ["value"]), raising=False)
+    assert cache.schema_fingerprint() != fingerprint
+    monkeypatch.setattr(cache, "MAGIC", cache.MAGIC.replace(fingerprint.encode(), cache.schema_fingerprint().encode()))
+    assert cache.load(script, SOURCE) is None
+
+
+def test_entry_for_another_format_is_ignored(script, monkeypatch):
+    cache.store(script, SOURCE, resolved(SOURCE, False))
+    magic = cache.MAGIC.replace(f" {cache.FORMAT} ".encode(), f" {cache.FORMAT + 1} ".encode())
+    assert magic != cache.MAGIC
+    monkeypatch.setattr(cache, "MAGIC", magic)
+    assert cache.load(script, SOURCE) is None
+
+
+@pytest.mark.parametrize("keep", [0, 10, len(cache.MAGIC) + 40, -1], ids=["empty", "header", "hash", "pickle"])
+def test_truncated_entry_is_ignored(script, keep):
+    cache.store(script, SOURCE, resolved(SOURCE, False))
+    path = cache.cache_path(script)
+    with open(path, "rb") as f:
+        entry = f.read()
+    with open(path, "wb") as f:
+        f.write(entry[:keep])
+    assert cache.load(script, SOURCE) is None
+
+
+def test_corrupt_entry_is_ignored(script):
+    cache.store(script, SOURCE, resolved(SOURCE, False))
+    path = cache.cache_path(script)
+    with open(path, "rb") as f:
+        entry = f.read()
+    with open(path, "wb") as f:
+        f.write(entry[: len(cache.MAGIC) + 32] + b"not a pickle")
+    assert cache.load(script, SOURCE) is None
+
+
+def test_entry_is_renamed_into_place_complete(script, monkeypatch):
+    statements = resolved(SOURCE, False)
+    path = cache.cache_path(script)
+    replace = os.replace
+
+    def complete_replace(source, target):
+        # Nothing is at the target until the whole entry has been written next to it.
+        assert target == path and not os.path.exists(path)
+        assert os.path.dirname(source) == os.path.dirname(path)
+        with open(source, "rb") as f:
+            assert f.read().startswith(cache.MAGIC + cache.source_hash(SOURCE))
+        replace(source, target)
+
+    monkeypatch.setattr(os, "replace", complete_replace)
+    cache.store(script, SOURCE, statements)
+    assert os.listdir(os.path.dirname(path)) == [os.path.basename(path)]
+    assert dump(cache.load(script, SOURCE)) == dump(statements)
+
+
+def test_failed_write_leaves_the_entry_untouched(script, monkeypatch):
+    statements = resolved(SOURCE, False)
+    cache.store(script, SOURCE, statements)
+    path = cache.cache_path(script)
+
+    def failing_replace(source, target):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(os, "replace", failing_replace)
+    cache.store(script, EDITED, resolved(EDITED, False))
+    assert os.listdir(os.path.dirname(path)) == [os.path.basename(path)]
+    assert dump(cache.load(script, SOURCE)) == dump(statements)
@@ -0,0 +1,30 @@
+import pytest
+
+from plox.engines import ENGINES, interpreter_for
+from tests.support import run
+
+# Each call with the wrong number of arguments and the runtime error it prints.
+PROGRAMS = {
+    "too few": ("fun f(a, b) { return a + b; } print f(1);", "Expected 2 arguments but got 1.\n"),
+    "too many": ("fun f(a, b) { return a + b; } print f(1, 2, 3);", "Expected 2 arguments but got 3.\n"),
+    "tail call": (
+        "fun f(a) { return a; } fun g() { return f(); } print g();",
+        "Expected 1 arguments but got 0.\n",
+    ),
+    "method": ("class A { m(y) { return y; } } print A().m();", "Expected 1 arguments but got 0.\n"),
+    "initializer": ("class A { init(x) {} } print A();", "Expected 1 arguments but got 0.\n"),
+    "class without init": ("class A {} print A(1);", "Expected 0 arguments but got 1.\n"),
+    "native": ("print clock(1);", "Expected 0 arguments but got 1.\n"),
+}
+
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+@pytest.mark.parametrize(("source", "printed"), PROGRAMS.values(), ids=PROGRAMS)
+def test_arity_mismatch_is_a_runtime_error(engine, source, printed):
+    assert run(source, interpreter_for(engine)) == printed
+
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+def test_arity_is_checked_before_the_body_runs(engine):
+    source = 'fun f(a) { print "ran"; return a; } print "before"; f(1, 2); print "after";'
+    assert run(source, interpreter_for(engine)) == "before\nExpected 1 arguments but got 2.\n"
@@ -0,0 +1,61 @@
+import pytest
+
+from plox.engines import ENGINES, interpreter_for
+from tests.support import run
+
+# Makes the list ``xs`` of 3, 1 and 2 for each program below.
+PRELUDE = "var xs = List(); xs.append(3); xs.append(1); xs.append(2);"
+
+# Each program and what it prints.
+PROGRAMS = {
+    "indexing": (
+        "print xs[0]; print xs.get(1); print xs.length(); print xs[-1];",
+        "3.0\n1.0\n3.0\nList index out of range.\n",
+    ),
+    "assignment": (
+        "xs[0] = 7; xs.set(1, 8); print xs; print xs[0] = 9; print xs;",
+        "[7.0, 8.0, 2.0]\n9.0\n[9.0, 8.0, 2.0]\n",
+    ),
+    "index out of range": ("print xs[3];", "List index out of range.\n"),
+    "assignment out of range": ("xs[-4] = 1;", "List index out of range.\n"),
+    "fractional index": ("print xs[0.5];", "List index must be a whole number.\n"),
+    "string index": ('print xs["a"];', "List index must be a whole number.\n"),
+    "indexing a number": ("var n = 1; print n[0];", "Only lists, maps and arrays can be indexed.\n"),
+    "slice": (
+        "print xs.slice(1, nil); print xs.slice(nil, -1); print xs.slice(-2, 3); var s = xs.slice(0, 1); s[0] = 5;"
+        " print xs;",
+        "[1.0, 2.0]\n[3.0, 1.0]\n[1.0, 2.0]\n[3.0, 1.0, 2.0]\n",
+    ),
+    "sort": (
+        'xs.sort(); print xs; var w = List(); w.append("b"); w.append(2); w.append("a"); w.sort(); print w;',
+        "[1.0, 2.0, 3.0]\n[2.0, a, b]\n",
+    ),
+    "sort nil": ("var w = List(); w.append(nil); w.append(1); w.sort();", "Can only sort numbers and strings.\n"),
+    "sortBy": ("fun negate(x) { return -x; } xs.sortBy(negate); print xs;", "[3.0, 2.0, 1.0]\n"),
+    "map, filter and reduce": (
+        "fun twice(x) { return x * 2; } fun odd(x) { return x != 2; } fun add(a, b) { return a + b; }"
+        " print xs.map(twice); print xs.filter(odd); print xs.reduce(add, 10);",
+        "[6.0, 2.0, 4.0]\n[3.0, 1.0]\n16.0\n",
+    ),
+    "pop and extend": (
+        "print xs.pop(); xs.extend(xs); print xs; var e = List(); e.pop();",
+        "2.0\n[3.0, 1.0, 3.0, 1.0]\nCan't pop from an empty list.\n",
+    ),
+    "map keys": (
+        'var m = Map(); m[1] = "one"; m[true] = "true"; m[nil] = "nil"; m["1"] = "string";'
+        ' print m[1]; print m[true]; print m[nil]; print m["1"]; print m.length();',
+        "one\ntrue\nnil\nstring\n4.0\n",
+    ),
+    "map remove": (
+        'var m = Map(); m["a"] = 1; m["b"] = 2; print m.remove("a"); print m.keys(); print m.values(); print m;',
+        "1.0\n[b]\n[2.0]\n{b: 2.0}\n",
+    ),
+    "missing map key": ("var m = Map(); print m[1];", "Undefined key.\n"),
+    "bad map key": ("var m = Map(); m[List()] = 1;", "Map keys must be numbers, strings, booleans or nil.\n"),
+}
+
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+@pytest.mark.parametrize(("source", "printed"), PROGRAMS.values(), ids=PROGRAMS)
+def test_lists_and_maps(engine, source, printed):
+    assert run(f"{PRELUDE} {source}", interpreter_for(engine)) == printed
@@ -0,0 +1,28 @@
+import functools
+import pathlib
+import subprocess
+import sys
+
+import pytest
+
+from plox.engines import ENGINES
+
+ROOT = pathlib.Path(__file__).parent.parent
+TEST_FILES = sorted(ROOT.joinpath("test_files").iterdir())
+
+
+@functools.cache
+def run(path: pathlib.Path, engine: str, optimize: bool) -> tuple[int, str]:
+    """The exit code and output of ``plox`` running ``path`` on ``engine``, with ``-O`` if ``optimize``."""
+    options = ["--no-cache", "--engine", engine, *(["-O"] if optimize else [])]
+    result = subprocess.run(
+        [sys.executable, "-m", "plox", *options, str(path)], cwd=ROOT, capture_output=True, text=True, timeout=120
+    )
+    return result.returncode, result.stdout
+
+
+@pytest.mark.parametrize("optimize", [False, True], ids=["plain", "optimized"])
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+@pytest.mark.parametrize("path", TEST_FILES, ids=lambda path: path.name)
+def test_engines_print_what_the_tree_interpreter_does(path, engine, optimize):
+    assert run(path, engine, optimize) == run(path, "tree", False)
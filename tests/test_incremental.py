@@ -0,0 +1,36 @@
+import pathlib
+import random
+
+import pytest
+
+from plox.incremental import IncrementalDocument
+
+TEST_FILES = sorted(pathlib.Path(__file__).parent.parent.joinpath("test_files").iterdir())
+
+# Pieces of source that edits insert, chosen to open and close blocks, strings and comments mid-declaration.
+FRAGMENTS = ('"', "{", "}", "(", ")", ";", "\n", "/*", "*/", "//", "var x = 1;", "fun f() {", 'print "a";', "x", " ")
+
+
+def random_edit(document: IncrementalDocument, rng: random.Random) -> None:
+    start = rng.randrange(len(document.text) + 1)
+    end = min(start + rng.choice((0, 0, 1, 1, 2, 5, 20)), len(document.text))
+    text = "".join(rng.choices(FRAGMENTS, k=rng.choice((0, 1, 1, 2))))
+    document.edit(start, end, text)
+
+
+@pytest.mark.parametrize("seed", range(20))
+@pytest.mark.parametrize("path", TEST_FILES, ids=lambda path: path.name)
+def test_edits_report_what_a_full_parse_does(path, seed):
+    rng = random.Random(seed)
+    document = IncrementalDocument(path.read_text())
+    for _ in range(25):
+        random_edit(document, rng)
+        assert document.diagnostics == IncrementalDocument(document.text).diagnostics, repr(document.text)
+
+
+def test_unterminated_string_swallowing_the_edit():
+    text = 'print "s";\n"abc"x;\nprint 1;\n'
+    document = IncrementalDocument(text)
+    quote = text.index("abc") + 3
+    assert document.edit(quote, quote + 1, "") == IncrementalDocument(document.text).diagnostics
+    assert [diagnostic.message for diagnostic in document.diagnostics] == ["Unterminated string."]
@@ -0,0 +1,48 @@
+import pytest
+
+from plox.engines import ENGINES, interpreter_for
+from tests.support import run
+
+
+def statistics(source: str, engine: str) -> tuple[str, str]:
+    """What running ``source`` on ``engine`` prints, and the statistics of the one function it memoizes."""
+    interpreter = interpreter_for(engine)
+    printed = run(source, interpreter)
+    [memoized] = interpreter.memoized
+    return printed, memoized.statistics()
+
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+def test_least_recently_used_results_are_evicted(engine):
+    source = "fun f(n) { return n * 2; } f = memoize(f, 2); print f(1); print f(2); print f(1); print f(3); print f(2);"
+    assert statistics(source, engine) == (
+        "2.0\n4.0\n2.0\n6.0\n4.0\n",
+        "<fn f >: 1 hits, 4 misses, 2 evictions, 2/2 entries, 0 uncached calls",
+    )
+
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+def test_calls_that_raise_evict_nothing(engine):
+    source = 'fun f(n) { return -n; } f = memoize(f, nil); print f(1); print f("s");'
+    assert statistics(source, engine) == (
+        "-1.0\nbad operand type for unary -: 'str'\n",
+        "<fn f >: 0 hits, 2 misses, 0 evictions, 1/unbounded entries, 0 uncached calls",
+    )
+
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+def test_calls_with_instances_are_not_cached(engine):
+    source = "class A {} fun f(a) { return 1; } f = memoize(f, nil); print f(A()); print f(A()); print f(true);"
+    assert statistics(source, engine) == (
+        "1.0\n1.0\n1.0\n",
+        "<fn f >: 0 hits, 1 misses, 0 evictions, 1/unbounded entries, 2 uncached calls",
+    )
+
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+def test_true_and_one_are_cached_apart(engine):
+    source = "fun f(x) { return x; } f = memoize(f, nil); print f(1); print f(true); print f(1);"
+    assert statistics(source, engine) == (
+        "1.0\nTrue\n1.0\n",
+        "<fn f >: 1 hits, 2 misses, 0 evictions, 2/unbounded entries, 0 uncached calls",
+    )
@@ -0,0 +1,107 @@
+import concurrent.futures
+import os
+
+import pytest
+
+from plox import modules
+from plox.engines import ENGINES, interpreter_for
+from plox.interpreter import Interpreter, LoxCompileError
+from plox.parser import Parser
+from plox.scanner import FastScanner
+from tests.support import run
+
+
+def script(directory, files: dict[str, str], engine: str) -> tuple[str, Interpreter]:
+    """
+    Write ``files`` to ``directory`` and return the source of the one called ``main.lox`` with an ``engine``
+    interpreter running it, as ``plox`` would.
+    """
+    for name, source in files.items():
+        directory.joinpath(name).write_text(source)
+    interpreter = interpreter_for(engine)
+    interpreter.modules.use_cache = False
+    interpreter.module = os.path.realpath(directory / "main.lox")
+    interpreter.imported.add(interpreter.module)
+    return files["main.lox"], interpreter
+
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+def test_module_runs_once_per_interpreter(tmp_path, engine):
+    files = {
+        "main.lox": 'import "counter.lox"; import "user.lox"; import "counter.lox"; print count;',
+        "counter.lox": 'var count = 0; print "counter";',
+        "user.lox": 'import "counter.lox"; count = count + 1;',
+    }
+    source, interpreter = script(tmp_path, files, engine)
+    assert run(source, interpreter) == "counter\n1.0\n"
+    assert run(source, interpreter) == "1.0\n"
+
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+def test_cyclic_imports_run_each_module_once(tmp_path, engine):
+    files = {
+        "main.lox": 'import "a.lox"; import "b.lox"; print a() + b();',
+        "a.lox": 'import "b.lox"; fun a() { return 1; } print "a";',
+        "b.lox": 'import "a.lox"; fun b() { return 2; } print "b";',
+    }
+    source, interpreter = script(tmp_path, files, engine)
+    statements = Parser(FastScanner(source).scan_tokens(), report=False).parse()
+    assert interpreter.modules.load_graph(interpreter.module, statements) == []
+    assert sorted(interpreter.modules.modules) == [os.path.realpath(tmp_path / name) for name in ("a.lox", "b.lox")]
+    assert run(source, interpreter) == "b\na\n3.0\n"
+
+
+def test_missing_module_is_reported(tmp_path):
+    source, interpreter = script(tmp_path, {"main.lox": 'import "a.lox";', "a.lox": 'import "missing.lox";'}, "tree")
+    statements = Parser(FastScanner(source).scan_tokens(), report=False).parse()
+    [failed] = interpreter.modules.load_graph(interpreter.module, statements)
+    missing = os.path.realpath(tmp_path / "missing.lox")
+    assert failed.path == missing
+    assert failed.errors == [f"Can't open module '{missing}': No such file or directory."]
+
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+def test_missing_module_is_a_compile_error(tmp_path, engine):
+    source, interpreter = script(tmp_path, {"main.lox": 'print "before"; import "missing.lox";'}, engine)
+    with pytest.raises(LoxCompileError, match="Can't open module"):
+        run(source, interpreter)
+
+
+class RecordingPool(concurrent.futures.ProcessPoolExecutor):
+    """A process pool that records the paths of the modules it is asked to compile."""
+
+    submitted: list[str] = []
+
+    def submit(self, fn, path, *args, **kwargs):
+        assert fn is modules.compile_module
+        RecordingPool.submitted.append(path)
+        return super().submit(fn, path, *args, **kwargs)
+
+
+@pytest.mark.parametrize(("jobs", "pooled"), [(1, []), (2, ["a.lox", "b.lox", "c.lox"])])
+def test_independent_modules_are_compiled_in_the_pool(tmp_path, monkeypatch, jobs, pooled):
+    monkeypatch.setattr(modules, "ProcessPoolExecutor", RecordingPool)
+    monkeypatch.setattr(RecordingPool, "submitted", [])
+    files = {
+        "main.lox": 'import "a.lox"; import "b.lox"; import "c.lox"; print a + b + c;',
+        "a.lox": "var a = 1;",
+        "b.lox": "var b = 2;",
+        "c.lox": "var c = 3;",
+    }
+    source, interpreter = script(tmp_path, files, "tree")
+    interpreter.modules.jobs = jobs
+    statements = Parser(FastScanner(source).scan_tokens(), report=False).parse()
+    assert interpreter.modules.load_graph(interpreter.module, statements) == []
+    assert sorted(RecordingPool.submitted) == [os.path.realpath(tmp_path / name) for name in pooled]
+    assert run(source, interpreter) == "6.0\n"
+
+
+def test_lone_module_is_compiled_in_process(tmp_path, monkeypatch):
+    monkeypatch.setattr(modules, "ProcessPoolExecutor", RecordingPool)
+    monkeypatch.setattr(RecordingPool, "submitted", [])
+    source, interpreter = script(tmp_path, {"main.lox": 'import "a.lox"; print a;', "a.lox": "var a = 1;"}, "tree")
+    interpreter.modules.jobs = 2
+    statements = Parser(FastScanner(source).scan_tokens(), report=False).parse()
+    assert interpreter.modules.load_graph(interpreter.module, statements) == []
+    assert RecordingPool.submitted == []
+    assert run(source, interpreter) == "1.0\n"
@@ -0,0 +1,88 @@
+import pathlib
+
+import pytest
+
+from benchmarks.parse_throughput import program
+from plox.expr import Grouping, Logical, Unary, Variable
+from plox.parser import Parser, RecursiveDescentParser
+from plox.scanner import FastScanner
+from plox.stmt import Class, Function, Print
+from plox.token_type import TokenType
+from tests.support import dump
+
+TEST_FILES = sorted(pathlib.Path(__file__).parent.parent.joinpath("test_files").iterdir())
+
+SOURCES = {
+    "precedence": "print 1 + 2 * 3 - 4 / -5 < 6 == !(7 >= 8) != nil;",
+    "logic": "print a or b and c or !d and e == f;",
+    "assignment": "a = b.c = d[0] = e;",
+    "calls": "print f(1)(2).g[3](h, i - 1);",
+    "adjacent group": "print 2 (3 + 4);",
+    "errors": "print 1 +; var = 2; print (1; a + b = c;",
+}
+
+
+def parse(parser: type[Parser], source: str) -> tuple:
+    instance = parser(FastScanner(source).scan_tokens(), report=False)
+    statements = instance.parse()
+    return dump(statements), [(error.token.line, error.token.lexeme, str(error)) for error in instance.errors]
+
+
+@pytest.mark.parametrize("path", TEST_FILES, ids=lambda path: path.name)
+def test_precedence_climbing_matches_recursive_descent_on_test_files(path):
+    source = path.read_text()
+    assert parse(Parser, source) == parse(RecursiveDescentParser, source)
+
+
+@pytest.mark.parametrize("source", [*SOURCES.values(), *(program(200, seed) for seed in range(5))])
+def test_precedence_climbing_matches_recursive_descent(source):
+    assert parse(Parser, source) == parse(RecursiveDescentParser, source)
+
+
+def test_and_inside_a_grouping():
+    # The original parser read 'and' as 'or' in logic_and, so it rejected any 'and' expression.
+    parser = Parser(FastScanner("print (-x and y);").scan_tokens(), report=False)
+    [statement] = parser.parse()
+    assert not parser.errors
+    assert isinstance(statement, Print) and isinstance(statement.expression, Grouping)
+    logical = statement.expression.expression
+    assert isinstance(logical, Logical) and logical.operator.type == TokenType.AND
+    assert isinstance(logical.left, Unary) and isinstance(logical.right, Variable)
+
+
+def test_and_binds_tighter_than_or():
+    [statement] = Parser(FastScanner("print a or b and c;").scan_tokens()).parse()
+    assert isinstance(statement, Print)
+    logical = statement.expression
+    assert isinstance(logical, Logical) and logical.operator.type == TokenType.OR
+    assert isinstance(logical.right, Logical) and logical.right.operator.type == TokenType.AND
+
+
+def errors(source: str, lazy: bool) -> list[tuple]:
+    parser = Parser(FastScanner(source).scan_tokens(), report=False, lazy=lazy)
+    parser.parse()
+    return [(error.token.line, error.token.lexeme, str(error)) for error in parser.errors]
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        "fun bad() { var x = ; }",
+        "fun bad() { print a b; }",
+        "fun bad() { g(1, 2; }",
+        "fun bad() { if (x) { print 1; }",
+        "fun ok() { fun bad() { print ; } }",
+        "class A { ok() { return this.x; } bad() { return this.; } }",
+    ],
+)
+def test_lazy_parser_reports_errors_in_skipped_bodies(source):
+    assert errors(source, lazy=False)
+    assert errors(source, lazy=True) == errors(source, lazy=False)
+
+
+@pytest.mark.parametrize("path", TEST_FILES, ids=lambda path: path.name)
+def test_lazy_parser_skips_well_formed_bodies(path):
+    statements = Parser(FastScanner(path.read_text()).scan_tokens(), report=False, lazy=True).parse()
+    functions = [statement for statement in statements if isinstance(statement, Function)]
+    functions += [method for statement in statements if isinstance(statement, Class) for method in statement.methods]
+    assert all(function.lazy is not None for function in functions)
@@ -0,0 +1,58 @@
+from plox.quickening import QuickeningInterpreter
+from tests.support import run
+
+CLASSES = """
+class P { init(x) { this.x = x; } getx() { return this.x; } }
+class Q { init(x) { this.x = x; } getx() { return -this.x; } }
+fun twice(n) { return n * 2; }
+class F { init() { this.f = twice; } }
+class G { init() { this.g = 0; this.f = twice; } }
+"""
+
+
+def sites(source: str) -> tuple[str, dict[str, tuple[str, int]]]:
+    """What ``source`` prints on the quick engine, and the state and deoptimizations of each site by description."""
+    interpreter = QuickeningInterpreter()
+    printed = run(CLASSES + source, interpreter)
+    return printed, {
+        feedback.description: (type(feedback.site).__name__, feedback.deoptimizations)
+        for feedback in interpreter.feedback
+    }
+
+
+def test_method_call_specializes():
+    printed, states = sites("var p = P(1); var s = 0; for (var i = 0; i < 20; i = i + 1) s = s + p.getx(); print s;")
+    assert printed == "20.0\n"
+    assert states[".getx"] == ("MethodGet", 0)
+
+
+def test_method_call_deoptimizes_when_the_shape_changes():
+    printed, states = sites(
+        "var p = P(1); var s = 0;"
+        " for (var i = 0; i < 20; i = i + 1) { if (i == 10) p.y = 0; s = s + p.getx(); } print s;"
+    )
+    assert printed == "20.0\n"
+    assert states[".getx"] == ("Get", 1)
+
+
+def test_method_call_deoptimizes_for_another_class():
+    printed, states = sites(
+        "var ps = List(); for (var i = 0; i < 20; i = i + 1) { if (i < 10) ps.append(P(1)); else ps.append(Q(1)); }"
+        " var s = 0; for (var i = 0; i < 20; i = i + 1) s = s + ps[i].getx(); print s;"
+    )
+    assert printed == "0.0\n"
+    assert states[".getx"] == ("Get", 1)
+
+
+def test_calling_a_field_specializes():
+    printed, states = sites("var o = F(); var s = 0; for (var i = 0; i < 20; i = i + 1) s = s + o.f(1); print s;")
+    assert printed == "40.0\n"
+    assert states[".f"] == ("FieldGet", 0)
+
+
+def test_calling_a_field_deoptimizes_when_the_shape_changes():
+    printed, states = sites(
+        "var o = F(); var s = 0; for (var i = 0; i < 20; i = i + 1) { if (i == 10) o = G(); s = s + o.f(1); } print s;"
+    )
+    assert printed == "40.0\n"
+    assert states[".f"] == ("Get", 1)
@@ -0,0 +1,34 @@
+import pytest
+
+from plox.interpreter import Interpreter
+from plox.parser import Parser
+from plox.resolver import Resolver
+from plox.scanner import FastScanner
+from plox.stmt import Function
+
+# Whether ``f`` may be memoized, by what its body and the functions declared in it do.
+PURITY = {
+    "fun f(n) { return n + 1; }": True,
+    "fun f(n) { print n; return n; }": False,
+    "fun f(n) { counter = counter + 1; return n; }": False,
+    "fun f(n) { var c = 0; c = c + n; return c; }": True,
+    "fun f(n) { fun g() { counter = counter + 1; } g(); return n; }": False,
+    "fun f(n) { fun g() { fun h() { counter = 1; } h(); } g(); return n; }": False,
+    "fun f(n) { fun g() { print n; } g(); return n; }": False,
+    "fun f(n) { var c = 0; fun g() { c = c + 1; } g(); return n + c; }": True,
+    "fun f(n) { fun g() { n = n + 1; } g(); return n; }": True,
+    "fun f(n) { fun g() { fun h() { n = 1; } h(); } g(); return n; }": True,
+    "fun f(n) { class A { m() { this.x = 1; } } return n; }": False,
+}
+
+
+@pytest.mark.parametrize("lazy", [False, True], ids=["eager", "lazy"])
+@pytest.mark.parametrize(("source", "pure"), PURITY.items())
+def test_purity_covers_nested_functions(source, pure, lazy):
+    statements = Parser(FastScanner(source).scan_tokens(), report=False, lazy=lazy).parse()
+    Resolver().resolve_program(statements)
+    [function] = statements
+    assert isinstance(function, Function)
+    if lazy:
+        Interpreter().compile_function(function)
+    assert function.pure is pure
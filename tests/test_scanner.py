@@ -0,0 +1,67 @@
+import io
+import pathlib
+
+import pytest
+
+from plox.parser import Parser
+from plox.scanner import CompactScanner, FastScanner, Scanner, StreamScanner
+from tests.support import dump
+
+TEST_FILES = sorted(pathlib.Path(__file__).parent.parent.joinpath("test_files").iterdir())
+
+SOURCES = {
+    "operators": "( ) { } [ ] , . - + ; * / ! != = == > >= < <=",
+    "keywords": "and class else false fun for if import nil or print return super this true var while orchid",
+    "numbers": "0 12 3.5 4. .5 007",
+    "strings": 'print "one";\n"two\nlines" "";',
+    "comments": "a // to the end\nb /* across\ntwo lines */ c / d",
+    "blanks": "\tx\r\n\n  y",
+}
+
+
+def tokens(scanner):
+    return [(token.type, token.lexeme, token.literal, token.line) for token in scanner.scan_tokens()]
+
+
+@pytest.mark.parametrize("path", TEST_FILES, ids=lambda path: path.name)
+def test_fast_scanner_matches_legacy_on_test_files(path):
+    source = path.read_text()
+    assert tokens(FastScanner(source)) == tokens(Scanner(source))
+
+
+@pytest.mark.parametrize("source", SOURCES.values(), ids=SOURCES.keys())
+def test_fast_scanner_matches_legacy(source):
+    assert tokens(FastScanner(source)) == tokens(Scanner(source))
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1 << 16])
+@pytest.mark.parametrize("path", TEST_FILES, ids=lambda path: path.name)
+def test_stream_scanner_matches_fast_scanner(path, chunk_size):
+    source = path.read_text()
+    streamed = StreamScanner(io.BytesIO(source.encode()), chunk_size=chunk_size)
+    assert tokens(streamed) == tokens(FastScanner(source))
+
+
+@pytest.mark.parametrize("path", TEST_FILES, ids=lambda path: path.name)
+def test_token_store_matches_fast_scanner(path):
+    source = path.read_text()
+    store = CompactScanner(source).scan_tokens()
+    expected = tokens(FastScanner(source))
+    assert [(token.type, token.lexeme, token.literal, token.line) for token in store] == expected
+    assert [store.type(i) for i in range(len(store))] == [token[0] for token in expected]
+    assert [store.lexeme(i) for i in range(len(store))] == [token[1] for token in expected]
+    assert store[-1].type == expected[-1][0]
+    assert [(token.type, token.lexeme) for token in store[2:9]] == [token[:2] for token in expected[2:9]]
+
+
+def test_token_store_interns_names():
+    store = CompactScanner("var value = value + other;").scan_tokens()
+    assert store[1].lexeme is store[3].lexeme
+    assert store.lexeme(1) is store[3].lexeme
+
+
+@pytest.mark.parametrize("path", TEST_FILES, ids=lambda path: path.name)
+def test_parser_reads_token_store_like_a_list(path):
+    source = path.read_text()
+    compact = Parser(CompactScanner(source).scan_tokens()).parse()
+    assert dump(compact) == dump(Parser(FastScanner(source).scan_tokens()).parse())
@@ -0,0 +1,24 @@
+import pytest
+
+from plox.engines import interpreter_for
+from tests.support import run
+
+# Each program makes about 100,000 calls in a row, all of them in tail position.
+PROGRAMS = {
+    "self recursion": (
+        "fun count(n, total) { if (n == 0) return total; return count(n - 1, total + 1); } print count(100000, 0);",
+        "100000.0\n",
+    ),
+    "mutual recursion": (
+        "fun isEven(n) { if (n == 0) return true; return isOdd(n - 1); }"
+        "fun isOdd(n) { if (n == 0) return false; return isEven(n - 1); }"
+        "print isEven(100000); print isOdd(100001);",
+        "True\nTrue\n",
+    ),
+}
+
+
+@pytest.mark.parametrize("engine", ["tree", "quick", "closure"])
+@pytest.mark.parametrize(("source", "printed"), PROGRAMS.values(), ids=PROGRAMS)
+def test_tail_calls_run_in_constant_stack_space(engine, source, printed):
+    assert run(source, interpreter_for(engine)) == printed